@@ -1,11 +1,15 @@
 import os
 import json
 import glob
+import hashlib
 import re
+import argparse
+import functools
 import logging
 import sys
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,23 +18,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-try:
-    import pandas as pd
-    import openpyxl
-    from pydantic import BaseModel, Field, field_validator, model_validator, ValidationError
-except ImportError as e:
-    logger.error(f"Missing required libraries: {e}")
-    logger.error("Please run: pip install pandas openpyxl pydantic")
-    sys.exit(1)
+from columnar import encode_columnar, save_columnar, variant_sizes, write_precompressed
+from exam_archive import ExamArchive, semester_from_dates, semester_from_title
+from exam_conflicts import detect_conflicts
+from ics_feeds import build_events, events_digest, render_calendar
+from inventory_stats import InventoryStats
+from parse_cache import ParseCache, compute_version
+from pipeline_metrics import NULL_METRICS, PipelineMetrics, format_stage_table
+from search_index import build_search_index, save_search_index
 
 # --- Configuration & Paths ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PUBLIC_DIR = os.path.join(BASE_DIR, 'public')
-DATA_DIR = os.path.join(PUBLIC_DIR, 'data')
-OUTPUT_DOC_PATH = os.path.join(DATA_DIR, 'DATA_INVENTORY.md')
-MERGED_JSON_PATH = os.path.join(DATA_DIR, 'all_exams.json')
+PARSE_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'parse')
+# Per-stage timings of the latest run (shared with the crawler, not published)
+METRICS_PATH = os.path.join(BASE_DIR, 'pipeline_metrics.json')
+# Every semester's records, kept after the crawler replaces the workbooks in public/data.
+# Committed with the data (outside public/, so not deployed) rather than cached: it is the only copy.
+ARCHIVE_PATH = os.path.join(BASE_DIR, 'archive', 'exams.sqlite')
 
-os.makedirs(DATA_DIR, exist_ok=True)
+def configure_paths(data_dir: str, cache_dir: Optional[str] = None) -> None:
+    """Points the workbook input and every output path at `data_dir` (and optionally the parse cache at `cache_dir`)."""
+    global DATA_DIR, OUTPUT_DOC_PATH, MERGED_JSON_PATH, COLUMNAR_JSON_PATH, CLASS_SHARD_DIR, \
+        DELTA_PATH, RECORD_IDS_PATH, CONFLICTS_PATH, CLASS_INDEX_PATH, CLASS_SEARCH_INDEX_PATH, CALENDAR_DIR, CALENDAR_INDEX_PATH, SUMMARY_PATH, PARSE_CACHE_DIR
+    DATA_DIR = data_dir
+    OUTPUT_DOC_PATH = os.path.join(DATA_DIR, 'DATA_INVENTORY.md')
+    MERGED_JSON_PATH = os.path.join(DATA_DIR, 'all_exams.json')
+    COLUMNAR_JSON_PATH = os.path.join(DATA_DIR, 'all_exams.columnar.json')
+    DELTA_PATH = os.path.join(DATA_DIR, 'all_exams.delta.json')
+    RECORD_IDS_PATH = os.path.join(DATA_DIR, 'record_ids.json')
+    CONFLICTS_PATH = os.path.join(DATA_DIR, 'conflicts.json')
+    CLASS_SHARD_DIR = os.path.join(DATA_DIR, 'classes')
+    CLASS_INDEX_PATH = os.path.join(DATA_DIR, 'class_index.json')
+    CLASS_SEARCH_INDEX_PATH = os.path.join(DATA_DIR, 'class_search_index.json')
+    CALENDAR_DIR = os.path.join(DATA_DIR, 'calendars')
+    CALENDAR_INDEX_PATH = os.path.join(CALENDAR_DIR, 'index.json')
+    SUMMARY_PATH = os.path.join(DATA_DIR, 'data_summary.json')
+    if cache_dir:
+        PARSE_CACHE_DIR = cache_dir
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+configure_paths(os.path.join(PUBLIC_DIR, 'data'))
 
 # Field Mapping: Excel Column Names -> Model Fields
 FIELD_MAPPING = {
@@ -52,269 +80,747 @@ FIELD_MAPPING = {
 REGEX_CHINESE = re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日.*?(\d{1,2}:\d{2})\s*[-~至]\s*(\d{1,2}:\d{2})')
 REGEX_ISO = re.compile(r'\(?(\d{4}-\d{1,2}-\d{1,2})\)?.*?(\d{1,2}:\d{2})\s*[-~至]\s*(\d{1,2}:\d{2})')
 
+BEIJING_TZ = timezone(timedelta(hours=8))
+
 def get_beijing_time() -> datetime:
     """Get current time in Beijing Timezone (UTC+8)"""
     utc_dt = datetime.now(timezone.utc)
-    beijing_tz = timezone(timedelta(hours=8))
-    return utc_dt.astimezone(beijing_tz)
-
+    return utc_dt.astimezone(BEIJING_TZ)
 
 
-# --- Pydantic Model ---
-class ExamRecord(BaseModel):
-    id: str
-    source_file: str = Field(alias='_source_file')
-    row_index: int = Field(alias='_row_index')
-
-    # Raw Data Fields
-    campus: str = ""
-    course_name: str = ""
-    course_code: str = ""
-    class_name: str = ""
-    teacher: str = ""
-    location: str = ""
-    raw_time: str = ""
-    count: int = 0
-    school: str = ""
-    student_school: str = ""
-    major: str = ""
-    grade: str = ""
-    notes: str = ""
-
-    # Parsed/Derived Fields
+# --- Time Parsing Engine ---
+class ParsedTime(NamedTuple):
     start_timestamp: Optional[str] = None
     end_timestamp: Optional[str] = None
     duration_minutes: int = 0
     date: Optional[str] = None
     parse_error: Optional[str] = None
 
-    @field_validator(
-        'campus', 'course_name', 'course_code', 'class_name', 'teacher', 
-        'location', 'raw_time', 'school', 'student_school', 
-        'major', 'grade', 'notes', 
-        mode='before'
-    )
-    @classmethod
-    def clean_text_fields(cls, v: Any) -> str:
-        """Cleans string fields by removing non-breaking spaces and stripping whitespace."""
-        if pd.isna(v) or v == "" or v is None:
-            return ""
-        return str(v).replace('\xa0', ' ').strip()
-
-    @field_validator('count', mode='before')
-    @classmethod
-    def clean_count_field(cls, v: Any) -> int:
-        """Safely parses the count field to integer."""
-        try:
-            return int(v) if pd.notnull(v) and v != "" else 0
-        except (ValueError, TypeError):
-            return 0
-
-    @model_validator(mode='after')
-    def parse_time_logic(self):
-        """
-        Parses the raw_time field to extract start/end timestamps and duration.
-        Updates the model fields directly.
-        """
-        time_str = self.raw_time
-        if not time_str:
-            self.parse_error = "Missing time data"
-            return self
+@functools.lru_cache(maxsize=4096)
+def parse_time_string(time_str: str) -> ParsedTime:
+    """
+    Parses a raw exam time string into timestamps, duration and date.
+    A sheet only has a few hundred distinct time strings, so results are memoized.
+    """
+    if not time_str:
+        return ParsedTime(parse_error="Missing time data")
 
-        # If it's already a datetime object (rare in raw excel read as string, but possible)
-        if isinstance(time_str, (datetime, pd.Timestamp)):
-            time_str = str(time_str)
+    try:
+        match_cn = REGEX_CHINESE.search(time_str)
+        if match_cn:
+            year, month, day, start_hm, end_hm = match_cn.groups()
+            date_str = f"{year}-{int(month):02d}-{int(day):02d}"
+        else:
+            match_iso = REGEX_ISO.search(time_str)
+            if not match_iso:
+                return ParsedTime(parse_error="Unrecognized date format")
+            d_str, start_hm, end_hm = match_iso.groups()
+            try:
+                date_str = datetime.strptime(d_str, "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                date_str = d_str
 
-        start_dt = None
-        end_dt = None
-        date_str = ""
+        # Add Beijing Timezone (UTC+8) explicitly
+        start_dt = datetime.strptime(f"{date_str} {start_hm}:00", "%Y-%m-%d %H:%M:%S").replace(tzinfo=BEIJING_TZ)
+        end_dt = datetime.strptime(f"{date_str} {end_hm}:00", "%Y-%m-%d %H:%M:%S").replace(tzinfo=BEIJING_TZ)
 
-        try:
-            match_cn = REGEX_CHINESE.search(time_str)
-            match_iso = REGEX_ISO.search(time_str)
+        return ParsedTime(
+            start_timestamp=start_dt.isoformat(),
+            end_timestamp=end_dt.isoformat(),
+            duration_minutes=int((end_dt - start_dt).total_seconds() / 60),
+            date=date_str
+        )
+    except Exception as e:
+        return ParsedTime(parse_error=f"Parsing exception: {str(e)}")
 
-            if match_cn:
-                year, month, day, start_hm, end_hm = match_cn.groups()
-                date_str = f"{year}-{int(month):02d}-{int(day):02d}"
-            elif match_iso:
-                d_str, start_hm, end_hm = match_iso.groups()
-                try:
-                    date_str = datetime.strptime(d_str, "%Y-%m-%d").strftime("%Y-%m-%d")
-                except ValueError:
-                    date_str = d_str
-            else:
-                self.parse_error = "Unrecognized date format"
-                return self
+def parse_time_batch(time_strs: Iterable[str]) -> Dict[str, ParsedTime]:
+    """Parses each distinct time string of a column once, returning {raw_time: ParsedTime}."""
+    return {time_str: parse_time_string(time_str) for time_str in set(time_strs)}
 
-            start_str = f"{date_str} {start_hm}:00"
-            end_str = f"{date_str} {end_hm}:00"
 
-            # Add Beijing Timezone (UTC+8) explicitly
-            beijing_tz = timezone(timedelta(hours=8))
-            start_dt = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=beijing_tz)
-            end_dt = datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=beijing_tz)
+# --- Heavy Dependencies ---
+# pandas, openpyxl and pydantic take most of a second to import, so they are only
+# loaded once a workbook actually has to be parsed. Until load_dependencies() has
+# run, the module globals pd, openpyxl and ExamRecord do not exist; accessing them
+# as attributes from outside (see __getattr__) loads them on demand.
+PARSING_LIBRARIES = ('pandas', 'openpyxl', 'pydantic')
 
-            self.duration_minutes = int((end_dt - start_dt).total_seconds() / 60)
-            self.start_timestamp = start_dt.isoformat()
-            self.end_timestamp = end_dt.isoformat()
-            self.date = date_str
-            self.parse_error = None  # Clear error if successful
+def load_dependencies() -> None:
+    """Imports the parsing libraries and defines ExamRecord; later calls are no-ops."""
+    global pd, openpyxl, ExamRecord
+    if 'ExamRecord' in globals():
+        return
+    try:
+        import pandas as pd
+        import openpyxl
+        import pydantic  # noqa: F401
+    except ImportError as e:
+        logger.error(f"Missing required libraries: {e}")
+        logger.error("Please run: pip install pandas openpyxl pydantic")
+        sys.exit(1)
+    ExamRecord = define_exam_record()
 
-        except Exception as e:
-            self.parse_error = f"Parsing exception: {str(e)}"
-        
-        return self
+def __getattr__(name: str) -> Any:
+    if name in ('pd', 'openpyxl', 'ExamRecord'):
+        load_dependencies()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --- Pydantic Model ---
+def define_exam_record():
+    """Builds the ExamRecord model; called by load_dependencies once pandas is imported."""
+    from pydantic import BaseModel, Field, field_validator, model_validator
+
+    class ExamRecord(BaseModel):
+        id: str
+        source_file: str = Field(alias='_source_file')
+        row_index: int = Field(alias='_row_index')
+
+        # Raw Data Fields
+        campus: str = ""
+        course_name: str = ""
+        course_code: str = ""
+        class_name: str = ""
+        teacher: str = ""
+        location: str = ""
+        raw_time: str = ""
+        count: int = 0
+        school: str = ""
+        student_school: str = ""
+        major: str = ""
+        grade: str = ""
+        notes: str = ""
+
+        # Parsed/Derived Fields
+        start_timestamp: Optional[str] = None
+        end_timestamp: Optional[str] = None
+        duration_minutes: int = 0
+        date: Optional[str] = None
+        parse_error: Optional[str] = None
+
+        @field_validator(
+            'campus', 'course_name', 'course_code', 'class_name', 'teacher', 
+            'location', 'raw_time', 'school', 'student_school', 
+            'major', 'grade', 'notes', 
+            mode='before'
+        )
+        @classmethod
+        def clean_text_fields(cls, v: Any) -> str:
+            """Cleans string fields by removing non-breaking spaces and stripping whitespace."""
+            if pd.isna(v) or v == "" or v is None:
+                return ""
+            return str(v).replace('\xa0', ' ').strip()
+
+        @field_validator('count', mode='before')
+        @classmethod
+        def clean_count_field(cls, v: Any) -> int:
+            """Safely parses the count field to integer."""
+            try:
+                return int(v) if pd.notnull(v) and v != "" else 0
+            except (ValueError, TypeError):
+                return 0
+
+        @model_validator(mode='after')
+        def parse_time_logic(self):
+            """
+            Parses the raw_time field to extract start/end timestamps and duration.
+            Updates the model fields directly.
+            """
+            time_str = self.raw_time
+            # If it's already a datetime object (rare in raw excel read as string, but possible)
+            if isinstance(time_str, (datetime, pd.Timestamp)):
+                time_str = str(time_str)
+
+            parsed = parse_time_string(time_str)
+            self.start_timestamp = parsed.start_timestamp
+            self.end_timestamp = parsed.end_timestamp
+            self.duration_minutes = parsed.duration_minutes
+            self.date = parsed.date
+            self.parse_error = parsed.parse_error
+            return self
+
+    return ExamRecord
 
 
 # --- Processing Logic ---
 
 def get_xlsx_files() -> List[str]:
-    return glob.glob(os.path.join(DATA_DIR, '*.xlsx'))
+    # Sorted so that merged output does not depend on directory listing order.
+    # "~$name.xlsx" are Excel's lock files for workbooks open in the editor, not data.
+    return sorted(path for path in glob.glob(os.path.join(DATA_DIR, '*.xlsx'))
+                  if not os.path.basename(path).startswith('~$'))
 
-def process_single_file(file_path: str) -> Optional[Dict[str, Any]]:
-    filename = os.path.basename(file_path)
-    logger.info(f"Processing file: {filename}")
-    
+# Strings pandas.read_excel treats as missing by default; the streaming reader honours the same set
+EXCEL_NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+])
+
+def normalize_cell(v: Any) -> Any:
+    """Converts an openpyxl cell value the same way pandas.read_excel does."""
+    if v is None or (isinstance(v, str) and v in EXCEL_NA_VALUES):
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, str):
+        # Columns like campus/school/location repeat heavily; share one object per distinct value
+        return sys.intern(v)
+    return v
+
+def make_header(values: tuple) -> List[str]:
+    """Builds pandas-compatible column names (blank -> 'Unnamed: i', duplicates -> 'name.1')."""
+    while values and values[-1] is None:
+        values = values[:-1]
+    columns = []
+    seen: Dict[str, int] = {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if v is None else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+# Rows searched for the header; title banners may sit above it
+HEADER_SCAN_ROWS = 10
+
+class SheetLayout(NamedTuple):
+    header_row: int         # 0-based sheet row holding the column names
+    columns: List[str]      # pandas-compatible names of the header's columns
+
+def open_first_sheet(file_path: str):
+    """Opens a workbook the way pandas.read_excel does; returns (workbook, first worksheet)."""
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    return wb, wb.worksheets[0]
+
+def header_score(values: tuple) -> int:
+    """How many FIELD_MAPPING fields a row names, i.e. how much it looks like the header."""
+    names = {str(v) for v in values if v is not None}
+    return sum(1 for aliases in FIELD_MAPPING.values() if any(a in names for a in aliases))
+
+def sniff_layout(ws) -> SheetLayout:
+    """
+    Reads only the first HEADER_SCAN_ROWS rows and picks the one naming the most
+    FIELD_MAPPING fields as the header (the first row if none names any), so sheets
+    with a title banner above the header still map.
+    """
+    head = list(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+    best_row, best_score = 0, 0
+    for i, values in enumerate(head):
+        score = header_score(values)
+        if score > best_score:
+            best_row, best_score = i, score
+    return SheetLayout(best_row, make_header(head[best_row]) if head else [])
+
+def mapped_columns(layout: SheetLayout, mapping: Dict[str, Optional[str]]) -> List[int]:
+    """0-based positions of the columns `mapping` uses, in sheet order."""
+    used = {col for col in mapping.values() if col}
+    return [i for i, col in enumerate(layout.columns) if col in used]
+
+# Raised when the openpyxl/pandas internals behind column projection are missing or changed
+PROJECTION_ERRORS = (ImportError, AttributeError, TypeError)
+
+def iter_projected_cells(ws, usecols: List[int], first_row: int, data_width: Optional[int] = None):
+    """
+    Streams the sheet from the 1-based row `first_row` on, converting only the cells of
+    the 0-based columns `usecols`; the others are skipped inside openpyxl's own sheet
+    parser, before any value conversion. Returns an iterator of (cells, skipped_data)
+    per row, gaps included: `cells` holds openpyxl's cell dict (or None) per used column,
+    and `skipped_data` tells whether a skipped cell within the first `data_width`
+    columns (all if None) holds a value, so callers can tell empty rows apart.
+    This subclasses openpyxl's private sheet parser (tested with the version in
+    requirements.txt); on other versions one of PROJECTION_ERRORS is raised right
+    away, before anything is read, so callers can fall back to public APIs.
+    """
+    from openpyxl.utils import column_index_from_string
+    from openpyxl.worksheet._reader import VALUE_TAG, WorkSheetParser
+
+    positions = {c + 1: i for i, c in enumerate(usecols)}  # openpyxl columns are 1-based
+    limit = data_width if data_width is not None else float('inf')
+
+    class ProjectedParser(WorkSheetParser):
+        def parse_row(self, row):
+            self.skipped_data = False
+            return super().parse_row(row)
+
+        def parse_cell(self, element):
+            coordinate = element.get('r')
+            column = column_index_from_string(coordinate.rstrip('0123456789')) if coordinate else self.col_counter + 1
+            if column in positions:
+                return super().parse_cell(element)
+            self.col_counter = column
+            if column <= limit and (element.findtext(VALUE_TAG) or element.get('t') == 'inlineStr'):
+                self.skipped_data = True
+            return None
+
+    src = ws._get_source()
     try:
-        df = pd.read_excel(file_path, engine='openpyxl')
-        
-        # ========== Part A: Raw Excel Analysis ==========
-        raw_columns_info = []
-        for col in df.columns:
-            col_data = df[col]
-            non_null_count = col_data.notna().sum()
-            null_count = col_data.isna().sum()
-            total = len(col_data)
-            non_null_pct = (non_null_count / total * 100) if total > 0 else 0
-            unique_count = col_data.nunique()
-            
-            # Sample values (first 3 non-null unique values)
-            sample_values = col_data.dropna().unique()[:3].tolist()
-            sample_str = ", ".join([str(v)[:30] for v in sample_values])
-            
-            raw_columns_info.append({
+        parser = ProjectedParser(src, ws._shared_strings, data_only=True, epoch=ws.parent.epoch,
+                                 date_formats=ws.parent._date_formats)
+        for attr in ('parse', 'col_counter'):
+            getattr(parser, attr)
+    except Exception:
+        src.close()
+        raise
+
+    def generate():
+        empty = (None,) * len(usecols)
+        expected = first_row
+        try:
+            for row_number, parsed in parser.parse():
+                if row_number < first_row:
+                    continue
+                for _ in range(expected, row_number):
+                    yield empty, False
+                cells = [None] * len(usecols)
+                for cell in parsed:
+                    if cell is not None:
+                        cells[positions[cell['column']]] = cell
+                yield tuple(cells), parser.skipped_data
+                expected = row_number + 1
+        finally:
+            src.close()
+
+    return generate()
+
+def project_values(rows: Iterable[tuple], usecols: List[int], data_width: int):
+    """Fallback for iter_projected_cells() over full value rows: picks `usecols` after reading every cell."""
+    used = set(usecols)
+    for values in rows:
+        yield (tuple(values[i] if i < len(values) else None for i in usecols),
+               any(v is not None for j, v in enumerate(values[:data_width]) if j not in used))
+
+def iter_xlsx_rows(ws, layout: SheetLayout, usecols: Optional[List[int]] = None):
+    """
+    Streams the rows below the header of an openpyxl read-only sheet.
+    Returns (columns, rows) where rows is a generator of {column: value} dicts,
+    restricted to the `usecols` positions when given. Trailing empty rows are
+    dropped, like pandas does.
+    """
+    first_row = layout.header_row + 2
+    if usecols is None:
+        columns = layout.columns
+        row_iter = ((values[:len(columns)], False)
+                    for values in ws.iter_rows(min_row=first_row, values_only=True))
+    else:
+        columns = [layout.columns[i] for i in usecols]
+        try:
+            row_iter = ((tuple(c['value'] if c else None for c in cells), skipped_data) for cells, skipped_data
+                        in iter_projected_cells(ws, usecols, first_row, data_width=len(layout.columns)))
+        except PROJECTION_ERRORS as e:
+            logger.warning(f"Column projection unavailable ({e!r}); reading every cell instead.")
+            row_iter = project_values(ws.iter_rows(min_row=first_row, values_only=True),
+                                      usecols, len(layout.columns))
+
+    def generate():
+        pending_empty = 0
+        for values, skipped_data in row_iter:
+            row = [normalize_cell(v) for v in values]
+            if not skipped_data and all(v is None for v in row):
+                pending_empty += 1
+                continue
+            for _ in range(pending_empty):
+                yield dict.fromkeys(columns)
+            pending_empty = 0
+            row.extend([None] * (len(columns) - len(row)))
+            yield dict(zip(columns, row))
+
+    return columns, generate()
+
+def excel_cell_value(cell: Optional[Dict]) -> Any:
+    """An openpyxl cell dict as pandas' openpyxl reader converts it ("" for empty cells)."""
+    if cell is None or cell['value'] is None:
+        return ""
+    if cell['data_type'] == 'e':
+        return float('nan')
+    if cell['data_type'] == 'n':
+        value = int(cell['value'])
+        return value if value == cell['value'] else float(cell['value'])
+    return cell['value']
+
+def read_projected_frame(ws, layout: SheetLayout, usecols: List[int]):
+    """
+    Equivalent of pandas.read_excel(header=layout.header_row, usecols=usecols) that
+    skips the unused cells while parsing instead of after converting every cell.
+    Rows are fed to the same (internal) TextParser read_excel uses, so dtypes match.
+    Raises one of PROJECTION_ERRORS if the internals are not available.
+    """
+    from pandas.io.parsers import TextParser
+
+    data = [[layout.columns[i] for i in usecols]]
+    last_with_data = 0
+    for cells, skipped_data in iter_projected_cells(ws, usecols, layout.header_row + 2):
+        row = [excel_cell_value(c) for c in cells]
+        data.append(row)
+        if skipped_data or any(v != "" for v in row):
+            last_with_data = len(data) - 1
+    del data[last_with_data + 1:]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+def as_number(v: Any) -> Any:
+    """Returns the numeric value of a numeric-looking string (as pandas infers it), else None."""
+    for cast in (int, float):
+        try:
+            return cast(v)
+        except (ValueError, TypeError):
+            pass
+    return None
+
+# Python casts pandas applies to every value of a numeric column
+NUMERIC_CASTS = {"int64": int, "float64": float}
+
+def cast_numeric(v: Any, dtype: str) -> Any:
+    """A streamed cell value as it ends up in a pandas column of `dtype` (e.g. 2024 -> 2024.0 in float64)."""
+    cast = NUMERIC_CASTS.get(dtype)
+    if cast is None or v is None:
+        return v
+    number = as_number(v) if isinstance(v, str) else v
+    return v if number is None else cast(number)
+
+class ColumnProfiler:
+    """Collects the Part A column statistics in a single pass over streamed rows."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.row_count = 0
+        self.samples: List[Dict] = []
+        self._non_null = {c: 0 for c in columns}
+        self._unique = {c: set() for c in columns}
+        self._first_unique = {c: [] for c in columns}
+        self._kinds = {c: set() for c in columns}
+
+    def observe(self, rows):
+        """Passes rows through unchanged while recording statistics."""
+        for row in rows:
+            self.row_count += 1
+            if len(self.samples) < 3:
+                self.samples.append(dict(row))
+            for col in self.columns:
+                v = row.get(col)
+                if v is None:
+                    continue
+                self._non_null[col] += 1
+                kind = type(v)
+                if kind is str:
+                    number = as_number(v)
+                    if number is not None:
+                        kind = type(number)
+                self._kinds[col].add(kind)
+                uniques = self._unique[col]
+                if v not in uniques:
+                    uniques.add(v)
+                    if len(self._first_unique[col]) < 6:
+                        self._first_unique[col].append(v)
+            yield row
+
+    def _dtype(self, col: str) -> str:
+        """Mirrors the dtype pandas would infer for the column."""
+        kinds = self._kinds[col]
+        has_null = self._non_null[col] < self.row_count
+        if not kinds:
+            return "float64"
+        if kinds == {bool} and not has_null:
+            return "bool"
+        if kinds <= {bool, int, float}:
+            # Any blank cell (or any fraction) turns the whole column into floats, booleans included
+            return "float64" if has_null or float in kinds else "int64"
+        if kinds <= {datetime}:
+            return "datetime64[ns]"
+        return "object"
+
+    def dtypes(self) -> Dict[str, str]:
+        return {col: self._dtype(col) for col in self.columns}
+
+    def typed_samples(self) -> List[Dict]:
+        """The sample rows with numeric columns cast as pandas casts them."""
+        dtypes = self.dtypes()
+        return [{col: cast_numeric(v, dtypes.get(col, "object")) for col, v in row.items()}
+                for row in self.samples]
+
+    def columns_info(self) -> List[Dict]:
+        info = []
+        for col in self.columns:
+            non_null_count = self._non_null[col]
+            total = self.row_count
+            dtype = self._dtype(col)
+            uniques = self._unique[col]
+            samples = self._first_unique[col]
+            if dtype in NUMERIC_CASTS:
+                # pandas casts numeric columns as a whole, merging e.g. "2024" and 2024
+                uniques = {cast_numeric(v, dtype) for v in uniques}
+                samples = list(dict.fromkeys(cast_numeric(v, dtype) for v in samples))
+            info.append({
                 "column_name": str(col),
-                "dtype": str(col_data.dtype),
-                "non_null_count": int(non_null_count),
-                "null_count": int(null_count),
-                "non_null_pct": round(non_null_pct, 1),
-                "unique_count": int(unique_count),
-                "sample_values": sample_str
-            })
-        
-        # Raw data samples (first 3 rows as-is from Excel)
-        raw_samples = df.head(3).to_dict(orient='records')
-        # Convert any non-serializable types
-        for sample in raw_samples:
-            for k, v in sample.items():
-                if pd.isna(v):
-                    sample[k] = None
-                elif hasattr(v, 'isoformat'):
-                    sample[k] = v.isoformat()
-                else:
-                    sample[k] = str(v) if not isinstance(v, (str, int, float, bool, type(None))) else v
-        
-        # ========== Column Mapping ==========
-        current_file_mapping = {}
-        mapping_details = []
-        for std_key, possible_cols in FIELD_MAPPING.items():
-            found_col = None
-            for col in possible_cols:
-                if col in df.columns:
-                    found_col = col
-                    break
-            current_file_mapping[std_key] = found_col
-            mapping_details.append({
-                "standard_field": std_key,
-                "excel_column": found_col if found_col else "(not found)",
-                "possible_names": possible_cols,
-                "mapped": found_col is not None
+                "dtype": dtype,
+                "non_null_count": non_null_count,
+                "null_count": total - non_null_count,
+                "non_null_pct": round((non_null_count / total * 100) if total > 0 else 0, 1),
+                "unique_count": len(uniques),
+                "sample_values": ", ".join([str(v)[:30] for v in samples[:3]])
             })
-        
-        # ========== Part B: Processing ==========
-        clean_models: List[ExamRecord] = []
-        validation_errors = []
-        parse_success_count = 0
-        parse_fail_count = 0
-        
-        records = df.to_dict(orient='records')
-        
-        for idx, row in enumerate(records, start=2):
-            raw_input = {
-                '_source_file': filename,
-                '_row_index': idx,
-                'id': f"{filename}-{idx}"
-            }
-            
-            for std_key, original_col in current_file_mapping.items():
-                if original_col:
-                    raw_input[std_key] = row.get(original_col)
-                else:
-                    raw_input[std_key] = None
+        return info
 
-            record = ExamRecord(**raw_input)
-            
-            if record.parse_error:
-                err_msg = f"Row {idx}: {record.parse_error} (Raw: '{record.raw_time}')"
-                validation_errors.append(err_msg)
-                parse_fail_count += 1
+def profile_dataframe(df) -> List[Dict]:
+    """
+    Part A column statistics for a fully loaded DataFrame. Null counts come from
+    one vectorized notna() over the whole frame; each column is then deduplicated
+    once, which yields both its unique count and its sample values.
+    """
+    total = len(df)
+    non_null_counts = df.notna().sum().tolist()
+    raw_columns_info = []
+    for i, col in enumerate(df.columns):
+        col_data = df.iloc[:, i]
+        non_null_count = int(non_null_counts[i])
+        uniques = col_data.dropna().unique()
+
+        # Sample values (first 3 non-null unique values)
+        sample_str = ", ".join([str(v)[:30] for v in uniques[:3].tolist()])
+
+        raw_columns_info.append({
+            "column_name": str(col),
+            "dtype": str(col_data.dtype),
+            "non_null_count": non_null_count,
+            "null_count": total - non_null_count,
+            "non_null_pct": round((non_null_count / total * 100) if total > 0 else 0, 1),
+            "unique_count": len(uniques),
+            "sample_values": sample_str
+        })
+    return raw_columns_info
+
+def to_serializable_samples(raw_samples: List[Dict]) -> List[Dict]:
+    """Converts any non-serializable types in raw row samples."""
+    for sample in raw_samples:
+        for k, v in sample.items():
+            if pd.isna(v):
+                sample[k] = None
+            elif hasattr(v, 'isoformat'):
+                sample[k] = v.isoformat()
             else:
-                parse_success_count += 1
-            
-            clean_models.append(record)
+                sample[k] = str(v) if not isinstance(v, (str, int, float, bool, type(None))) else v
+    return raw_samples
 
-        # Serialize processed data
-        serialized_data = [
-            model.model_dump(by_alias=True, exclude={'source_file', 'row_index'})
-            for model in clean_models
-        ]
-        
-        # ========== Data Distribution Stats ==========
-        # Campus distribution
-        campus_counts = {}
-        date_set = set()
-        class_set = set()
-        course_set = set()
-        
-        for model in clean_models:
-            if model.campus:
-                campus_counts[model.campus] = campus_counts.get(model.campus, 0) + 1
-            if model.date:
-                date_set.add(model.date)
-            if model.class_name:
-                class_set.add(model.class_name)
-            if model.course_name:
-                course_set.add(model.course_name)
-        
-        # Date range
-        sorted_dates = sorted(date_set) if date_set else []
-        date_range = f"{sorted_dates[0]} ~ {sorted_dates[-1]}" if sorted_dates else "N/A"
+TEXT_FIELDS = [
+    'campus', 'course_name', 'course_code', 'class_name', 'teacher',
+    'location', 'raw_time', 'school', 'student_school',
+    'major', 'grade', 'notes'
+]
+# Serialized record layout, identical to ExamRecord.model_dump(by_alias=True, exclude={'source_file', 'row_index'})
+OUTPUT_FIELDS = [
+    'id', 'campus', 'course_name', 'course_code', 'class_name', 'teacher', 'location', 'raw_time',
+    'count', 'school', 'student_school', 'major', 'grade', 'notes',
+    'start_timestamp', 'end_timestamp', 'duration_minutes', 'date', 'parse_error'
+]
+
+def resolve_column_mapping(columns: List[str]):
+    """Resolves FIELD_MAPPING against the sheet columns. Returns (mapping, mapping_details)."""
+    current_file_mapping = {}
+    mapping_details = []
+    for std_key, possible_cols in FIELD_MAPPING.items():
+        found_col = None
+        for col in possible_cols:
+            if col in columns:
+                found_col = col
+                break
+        current_file_mapping[std_key] = found_col
+        mapping_details.append({
+            "standard_field": std_key,
+            "excel_column": found_col if found_col else "(not found)",
+            "possible_names": possible_cols,
+            "mapped": found_col is not None
+        })
+    return current_file_mapping, mapping_details
+
+def validate_row(row: Dict, idx: int, mapping: Dict[str, Optional[str]], filename: str) -> Dict:
+    """Validates one row through ExamRecord and returns its serialized form."""
+    raw_input = {
+        '_source_file': filename,
+        '_row_index': idx,
+        'id': f"{filename}-{idx}"
+    }
+    
+    for std_key, original_col in mapping.items():
+        if original_col:
+            raw_input[std_key] = row.get(original_col)
+        else:
+            raw_input[std_key] = None
+
+    record = ExamRecord(**raw_input)
+    return record.model_dump(by_alias=True, exclude={'source_file', 'row_index'})
+
+# Text of boolean cells; pandas casts them to 1/0 in numeric columns
+BOOL_TEXT = {"True": 1, "False": 0}
+
+def align_numeric_text(records: List[Dict], mapping: Dict[str, Optional[str]], dtypes: Dict[str, str]) -> None:
+    """
+    Streamed rows are validated one at a time, before the dtype of their columns is
+    known. pandas gives a whole column one dtype instead, so e.g. a column of years
+    with one blank cell is float64 and its text is "2024.0". This re-renders, in
+    place, the text fields read from numeric columns the way the DataFrame paths do.
+    """
+    for field in TEXT_FIELDS:
+        cast = NUMERIC_CASTS.get(dtypes.get(mapping.get(field)))
+        if cast is None:
+            continue
+        for record in records:
+            text = record[field]
+            if not text:
+                continue
+            number = BOOL_TEXT.get(text)
+            if number is None:
+                number = as_number(text)
+            if number is not None:
+                record[field] = str(cast(number))
+
+def clean_text_column(col_data) -> List[str]:
+    """Column-wise equivalent of ExamRecord.clean_text_fields."""
+    mask = col_data.isna()
+    if mask.all():
+        return [""] * len(col_data)
+    cleaned = col_data[~mask].map(str).str.replace('\xa0', ' ', regex=False).str.strip()
+    return cleaned.reindex(col_data.index, fill_value="").tolist()
+
+def clean_count_value(v: Any) -> int:
+    """Same rules as ExamRecord.clean_count_field."""
+    try:
+        return int(v) if pd.notnull(v) and v != "" else 0
+    except (ValueError, TypeError):
+        return 0
+
+def validate_frame(df, mapping: Dict[str, Optional[str]], filename: str, first_row: int = 2) -> List[Dict]:
+    """
+    Bulk validation path: cleans the text fields, count and time fields column by
+    column instead of constructing an ExamRecord per row. Produces exactly the
+    records the ExamRecord path does; ExamRecord stays the schema of record.
+    """
+    n = len(df)
+    columns: Dict[str, List] = {
+        'id': [f"{filename}-{idx}" for idx in range(first_row, first_row + n)]
+    }
+
+    for field in TEXT_FIELDS:
+        col = mapping.get(field)
+        columns[field] = clean_text_column(df[col]) if col else [""] * n
+
+    count_col = mapping.get('count')
+    if not count_col:
+        columns['count'] = [0] * n
+    elif pd.api.types.is_integer_dtype(df[count_col]):
+        columns['count'] = df[count_col].astype(int).tolist()
+    else:
+        columns['count'] = [clean_count_value(v) for v in df[count_col].tolist()]
+
+    parsed_times = parse_time_batch(columns['raw_time'])
+    parsed = [parsed_times[t] for t in columns['raw_time']]
+    for field in ParsedTime._fields:
+        columns[field] = [getattr(p, field) for p in parsed]
+
+    return [dict(zip(OUTPUT_FIELDS, values)) for values in zip(*(columns[f] for f in OUTPUT_FIELDS))]
+
+def process_single_file(file_path: str, streaming: bool = False, bulk: bool = False,
+                        metrics: Optional[PipelineMetrics] = None,
+                        profile_unmapped: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Parses, validates and profiles one workbook.
+    The header row is sniffed from the first rows and FIELD_MAPPING resolved before
+    the full read. With profile_unmapped=False (no inventory report wanted) only
+    the mapped columns are read and profiled; otherwise every column is.
+    With streaming=True the sheet is read with openpyxl in read-only mode and rows
+    flow through mapping and validation one at a time instead of via a DataFrame;
+    the "excel_read" stage then only covers opening the sheet and reading happens
+    during "validation".
+    With bulk=True the DataFrame is validated column-wise (see validate_frame).
+    """
+    load_dependencies()
+    metrics = metrics or NULL_METRICS
+    filename = os.path.basename(file_path)
+    mode = " (streaming)" if streaming else " (bulk)" if bulk else ""
+    logger.info(f"Processing file: {filename}{mode}")
+    
+    wb = None
+    try:
+        profiler = None
+        with metrics.stage("excel_read"):
+            wb, ws = open_first_sheet(file_path)
+            layout = sniff_layout(ws)
+            if layout.header_row:
+                logger.info(f"Header found on row {layout.header_row + 1} of {filename}")
+            current_file_mapping, mapping_details = resolve_column_mapping(layout.columns)
+            usecols = None if profile_unmapped else mapped_columns(layout, current_file_mapping)
+            if streaming:
+                columns, rows = iter_xlsx_rows(ws, layout, usecols)
+                profiler = ColumnProfiler(columns)
+                rows = profiler.observe(rows)
+            elif usecols is None:
+                df = pd.read_excel(wb, engine='openpyxl', header=layout.header_row)
+                columns = list(df.columns)
+                # Columns past the header's width get pandas' "Unnamed: n" names
+                current_file_mapping, mapping_details = resolve_column_mapping(columns)
+            else:
+                try:
+                    df = read_projected_frame(ws, layout, usecols)
+                except PROJECTION_ERRORS as e:
+                    logger.warning(f"Column projection unavailable ({e!r}); reading the mapped columns with pandas.")
+                    df = pd.read_excel(wb, engine='openpyxl', header=layout.header_row, usecols=usecols)
+                columns = list(df.columns)
+        first_row = layout.header_row + 2
+
+        if not streaming:
+            # ========== Part A: Raw Excel Analysis ==========
+            with metrics.stage("profile"):
+                raw_columns_info = profile_dataframe(df)
+                # Raw data samples (first 3 rows as-is from Excel)
+                raw_samples = to_serializable_samples(df.head(3).to_dict(orient='records'))
         
-        # Duration stats
-        durations = [m.duration_minutes for m in clean_models if m.duration_minutes > 0]
-        avg_duration = round(sum(durations) / len(durations), 1) if durations else 0
+        with metrics.stage("validation"):
+            # ========== Part B: Processing ==========
+            if streaming:
+                serialized_data = [validate_row(row, idx, current_file_mapping, filename)
+                                   for idx, row in enumerate(rows, start=first_row)]
+                align_numeric_text(serialized_data, current_file_mapping, profiler.dtypes())
+            elif bulk:
+                serialized_data = validate_frame(df, current_file_mapping, filename, first_row)
+            else:
+                serialized_data = [validate_row(row, idx, current_file_mapping, filename)
+                                   for idx, row in enumerate(df.to_dict(orient='records'), start=first_row)]
+
+            # ========== Data Distribution Stats (single pass) ==========
+            stats = InventoryStats.from_records(serialized_data, first_row)
+
+        if profiler:
+            with metrics.stage("profile"):
+                raw_columns_info = profiler.columns_info()
+                raw_samples = to_serializable_samples(profiler.typed_samples())
+            row_count = profiler.row_count
+        else:
+            row_count = len(df)
 
         return {
             "filename": filename,
-            "row_count": len(df),
+            "row_count": row_count,
             # Part A: Raw Excel info
-            "raw_columns": list(df.columns),
+            "raw_columns": columns if usecols is None else layout.columns,
+            "header_row": first_row - 1,
             "raw_columns_info": raw_columns_info,
             "raw_samples": raw_samples,
             # Mapping info
             "mapping_details": mapping_details,
             "column_mapping": {k: v for k, v in current_file_mapping.items() if v},
             # Part B: Processing results
-            "parse_success_count": parse_success_count,
-            "parse_fail_count": parse_fail_count,
-            "validation_errors": validation_errors,
-            "total_errors": len(validation_errors),
+            "parse_success_count": stats.parse_success,
+            "parse_fail_count": stats.parse_fail,
+            "validation_errors": stats.errors,
+            "total_errors": len(stats.errors),
             # Distribution stats
-            "campus_distribution": campus_counts,
-            "date_range": date_range,
-            "unique_classes": len(class_set),
-            "unique_courses": len(course_set),
-            "avg_duration_minutes": avg_duration,
+            "stats": stats,
+            "campus_distribution": dict(stats.campus),
+            "date_range": stats.date_range,
+            "unique_classes": len(stats.classes),
+            "unique_courses": len(stats.courses),
+            "avg_duration_minutes": stats.avg_duration,
             # Processed data
             "raw_data": serialized_data,
             "processed_samples": serialized_data[:3] if serialized_data else []
@@ -323,9 +829,92 @@ def process_single_file(file_path: str) -> Optional[Dict[str, Any]]:
     except Exception as e:
         logger.error(f"Failed to process {file_path}: {e}", exc_info=True)
         return None
+    finally:
+        if wb is not None:
+            wb.close()
+
+def get_pipeline_version() -> str:
+    """
+    Version id for cached parse results. Covers the source of this script (parsing code,
+    FIELD_MAPPING, regexes) and of the statistics engine, and the versions of the
+    libraries that read and validate workbooks. Library versions come from package
+    metadata, so cache hits never import the libraries themselves.
+    """
+    from importlib.metadata import version
+    sources = []
+    for path in (os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inventory_stats.py')):
+        with open(path, 'rb') as f:
+            sources.append(f.read())
+    return compute_version(*sources, *(version(name) for name in PARSING_LIBRARIES))
+
+def process_single_file_measured(file_path: str, streaming: bool, bulk: bool, trace_memory: bool,
+                                 profile_dir: Optional[str], profile_unmapped: bool = True):
+    """Pool worker: process_single_file with its own stage metrics, returned as (result, exported metrics)."""
+    metrics = PipelineMetrics("worker", trace_memory=trace_memory, profile_dir=profile_dir)
+    result = process_single_file(file_path, streaming=streaming, bulk=bulk, metrics=metrics,
+                                 profile_unmapped=profile_unmapped)
+    return result, metrics.export()
+
+def process_files(files: List[str], jobs: int = 1, streaming: bool = False, bulk: bool = False,
+                  cache: Optional[ParseCache] = None,
+                  metrics: Optional[PipelineMetrics] = None,
+                  profile_unmapped: bool = True) -> List[Optional[Dict[str, Any]]]:
+    """
+    Processes workbooks serially (jobs=1) or in a process pool.
+    Results are returned in the order of `files` either way, so the merged output is deterministic.
+    With a cache, unchanged workbooks are loaded from it instead of being parsed; results
+    read with and without the unmapped columns are cached separately.
+    """
+    metrics = metrics or NULL_METRICS
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    cache_keys: Dict[int, str] = {}
+    pending = []
+    for i, f in enumerate(files):
+        if cache:
+            with metrics.stage("hash_check"):
+                key = cache.key_for(f, variant="" if profile_unmapped else "mapped-columns")
+                cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Cache hit: {os.path.basename(f)}")
+                results[i] = cached
+                continue
+            cache_keys[i] = key
+        pending.append(i)
+
+    pending_files = [files[i] for i in pending]
+    jobs = min(jobs, len(pending_files))
+    if jobs <= 1:
+        processed = [process_single_file(f, streaming=streaming, bulk=bulk, metrics=metrics,
+                                         profile_unmapped=profile_unmapped) for f in pending_files]
+    else:
+        logger.info(f"Processing {len(pending_files)} files with {jobs} worker processes...")
+        if metrics.enabled:
+            worker = functools.partial(process_single_file_measured, streaming=streaming, bulk=bulk,
+                                       trace_memory=metrics.trace_memory, profile_dir=metrics.profile_dir,
+                                       profile_unmapped=profile_unmapped)
+        else:
+            worker = functools.partial(process_single_file, streaming=streaming, bulk=bulk,
+                                       profile_unmapped=profile_unmapped)
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            processed = list(pool.map(worker, pending_files))
+        if metrics.enabled:
+            for _, exported in processed:
+                metrics.absorb(exported)
+            processed = [result for result, _ in processed]
+
+    for i, result in zip(pending, processed):
+        results[i] = result
+        if cache and result is not None:
+            try:
+                with metrics.stage("cache_write"):
+                    cache.put(cache_keys[i], result)
+            except Exception as e:
+                logger.warning(f"Failed to cache {os.path.basename(files[i])}: {e}")
+    return results
 
-def generate_markdown_report(analyses: List[Dict], total_records: int) -> str:
-    """Generate comprehensive markdown report with Raw Excel Analysis + Processing Results"""
+def generate_markdown_report(analyses: List[Dict], total_records: int, conflicts: Optional[Dict] = None) -> str:
+    """Generate comprehensive markdown report with Raw Excel Analysis + Processing Results (+ schedule conflicts)"""
     lines = []
     
     # ========== Header ==========
@@ -345,38 +934,30 @@ def generate_markdown_report(analyses: List[Dict], total_records: int) -> str:
     lines.append(f"| Total Files Processed | {len(analyses)} |")
     lines.append(f"| Total Records Extracted | {total_records:,} |")
     
-    # Aggregate stats
-    total_success = sum(a.get('parse_success_count', 0) for a in analyses)
-    total_fail = sum(a.get('parse_fail_count', 0) for a in analyses)
-    total_classes = sum(a.get('unique_classes', 0) for a in analyses)
-    total_courses = sum(a.get('unique_courses', 0) for a in analyses)
+    # Aggregate stats: merge the per-file engines (exact distinct counts across files)
+    totals = InventoryStats.merged(a['stats'] for a in analyses)
     
-    # Aggregate campus distribution
-    all_campus = {}
-    all_dates = set()
-    for a in analyses:
-        for campus, count in a.get('campus_distribution', {}).items():
-            all_campus[campus] = all_campus.get(campus, 0) + count
-        if a.get('date_range') and a.get('date_range') != 'N/A':
-            parts = a.get('date_range', '').split(' ~ ')
-            all_dates.update(parts)
+    lines.append(f"| Parse Success Rate | {totals.parse_success}/{totals.parse_success + totals.parse_fail} ({totals.success_rate}%) |")
+    lines.append(f"| Date Range (All Files) | {totals.date_range} |")
+    lines.append(f"| Unique Classes | {len(totals.classes):,} |")
+    lines.append(f"| Unique Courses | {len(totals.courses):,} |")
     
-    sorted_all_dates = sorted(all_dates) if all_dates else []
-    global_date_range = f"{sorted_all_dates[0]} ~ {sorted_all_dates[-1]}" if len(sorted_all_dates) >= 2 else "N/A"
-    
-    lines.append(f"| Parse Success Rate | {total_success}/{total_success+total_fail} ({round(total_success/(total_success+total_fail)*100, 1) if (total_success+total_fail) > 0 else 0}%) |")
-    lines.append(f"| Date Range (All Files) | {global_date_range} |")
-    lines.append(f"| Unique Classes | ~{total_classes:,} |")
-    lines.append(f"| Unique Courses | ~{total_courses:,} |")
-    
-    if all_campus:
-        campus_str = ", ".join([f"{k} ({v:,})" for k, v in sorted(all_campus.items(), key=lambda x: -x[1])])
+    if totals.campus:
+        campus_str = ", ".join([f"{k} ({v:,})" for k, v in totals.campus.most_common()])
         lines.append(f"| Campus Distribution | {campus_str} |")
     
+    if conflicts is not None:
+        lines.append(f"| Possible Class Conflicts | {len(conflicts['class_conflicts']):,} |")
+        lines.append(f"| Room Double-Bookings | {len(conflicts['room_conflicts']):,} |")
+    
     lines.append("")
     lines.append("---")
     lines.append("")
     
+    # ========== Schedule Conflicts ==========
+    if conflicts is not None:
+        lines.extend(format_conflicts_section(conflicts))
+    
     # ========== Per-File Sections ==========
     for analysis in analyses:
         status_icon = "✅" if analysis['total_errors'] == 0 else "⚠️"
@@ -386,6 +967,7 @@ def generate_markdown_report(analyses: List[Dict], total_records: int) -> str:
         # Quick stats
         lines.append(f"**Rows:** {analysis['row_count']:,} | "
                     f"**Columns:** {len(analysis.get('raw_columns', []))} | "
+                    f"**Header Row:** {analysis.get('header_row', 1)} | "
                     f"**Parse Success:** {analysis.get('parse_success_count', 0)}/{analysis['row_count']} | "
                     f"**Date Range:** {analysis.get('date_range', 'N/A')}")
         lines.append("")
@@ -531,7 +1113,7 @@ def generate_markdown_report(analyses: List[Dict], total_records: int) -> str:
     lines.append("")
     lines.append("| Field | Type | Description |")
     lines.append("|-------|------|-------------|")
-    lines.append("| `id` | string | Unique identifier (filename-row) |")
+    lines.append("| `id` | string | Stable identifier derived from class, course code and course name |")
     lines.append("| `class_name` | string | Class identifier (e.g., B240402) |")
     lines.append("| `course_name` | string | Course name |")
     lines.append("| `course_code` | string | Course code |")
@@ -553,63 +1135,561 @@ def generate_markdown_report(analyses: List[Dict], total_records: int) -> str:
     return "\n".join(lines)
 
 
-def main():
-    logger.info("Starting data extraction process (Pydantic Powered)...")
-    files = get_xlsx_files()
-    
-    if not files:
-        logger.warning(f"No .xlsx files found in '{DATA_DIR}' directory.")
-        # Try to debug why
-        logger.info(f"Base Dir: {BASE_DIR}")
-        logger.info(f"Public Dir: {PUBLIC_DIR}")
-        return
+# Conflicts listed in DATA_INVENTORY.md per kind; conflicts.json has all of them
+CONFLICT_REPORT_LIMIT = 50
 
-    analyses = []
-    all_rows = []
+def format_conflicts_section(conflicts: Dict, limit: int = CONFLICT_REPORT_LIMIT) -> List[str]:
+    """Markdown tables of the first `limit` class and room conflicts."""
+    lines = ["## 🚦 Schedule Conflicts", ""]
+    lines.append("Overlapping exams found by a sweep over each class's and each room's exams. "
+                 "Class conflicts may be electives that different students of the class take; "
+                 f"the full list (with record ids) is in `{os.path.basename(CONFLICTS_PATH)}`.")
+    lines.append("")
 
-    for f in files:
-        result = process_single_file(f)
-        if result:
-            analyses.append(result)
-            all_rows.extend(result['raw_data'])
+    class_conflicts = conflicts['class_conflicts']
+    lines.append(f"### Class Conflicts ({len(class_conflicts):,})")
+    lines.append("")
+    if class_conflicts:
+        lines.append("| Class | Date | Overlapping Exams |")
+        lines.append("|-------|------|-------------------|")
+        for conflict in class_conflicts[:limit]:
+            exams = "<br>".join(f"{e['start_timestamp'][11:16]}-{e['end_timestamp'][11:16]} {e['course_name']}"
+                                f" ({', '.join(e['locations']) or '-'})" for e in conflict['exams'])
+            lines.append(f"| `{conflict['class_name']}` | {conflict['start_timestamp'][:10]} | {exams} |")
+        if len(class_conflicts) > limit:
+            lines.append(f"| _...and {len(class_conflicts) - limit:,} more_ | | |")
+    else:
+        lines.append("_No class has overlapping exams._")
+    lines.append("")
 
-    logger.info(f"Generated {len(all_rows)} records.")
-    
-    # Idempotency Check
+    room_conflicts = conflicts['room_conflicts']
+    lines.append(f"### Room Double-Bookings ({len(room_conflicts):,})")
+    lines.append("")
+    if room_conflicts:
+        lines.append("| Location | Date | Overlapping Sittings |")
+        lines.append("|----------|------|----------------------|")
+        for conflict in room_conflicts[:limit]:
+            sittings = "<br>".join(f"{e['start_timestamp'][11:16]}-{e['end_timestamp'][11:16]} "
+                                   f"{', '.join(e['course_names'])}" for e in conflict['exams'])
+            lines.append(f"| `{conflict['location']}` | {conflict['start_timestamp'][:10]} | {sittings} |")
+        if len(room_conflicts) > limit:
+            lines.append(f"| _...and {len(room_conflicts) - limit:,} more_ | | |")
+    else:
+        lines.append("_No room hosts overlapping sittings._")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+    return lines
+
+
+# --- Output Stages ---
+
+def iter_records_json(rows: Iterable[Dict]) -> Iterator[str]:
+    """
+    Canonical all_exams.json serialization, one record at a time. The joined
+    chunks are byte-identical to json.dumps(rows, ensure_ascii=False, separators=(',', ':')).
+    """
+    yield '['
+    for i, row in enumerate(rows):
+        if i:
+            yield ','
+        yield json.dumps(row, ensure_ascii=False, separators=(',', ':'))
+    yield ']'
+
+def compute_output_digests(analyses: List[Dict]):
+    """
+    Streams the canonical serialization through SHA-256 without building the output.
+    Returns (digest of all_exams.json, {filename: digest of that file's records}).
+    """
+    overall = hashlib.sha256(b'[')
+    file_digests = {}
+    first = True
+    for analysis in analyses:
+        file_hash = hashlib.sha256(b'[')
+        for i, row in enumerate(analysis['raw_data']):
+            chunk = json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if not first:
+                overall.update(b',')
+            if i:
+                file_hash.update(b',')
+            overall.update(chunk)
+            file_hash.update(chunk)
+            first = False
+        file_hash.update(b']')
+        file_digests[analysis['filename']] = f"sha256:{file_hash.hexdigest()}"
+    overall.update(b']')
+    return f"sha256:{overall.hexdigest()}", file_digests
+
+def load_manifest() -> Dict:
+    """Loads the previous data_summary.json, or {} if missing/unreadable."""
+    try:
+        with open(SUMMARY_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_text_atomic(path: str, content: str, newline: Optional[str] = None) -> None:
+    """Writes `content` to a temp file next to `path` and swaps it in, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline=newline) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def write_records_json(rows: Iterable[Dict], path: str) -> None:
+    """Streams rows into `path` via a temp file, replacing it atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for chunk in iter_records_json(rows):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+def get_safe_name(class_name: str) -> str:
+    """Maps a class name to a URL/filesystem safe file stem."""
+    safe_name = re.sub(r'[^A-Za-z0-9_-]', '_', class_name)
+    if safe_name != class_name:
+        # Keep names readable but collision-free, e.g. "B201114(DS)" -> "B201114_DS_-1a2b3c4d"
+        digest = hashlib.sha1(class_name.encode('utf-8')).hexdigest()[:8]
+        safe_name = f"{safe_name}-{digest}"
+    return safe_name
+
+def get_shard_filename(class_name: str) -> str:
+    return f"{get_safe_name(class_name)}.json"
+
+def group_rows_by_class(all_rows: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """Groups records by class name, each group in frontend order: by start time, unparsed records last."""
+    by_class: Dict[str, List[Dict]] = {}
+    for row in all_rows:
+        if row.get('class_name'):
+            by_class.setdefault(row['class_name'], []).append(row)
+    for rows in by_class.values():
+        rows.sort(key=lambda r: (r.get('start_timestamp') is None, r.get('start_timestamp') or ''))
+    return by_class
+
+def write_class_shards(all_rows: List[Dict]) -> Dict[str, int]:
+    """
+    Writes one small JSON file per class into CLASS_SHARD_DIR plus a compact
+    class directory (CLASS_INDEX_PATH), so clients only fetch the class they look at.
+    Unchanged shards are left untouched and shards of vanished classes are removed.
+    """
+    by_class = group_rows_by_class(all_rows)
+
+    os.makedirs(CLASS_SHARD_DIR, exist_ok=True)
+    stats = {"classes": len(by_class), "written": 0, "unchanged": 0, "removed": 0}
+    directory = {}
+
+    for class_name in sorted(by_class):
+        rows = by_class[class_name]
+        shard_file = get_shard_filename(class_name)
+        directory[class_name] = {"file": shard_file, "count": len(rows)}
+
+        content = json.dumps(rows, ensure_ascii=False, separators=(',', ':'))
+        shard_path = os.path.join(CLASS_SHARD_DIR, shard_file)
+        if os.path.exists(shard_path):
+            with open(shard_path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    stats["unchanged"] += 1
+                    continue
+        write_text_atomic(shard_path, content)
+        stats["written"] += 1
+
+    valid_files = {entry["file"] for entry in directory.values()}
+    for fname in os.listdir(CLASS_SHARD_DIR):
+        if fname.endswith('.json') and fname not in valid_files:
+            os.remove(os.path.join(CLASS_SHARD_DIR, fname))
+            stats["removed"] += 1
+
+    class_index = {
+        "shard_dir": os.path.basename(CLASS_SHARD_DIR),
+        "classes": directory
+    }
+    write_text_atomic(CLASS_INDEX_PATH, json.dumps(class_index, ensure_ascii=False, separators=(',', ':')))
+
+    return stats
+
+def write_class_calendars(all_rows: List[Dict]) -> Dict[str, int]:
+    """
+    Writes one subscribable RFC 5545 calendar per class into CALENDAR_DIR.
+    CALENDAR_INDEX_PATH records a digest of each calendar's events (DTSTAMP
+    excluded), so only classes whose exams changed get their .ics rewritten and
+    unchanged feeds keep serving identical bytes.
+    """
+    by_class = group_rows_by_class(all_rows)
+    os.makedirs(CALENDAR_DIR, exist_ok=True)
+
+    try:
+        with open(CALENDAR_INDEX_PATH, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get("classes", {})
+    except (OSError, ValueError):
+        previous = {}
+
+    dtstamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    stats = {"classes": len(by_class), "written": 0, "unchanged": 0, "removed": 0}
+    directory = {}
+
+    for class_name in sorted(by_class):
+        events = build_events(by_class[class_name])
+        ics_file = f"{get_safe_name(class_name)}.ics"
+        digest = events_digest(class_name, events)
+        directory[class_name] = {"file": ics_file, "events": len(events), "digest": digest}
+
+        ics_path = os.path.join(CALENDAR_DIR, ics_file)
+        if previous.get(class_name, {}).get("digest") == digest and os.path.exists(ics_path):
+            stats["unchanged"] += 1
+            continue
+        # newline='' keeps the CRLF line endings RFC 5545 requires
+        write_text_atomic(ics_path, render_calendar(class_name, events, dtstamp), newline='')
+        stats["written"] += 1
+
+    valid_files = {entry["file"] for entry in directory.values()}
+    for fname in os.listdir(CALENDAR_DIR):
+        if fname.endswith('.ics') and fname not in valid_files:
+            os.remove(os.path.join(CALENDAR_DIR, fname))
+            stats["removed"] += 1
+
+    write_text_atomic(CALENDAR_INDEX_PATH, json.dumps({"classes": directory}, ensure_ascii=False, separators=(',', ':')))
+
+    return stats
+
+def remove_if_exists(*paths: str) -> List[str]:
+    removed = []
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(os.path.basename(path))
+    return removed
+
+def format_size_report(sizes: Dict[str, Dict[str, int]]) -> List[str]:
+    """One line per output file: raw size and each precompressed variant with its ratio."""
+    lines = []
+    for name, variants in sizes.items():
+        raw = variants.get("raw", 0)
+        parts = [f"{raw / 1024:,.1f} KB"]
+        for ext in ("gz", "br"):
+            if ext in variants:
+                parts.append(f"{ext} {variants[ext] / 1024:,.1f} KB ({variants[ext] / raw:.1%})" if raw else f"{ext} -")
+        lines.append(f"  {name}: " + ", ".join(parts))
+    return lines
+
+
+# --- Record IDs & Delta ---
+
+# What identifies an exam; time, location, teacher and counts may be corrected later
+ID_FIELDS = ('class_name', 'course_code', 'course_name')
+# Hex digits of the key hash used as record id (the full key hash if another key already holds it)
+ID_LENGTH = 8
+
+def id_key_hash(row: Dict) -> str:
+    if any(row[field] for field in ID_FIELDS):
+        key = '\x1f'.join(row[field] for field in ID_FIELDS)
+    else:
+        key = '\x1f'.join(str(row[field]) for field in OUTPUT_FIELDS if field != 'id')
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def record_digest(row: Dict) -> str:
+    """Short digest of a record's content (id excluded), to tell unchanged records from corrected ones."""
+    content = '\x1f'.join(str(row[field]) for field in OUTPUT_FIELDS if field != 'id')
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+def sibling_order(row: Dict) -> tuple:
+    return (row['start_timestamp'] or '', row['raw_time'], row['location'], row['teacher'], row['count'])
+
+def assign_record_ids(rows: List[Dict], previous: Optional[Dict[str, List]] = None) -> Dict[str, List]:
+    """
+    Replaces the positional ids ("<file>-<row>") in place with ids derived from the
+    record's identifying fields, so a record keeps its id when rows are inserted,
+    workbooks are renamed or its time/location is corrected. The id is the first
+    ID_LENGTH hex digits of the key's hash, or the whole hash for a new key whose
+    short id is already held by another key. Records without any identifying field
+    are keyed by all of their fields.
+
+    Records sharing a key (a class split over several rooms or sittings) are told
+    apart by a "-<n>" slot suffix. `previous` is the last run's layout as stored in
+    RECORD_IDS_PATH ({key hash: [id, record digest or None per slot]}): unchanged
+    records keep their slot, changed records take the slots their previous versions
+    left, and further records get new slots, each in order of start time, raw time,
+    location, teacher and count. Ids can therefore only swap between siblings when
+    several of them change in the same run. Returns the new layout, holding each
+    slot's record (None for slots no longer used).
+    """
+    previous = previous or {}
+    groups: Dict[str, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(id_key_hash(row), []).append(row)
+
+    # Keys seen before keep their id; new keys take the short id unless it is held
+    bases = {key: previous[key][0] for key in groups if key in previous}
+    taken = {layout[0] for layout in previous.values()}
+    for key in sorted(key for key in groups if key not in previous):
+        base = key[:ID_LENGTH] if key[:ID_LENGTH] not in taken else key
+        taken.add(base)
+        bases[key] = base
+
+    layouts = {}
+    for key, members in groups.items():
+        old_slots = previous[key][1:] if key in previous else []
+        if len(members) == 1 and len(old_slots) <= 1:
+            slots = members
+        else:
+            members.sort(key=sibling_order)
+            slots = [None] * len(old_slots)
+            free: Dict[str, List[int]] = {}
+            for n, digest in enumerate(old_slots):
+                if digest:
+                    free.setdefault(digest, []).append(n)
+            pending = []
+            for row in members:
+                matches = free.get(record_digest(row))
+                if matches:
+                    slots[matches.pop(0)] = row
+                else:
+                    pending.append(row)
+            left = [n for n, digest in enumerate(old_slots) if digest and slots[n] is None]
+            for row, n in zip(pending, left):
+                slots[n] = row
+            slots.extend(pending[len(left):])
+        base = bases[key]
+        for n, row in enumerate(slots):
+            if row is not None:
+                row['id'] = f"{base}-{n}" if n else base
+        layouts[key] = [base, *slots]
+    return layouts
+
+def load_record_ids() -> Dict:
+    """Loads the previous RECORD_IDS_PATH, or {} if missing/unreadable."""
+    try:
+        with open(RECORD_IDS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def layout_digests(layouts: Dict[str, List]) -> Dict[str, str]:
+    """{record id: record digest} of a layout stored in RECORD_IDS_PATH."""
+    digests = {}
+    for base, *slots in layouts.values():
+        for n, digest in enumerate(slots):
+            if digest:
+                digests[f"{base}-{n}" if n else base] = digest
+    return digests
+
+def write_record_ids(layouts: Dict[str, List], content_digest: str) -> Dict[str, List]:
+    """
+    Writes RECORD_IDS_PATH: the id layout from assign_record_ids() with each record
+    replaced by its digest, so the next run can keep ids and compute the delta
+    without reading all_exams.json. Trailing unused slots are dropped; inner ones
+    stay so the later siblings keep their ids. Returns the stored layout.
+    """
+    stored = {}
+    for key, (base, *slots) in sorted(layouts.items()):
+        while slots and slots[-1] is None:
+            slots.pop()
+        stored[key] = [base, *(record_digest(row) if row else None for row in slots)]
+    write_text_atomic(RECORD_IDS_PATH, json.dumps({"content_digest": content_digest, "keys": stored},
+                                                  ensure_ascii=False, separators=(',', ':')))
+    return stored
+
+def compute_delta(previous: Dict[str, str], current: Dict[str, str], rows: List[Dict]) -> Dict[str, List]:
+    """
+    Records added, ids removed and records changed (new version) between two outputs,
+    given each output's {record id: record digest}.
+    """
+    added, changed = [], []
+    for row in rows:
+        old = previous.get(row['id'])
+        if old is None:
+            added.append(row)
+        elif old != current[row['id']]:
+            changed.append(row)
+    removed = [record_id for record_id in previous if record_id not in current]
+    return {"added": added, "removed": removed, "changed": changed}
+
+def write_delta(previous: Dict[str, str], current: Dict[str, str], rows: List[Dict],
+                previous_digest: Optional[str], content_digest: str) -> Dict:
+    """
+    Writes DELTA_PATH: the changes turning the output with `previous_digest` into
+    the one with `content_digest`. Clients holding the former can patch their copy
+    instead of downloading all_exams.json. Returns the manifest entry.
+    """
+    delta = compute_delta(previous, current, rows)
+    document = {
+        "from_digest": previous_digest,
+        "to_digest": content_digest,
+        "generated_at": get_beijing_time().isoformat(),
+        **delta
+    }
+    write_text_atomic(DELTA_PATH, json.dumps(document, ensure_ascii=False, separators=(',', ':')))
+    return {
+        "file": os.path.basename(DELTA_PATH),
+        "from_digest": previous_digest,
+        **{kind: len(records) for kind, records in delta.items()}
+    }
+
+
+def merge_rows(analyses: List[Dict]) -> Tuple[List[Dict], Dict[str, List]]:
+    """
+    All records of the given per-file analyses, in file order, with their stable ids
+    assigned against the previous run's layout. Returns (records, id layout).
+    """
+    rows = [row for analysis in analyses for row in analysis['raw_data']]
+    layouts = assign_record_ids(rows, load_record_ids().get('keys'))
+    return rows, layouts
+
+def evict_parse_cache(cache: Optional[ParseCache]) -> None:
+    if not cache:
+        return
+    try:
+        evicted = cache.evict()
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} stale parse cache entries.")
+    except Exception as e:
+        logger.warning(f"Parse cache eviction failed: {e}")
+
+def publish_outputs(analyses: List[Dict], all_rows: List[Dict], id_layouts: Dict[str, List],
+                    args: argparse.Namespace, metrics: PipelineMetrics) -> bool:
+    """
+    Writes every output derived from the parsed workbooks. Nothing is rewritten when
+    the content digest matches the manifest; otherwise per-class shards and calendars
+    are only rewritten where they changed. Returns whether the data changed.
+    """
+    # Idempotency Check: compare the digest of the new output with the one recorded in the manifest
+    with metrics.stage("hash_check"):
+        content_digest, file_digests = compute_output_digests(analyses)
+        previous_digest = load_manifest().get('content_digest')
     data_changed = True
-    if os.path.exists(MERGED_JSON_PATH):
-        try:
-            with open(MERGED_JSON_PATH, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            # Compare assuming deterministic sorting/serialization
-            if existing_data == all_rows:
-                logger.info("⚡ Data is identical to existing file. Skipping write to prevent unnecessary commits.")
-                data_changed = False
+    if not os.path.exists(MERGED_JSON_PATH):
+        logger.info("No existing output found.")
+    elif previous_digest == content_digest:
+        logger.info("⚡ Data is identical to existing file. Skipping write to prevent unnecessary commits.")
+        data_changed = False
+    else:
+        logger.info("Data content has changed.")
+
+    delta_entry = None
+    with metrics.stage("serialization"):
+        previous_ids, current_ids = {}, None
+        if data_changed or not os.path.exists(RECORD_IDS_PATH):
+            # Read before it is replaced: the previous output's ids and record digests
+            previous_ids = load_record_ids()
+            try:
+                current_ids = write_record_ids(id_layouts, content_digest)
+            except Exception as e:
+                logger.error(f"Failed to write record ids: {e}")
+        if data_changed:
+            if current_ids is not None and os.path.exists(MERGED_JSON_PATH) and previous_digest and \
+                    previous_ids.get('content_digest') == previous_digest:
+                try:
+                    delta_entry = write_delta(layout_digests(previous_ids.get('keys') or {}), layout_digests(current_ids),
+                                              all_rows, previous_digest, content_digest)
+                    logger.info(f"Delta: {delta_entry['added']} added, {delta_entry['removed']} removed, "
+                                f"{delta_entry['changed']} changed.")
+                except Exception as e:
+                    logger.error(f"Failed to write delta: {e}")
             else:
-                logger.info("Data content has changed.")
-        except Exception as e:
-            logger.warning(f"Could not compare with existing data: {e}")
+                # Without the previous output's record ids there is nothing to patch
+                remove_if_exists(DELTA_PATH)
 
-    if data_changed:
-        logger.info(f"Saving {len(all_rows)} records to {MERGED_JSON_PATH}...")
-        try:
-            with open(MERGED_JSON_PATH, 'w', encoding='utf-8') as f:
-                json.dump(all_rows, f, ensure_ascii=False, separators=(',', ':'))
-        except Exception as e:
-            logger.error(f"Failed to write JSON: {e}")
+        if data_changed:
+            logger.info(f"Saving {len(all_rows)} records to {MERGED_JSON_PATH}...")
+            try:
+                write_records_json(all_rows, MERGED_JSON_PATH)
+            except Exception as e:
+                logger.error(f"Failed to write JSON: {e}")
 
-        report_content = generate_markdown_report(analyses, len(all_rows))
-        try:
-            with open(OUTPUT_DOC_PATH, 'w', encoding='utf-8') as f:
-                f.write(report_content)
-        except Exception as e:
-             logger.error(f"Failed to write Report: {e}")
+        if data_changed or not os.path.exists(CLASS_INDEX_PATH):
+            try:
+                shard_stats = write_class_shards(all_rows)
+                logger.info(f"Class shards: {shard_stats['classes']} classes "
+                            f"({shard_stats['written']} written, {shard_stats['unchanged']} unchanged, "
+                            f"{shard_stats['removed']} removed).")
+            except Exception as e:
+                logger.error(f"Failed to write class shards: {e}")
+
+        if data_changed or not os.path.exists(CALENDAR_INDEX_PATH):
+            try:
+                calendar_stats = write_class_calendars(all_rows)
+                logger.info(f"Class calendars: {calendar_stats['classes']} classes "
+                            f"({calendar_stats['written']} written, {calendar_stats['unchanged']} unchanged, "
+                            f"{calendar_stats['removed']} removed).")
+            except Exception as e:
+                logger.error(f"Failed to write class calendars: {e}")
+
+        if data_changed or not os.path.exists(CLASS_SEARCH_INDEX_PATH):
+            try:
+                search_index = build_search_index(row.get('class_name') for row in all_rows)
+                save_search_index(search_index, CLASS_SEARCH_INDEX_PATH)
+                logger.info(f"Search index: {len(search_index['classes'])} classes, "
+                            f"{len(search_index['grams'])} {search_index['ngram']}-grams.")
+            except Exception as e:
+                logger.error(f"Failed to write search index: {e}")
+
+        if args.columnar:
+            if data_changed or not os.path.exists(COLUMNAR_JSON_PATH):
+                try:
+                    save_columnar(encode_columnar(all_rows, OUTPUT_FIELDS), COLUMNAR_JSON_PATH)
+                except Exception as e:
+                    logger.error(f"Failed to write columnar output: {e}")
+        elif data_changed:
+            # A columnar file from an earlier run would no longer match the records
+            for name in remove_if_exists(COLUMNAR_JSON_PATH, f"{COLUMNAR_JSON_PATH}.gz", f"{COLUMNAR_JSON_PATH}.br"):
+                logger.info(f"Removed stale {name}.")
+
+        compressible = [MERGED_JSON_PATH, CLASS_INDEX_PATH, CLASS_SEARCH_INDEX_PATH]
+        if args.columnar:
+            compressible.append(COLUMNAR_JSON_PATH)
+        for path in compressible:
+            if not os.path.exists(path):
+                continue
+            if args.precompress:
+                if data_changed or not os.path.exists(f"{path}.gz"):
+                    try:
+                        write_precompressed(path)
+                    except Exception as e:
+                        logger.error(f"Failed to precompress {os.path.basename(path)}: {e}")
+            elif data_changed:
+                for name in remove_if_exists(f"{path}.gz", f"{path}.br"):
+                    logger.info(f"Removed stale {name}.")
+
+    output_sizes = {os.path.basename(path): variant_sizes(path) for path in compressible if os.path.exists(path)}
+    logger.info("Output sizes:")
+    for line in format_size_report(output_sizes):
+        logger.info(line)
+
+    conflicts = None
+    if data_changed or not os.path.exists(CONFLICTS_PATH):
+        with metrics.stage("conflicts"):
+            conflicts = detect_conflicts(all_rows)
+            logger.info(f"🚦 Conflicts: {len(conflicts['class_conflicts'])} class, "
+                        f"{len(conflicts['room_conflicts'])} room.")
+            try:
+                write_text_atomic(CONFLICTS_PATH, json.dumps({"content_digest": content_digest, **conflicts},
+                                                             ensure_ascii=False, separators=(',', ':')))
+            except Exception as e:
+                logger.error(f"Failed to write conflicts: {e}")
+
+    if data_changed:
+        if args.no_report:
+            # A report from an earlier run would no longer match the records
+            for name in remove_if_exists(OUTPUT_DOC_PATH):
+                logger.info(f"Removed stale {name}.")
+        else:
+            with metrics.stage("report"):
+                report_content = generate_markdown_report(analyses, len(all_rows), conflicts)
+                try:
+                    write_text_atomic(OUTPUT_DOC_PATH, report_content)
+                except Exception as e:
+                     logger.error(f"Failed to write Report: {e}")
 
         manifest = {
             "generated_at": get_beijing_time().isoformat(),
             "files_processed": [a['filename'] for a in analyses],
-            "total_records": len(all_rows)
+            "total_records": len(all_rows),
+            "content_digest": content_digest,
+            "file_digests": file_digests,
+            "output_sizes": output_sizes
         }
+        if delta_entry:
+            manifest['delta'] = delta_entry
+        manifest['conflicts'] = {"class": len(conflicts['class_conflicts']),
+                                 "room": len(conflicts['room_conflicts'])}
 
         # Try to load source metadata
         metadata_path = os.path.join(DATA_DIR, 'source_metadata.json')
@@ -623,8 +1703,7 @@ def main():
                  logger.warning(f"Failed to load source metadata: {e}")
 
         try:
-            with open(os.path.join(DATA_DIR, 'data_summary.json'), 'w', encoding='utf-8') as f:
-                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            write_text_atomic(SUMMARY_PATH, json.dumps(manifest, indent=2, ensure_ascii=False))
         except Exception as e:
              logger.error(f"Failed to write Manifest: {e}")
 
@@ -632,8 +1711,238 @@ def main():
     else:
         logger.info("⚡ No changes detected. All files remain untouched.")
 
-    logger.info("Process finished.")
+    if args.archive:
+        with metrics.stage("archive"):
+            archive_records(all_rows, content_digest, args.archive)
+
+    return data_changed
+
+def archive_records(all_rows: List[Dict], content_digest: str, archive_path: str) -> None:
+    """
+    Ingests the records into the SQLite archive under their semester and source notice
+    (from source_metadata.json; the semester falls back to the exam dates).
+    A notice already archived with the same digest is left alone. Records without a
+    source notice (workbooks not fetched by the crawler) are not archived, since
+    they could not be told apart from a later crawl of the same semester.
+    """
+    meta = {}
+    metadata_path = os.path.join(DATA_DIR, 'source_metadata.json')
+    if os.path.exists(metadata_path):
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load source metadata: {e}")
+    source_url = meta.get('source_url')
+    if not source_url:
+        logger.warning("No source notice in source_metadata.json; records not archived.")
+        return
+    title = meta.get('source_title')
+    semester = semester_from_title(title) or semester_from_dates(row['date'] for row in all_rows)
+    if not semester:
+        logger.warning("Could not determine the semester; records not archived.")
+        return
+    try:
+        with ExamArchive(archive_path) as archive:
+            if archive.ingest(all_rows, semester, source_url, title, content_digest):
+                archive.compact()
+                logger.info(f"🗄️ Archived {len(all_rows)} records as {semester}.")
+    except Exception as e:
+        logger.error(f"Failed to archive records: {e}")
+
+
+# --- Watch Mode ---
+
+def snapshot_workbooks() -> Dict[str, Tuple[int, int]]:
+    """{path: (size, mtime_ns)} of every workbook in DATA_DIR; stat only, nothing is read."""
+    snapshot = {}
+    for path in get_xlsx_files():
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+def wait_until_quiet(snapshot: Dict[str, Tuple[int, int]], debounce: float,
+                     poll: float) -> Dict[str, Tuple[int, int]]:
+    """
+    Debounces a burst of changes (several files dropped in, or one still being copied):
+    returns once the workbooks' stats have not changed for `debounce` seconds.
+    """
+    quiet_since = time.monotonic()
+    while time.monotonic() - quiet_since < debounce:
+        time.sleep(poll)
+        current = snapshot_workbooks()
+        if current != snapshot:
+            snapshot, quiet_since = current, time.monotonic()
+    return snapshot
+
+def watch_data_dir(args: argparse.Namespace, jobs: int, cache: Optional[ParseCache],
+                   results: Dict[str, Optional[Dict]], snapshot: Dict[str, Tuple[int, int]]) -> None:
+    """
+    Polls DATA_DIR and republishes the outputs whenever workbooks are added, removed
+    or modified. Only changed workbooks are parsed again; the others keep their
+    analyses from `results` ({path: analysis}, updated in place). Runs until interrupted.
+    """
+    poll = min(args.watch_interval, args.debounce) if args.debounce > 0 else args.watch_interval
+    logger.info(f"👀 Watching {DATA_DIR} for workbook changes (every {args.watch_interval:g}s, Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            current = snapshot_workbooks()
+            if current == snapshot:
+                continue
+            current = wait_until_quiet(current, args.debounce, poll)
+
+            changed = [path for path in current if snapshot.get(path) != current[path]]
+            removed = [path for path in snapshot if path not in current]
+            snapshot = current
+            if not changed and not removed:
+                continue
+            for path in removed:
+                logger.info(f"➖ Removed: {os.path.basename(path)}")
+                results.pop(path, None)
+            for path in changed:
+                logger.info(f"{'✏️ Modified' if path in results else '➕ Added'}: {os.path.basename(path)}")
+
+            metrics = PipelineMetrics("analyze", trace_memory=args.trace_memory, profile_dir=args.profile_dir,
+                                      enabled=not args.no_metrics)
+            results.update(zip(changed, process_files(changed, jobs=jobs, streaming=args.streaming,
+                                                      bulk=args.bulk, cache=cache, metrics=metrics,
+                                                      profile_unmapped=not args.no_report)))
+            evict_parse_cache(cache)
+
+            analyses = [results[path] for path in sorted(results) if results[path]]
+            if not analyses:
+                logger.warning("No parsable workbooks left; keeping the existing outputs.")
+                continue
+            all_rows, id_layouts = merge_rows(analyses)
+            logger.info(f"Generated {len(all_rows)} records from {len(analyses)} files.")
+            metrics.counters.update(files=len(results), files_parsed=len(analyses), records=len(all_rows))
+            publish_outputs(analyses, all_rows, id_layouts, args, metrics)
+            save_metrics(metrics, args.metrics)
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")
+
+def save_metrics(metrics: PipelineMetrics, path: str) -> None:
+    if not metrics.enabled:
+        return
+    logger.info("Stage metrics:")
+    for line in format_stage_table(metrics.stages):
+        logger.info(f"  {line}")
+    try:
+        metrics.save(path)
+    except Exception as e:
+        logger.warning(f"Failed to write stage metrics: {e}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse exam schedule workbooks in public/data into JSON outputs.")
+    read_mode = parser.add_mutually_exclusive_group()
+    read_mode.add_argument('--streaming', action='store_true',
+                           help="Read workbooks with openpyxl in read-only mode and stream rows instead of loading a DataFrame")
+    read_mode.add_argument('--bulk', action='store_true',
+                           help="Validate DataFrame columns in bulk instead of constructing an ExamRecord per row")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Number of worker processes for parsing workbooks (1 = serial, 0 = one per CPU core)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"Do not use the parse cache in {os.path.relpath(PARSE_CACHE_DIR, BASE_DIR)}")
+    parser.add_argument('--data-dir', default=None,
+                        help=f"Directory holding the workbooks and receiving all outputs (default: {os.path.relpath(DATA_DIR, BASE_DIR)})")
+    parser.add_argument('--stats-only', action='store_true',
+                        help="Parse and validate, then print the inventory statistics as JSON without writing any output files")
+    parser.add_argument('--no-report', action='store_true',
+                        help=f"Do not write {os.path.basename(OUTPUT_DOC_PATH)}; workbooks are then read with only the mapped columns")
+    parser.add_argument('--columnar', action='store_true',
+                        help=f"Also write the dictionary-encoded {os.path.basename(COLUMNAR_JSON_PATH)}")
+    parser.add_argument('--precompress', action='store_true',
+                        help="Write .gz (and .br if brotli is installed) siblings of the JSON outputs for static hosting")
+    parser.add_argument('--metrics', default=METRICS_PATH,
+                        help=f"Where to record per-stage timings and memory (default: {os.path.relpath(METRICS_PATH, BASE_DIR)})")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="Do not collect or write stage metrics")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record each stage's tracemalloc allocation peak (slows parsing down several times)")
+    parser.add_argument('--profile-dir', default=None,
+                        help="Also run every stage under cProfile and dump <stage>.prof files into this directory")
+    parser.add_argument('--archive', default=None,
+                        help=f"SQLite archive receiving every semester's records (default: {os.path.relpath(ARCHIVE_PATH, BASE_DIR)}, "
+                             f"or none with --data-dir)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Do not archive the records")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and republish the outputs whenever workbooks in the data directory change")
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                        help="Seconds between polls of the data directory in --watch mode (default: 2)")
+    parser.add_argument('--debounce', type=float, default=1.0,
+                        help="Seconds without further changes before a burst of changes is processed (default: 1)")
+    args = parser.parse_args(argv)
+    if args.watch and args.stats_only:
+        parser.error("--watch cannot be combined with --stats-only")
+    if args.watch_interval <= 0:
+        parser.error("--watch-interval must be positive")
+    if args.no_archive and args.archive:
+        parser.error("--archive cannot be combined with --no-archive")
+    # Scratch data directories must not add their records to the real archive
+    if args.archive is None and not args.no_archive and not args.data_dir:
+        args.archive = ARCHIVE_PATH
+    return args
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.data_dir:
+        configure_paths(os.path.abspath(args.data_dir))
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    metrics = PipelineMetrics("analyze", trace_memory=args.trace_memory, profile_dir=args.profile_dir,
+                              enabled=not args.no_metrics)
+    logger.info("Starting data extraction process (Pydantic Powered)...")
+    files = get_xlsx_files()
+    
+    if not files:
+        logger.warning(f"No .xlsx files found in '{DATA_DIR}' directory.")
+        # Try to debug why
+        logger.info(f"Base Dir: {BASE_DIR}")
+        logger.info(f"Public Dir: {PUBLIC_DIR}")
+        if not args.watch:
+            return
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ParseCache(PARSE_CACHE_DIR, get_pipeline_version())
+        except Exception as e:
+            logger.warning(f"Parse cache unavailable: {e}")
+
+    # Taken before parsing, so workbooks changed meanwhile are picked up by the first poll
+    snapshot = snapshot_workbooks() if args.watch else None
+    # Without the inventory report, only the mapped columns are read
+    results = dict(zip(files, process_files(files, jobs=jobs, streaming=args.streaming, bulk=args.bulk,
+                                            cache=cache, metrics=metrics,
+                                            profile_unmapped=not (args.no_report or args.stats_only))))
+    evict_parse_cache(cache)
+    analyses = [results[f] for f in files if results[f]]
+    all_rows, id_layouts = merge_rows(analyses)
+
+    logger.info(f"Generated {len(all_rows)} records.")
+    metrics.counters.update(files=len(files), files_parsed=len(analyses), records=len(all_rows))
 
+    if args.stats_only:
+        totals = InventoryStats.merged(a['stats'] for a in analyses)
+        print(json.dumps({
+            "files": {a['filename']: a['stats'].summary() for a in analyses},
+            "total": totals.summary()
+        }, ensure_ascii=False, indent=2))
+        logger.info("Stats-only mode: no output files written.")
+        save_metrics(metrics, args.metrics)
+        return
+
+    if analyses:
+        publish_outputs(analyses, all_rows, id_layouts, args, metrics)
+    save_metrics(metrics, args.metrics)
+
+    if args.watch:
+        watch_data_dir(args, jobs, cache, results, snapshot)
+    logger.info("Process finished.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,17 +1,43 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import argparse
+import hashlib
+import json
 import os
 import re
+import shutil
+import sys
+import threading
+import time
 import urllib3
 from typing import Optional
 
+from http_cache import HttpCache
+from parse_cache import file_sha256
+from pipeline_metrics import NULL_METRICS, PipelineMetrics, format_stage_table
+
+# lxml 可用时使用更快的解析器
+try:
+    import lxml  # noqa: F401
+    LIST_PARSER = "lxml"
+except ImportError:
+    LIST_PARSER = "html.parser"
+
 # 禁用 SSL 警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # --- 配置区域 ---
 LIST_URL = "https://jwc.njupt.edu.cn/1594/list.htm"
-SAVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "public", "data")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAVE_DIR = os.path.join(BASE_DIR, "public", "data")
+# HTTP 校验缓存 (ETag / Last-Modified)，不随站点发布
+HTTP_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "http")
+# 各阶段耗时与内存统计 (与 analyze_and_update.py 共用，不随站点发布)
+METRICS_PATH = os.path.join(BASE_DIR, "pipeline_metrics.json")
 
 # 1. 必须包含的关键词 (且关系)
 REQUIRED_KEYWORDS = ["学年", "学期"]
@@ -23,6 +49,20 @@ EXCLUDE_KEYWORDS = [
     "重修", "选拔", "竞赛", "发车", "监考"
 ]
 
+# 列表翻页配置 (可用命令行 --max-pages / --since 覆盖)
+LIST_MAX_PAGES = 5            # 最多翻阅的列表页数
+LIST_CUTOFF_DAYS = 365        # 只查看最近多少天内发布的通知
+
+# 附件下载配置
+DOWNLOAD_WORKERS = 4          # 并发下载线程数 (同时也是连接池大小)
+DOWNLOAD_RETRIES = 3          # 单个文件最多尝试次数
+DOWNLOAD_BACKOFF = 1.0        # 重试退避基数 (秒)，按 1s、2s、4s... 递增
+DOWNLOAD_TIME_BUDGET = 300    # 全部附件下载的总时间预算 (秒)
+CHUNK_SIZE = 64 * 1024        # 流式写盘的块大小
+
+# 退出码：抓取状态与上次一致 (或内容未变更)，后续处理步骤可直接跳过
+EXIT_UNCHANGED = 3
+
 # 伪装请求头
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -58,69 +98,259 @@ def is_teacher_file(filename: str) -> bool:
     keywords = ["监考", "教师", "巡考", "教务员"]
     return any(kw in filename for kw in keywords)
 
-def download_file(url: str, save_path: str) -> bool:
-    try:
-        print(f"  ⬇️  下载中: {os.path.basename(save_path)} ...", end="", flush=True)
-        # verify=False is intentional: JWC often has self-signed/incomplete cert chains
-        response = requests.get(url, headers=HEADERS, verify=False, timeout=30)
-        response.raise_for_status()
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        print(" [完成]")
-        return True
-    except Exception as e:
-        print(f" [失败] {e}")
-        return False
+_print_lock = threading.Lock()
+
+def log_line(message: str):
+    """并发下载时逐行输出，避免多线程打印交错"""
+    with _print_lock:
+        print(message, flush=True)
+
+def create_session() -> requests.Session:
+    """创建共享 Session：复用 TLS 连接，连接池大小与并发下载数一致"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(url: str, cache: Optional[HttpCache] = None, session: Optional[requests.Session] = None) -> str:
+    """获取页面 HTML；提供缓存时使用条件请求"""
+    if cache:
+        return cache.get_text(url, headers=HEADERS, verify=False, timeout=10)
+    resp = (session or requests).get(url, headers=HEADERS, verify=False, timeout=10)
+    resp.encoding = 'utf-8'
+    return resp.text
+
+def download_file(url: str, save_path: str, cache: Optional[HttpCache] = None,
+                  existing_path: Optional[str] = None, session: Optional[requests.Session] = None,
+                  deadline: Optional[float] = None) -> Optional[dict]:
+    """
+    流式下载附件到 save_path，边下载边计算 SHA-256，失败时按指数退避重试。
+    若本地已有同名文件，则带条件请求头，304 时直接复用本地文件。
+    返回 {"path", "sha256", "size", "reused"}，失败返回 None；
+    复用本地文件时 path 指向 existing_path，sha256 为 None (由调用方查元数据)。
+    """
+    http = session or requests
+    name = os.path.basename(save_path)
+    headers = dict(HEADERS)
+    if cache and existing_path and os.path.exists(existing_path):
+        headers.update(cache.conditional_headers(url))
+    part_path = save_path + ".part"
+
+    last_error = None
+    for attempt in range(1, DOWNLOAD_RETRIES + 1):
+        remaining = deadline - time.monotonic() if deadline else 30
+        if remaining <= 0:
+            last_error = "超出下载时间预算"
+            break
+        try:
+            # verify=False is intentional: JWC often has self-signed/incomplete cert chains
+            with http.get(url, headers=headers, verify=False, timeout=min(30, remaining), stream=True) as response:
+                if response.status_code == 304 and existing_path:
+                    size = os.path.getsize(existing_path)
+                    if cache:
+                        cache.add_saved(size)
+                    log_line(f"  ⚡ 未变更 (304): {name}")
+                    return {"path": existing_path, "sha256": None, "size": size, "reused": True}
+                response.raise_for_status()
+
+                digest = hashlib.sha256()
+                size = 0
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if deadline and time.monotonic() > deadline:
+                            raise TimeoutError("超出下载时间预算")
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            os.replace(part_path, save_path)
+            if cache:
+                cache.add_downloaded(size)
+                cache.record(url, response.headers, size)
+            log_line(f"  ✅ 下载完成: {name} ({size / 1024:.1f} KB)")
+            return {"path": save_path, "sha256": digest.hexdigest(), "size": size, "reused": False}
+
+        except Exception as e:
+            last_error = e
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            if isinstance(e, TimeoutError):
+                break
+            # 4xx (除 429 外) 重试无意义
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            if status and 400 <= status < 500 and status != 429:
+                break
+            if attempt < DOWNLOAD_RETRIES:
+                delay = DOWNLOAD_BACKOFF * 2 ** (attempt - 1)
+                if deadline and time.monotonic() + delay > deadline:
+                    break
+                log_line(f"  🔁 重试 {name} ({attempt}/{DOWNLOAD_RETRIES - 1})，原因: {e}")
+                time.sleep(delay)
 
-def find_latest_schedule_notification() -> Optional[tuple[str, str]]:
-    """遍历列表页，寻找最新的、符合逻辑的通知"""
-    print(f"🔍 访问通知列表: {LIST_URL}")
+    log_line(f"  ❌ 下载失败: {name} ({last_error})")
+    return None
+
+def probe_attachment(file_info: dict, cache: Optional[HttpCache] = None) -> bool:
+    """SAVE_DIR 中已有该附件且 HEAD 探测确认与记录的校验值一致时返回 True"""
+    existing_path = os.path.join(SAVE_DIR, file_info['name'])
+    return bool(cache and os.path.exists(existing_path) and
+                cache.probe(file_info['url'], headers=HEADERS, verify=False, timeout=10))
+
+def fetch_attachment(file_info: dict, temp_dir: str, cache: Optional[HttpCache] = None,
+                     session: Optional[requests.Session] = None, deadline: Optional[float] = None,
+                     unchanged: Optional[bool] = None) -> Optional[dict]:
+    """
+    获取单个附件：HEAD 探测未变化则直接复用 SAVE_DIR 中的文件 (不复制)，否则下载到临时目录。
+    unchanged 为已做过的探测结果，None 表示尚未探测。
+    """
+    save_path = os.path.join(temp_dir, file_info['name'])
+    existing_path = os.path.join(SAVE_DIR, file_info['name'])
+    if unchanged is None:
+        unchanged = probe_attachment(file_info, cache)
+    if unchanged:
+        log_line(f"  ⚡ 未变更 (HTTP 校验): {file_info['name']}")
+        return {"path": existing_path, "sha256": None, "size": os.path.getsize(existing_path), "reused": True}
+    return download_file(file_info['url'], save_path, cache, existing_path, session, deadline)
+
+def load_source_metadata() -> dict:
+    """读取上次保存的 source_metadata.json，不存在或损坏时返回空字典"""
+    meta_path = os.path.join(SAVE_DIR, "source_metadata.json")
     try:
-        resp = requests.get(LIST_URL, headers=HEADERS, verify=False, timeout=10)
-        resp.encoding = 'utf-8'
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        container = soup.select_one('div.col_news_con')
-        if not container:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_source_metadata(metadata: dict) -> str:
+    """原子写入 source_metadata.json"""
+    meta_path = os.path.join(SAVE_DIR, "source_metadata.json")
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+    return meta_path
+
+def stored_digest(stored_files: dict, name: str, path: str) -> dict:
+    """
+    返回 SAVE_DIR 中某个附件的 {"sha256", "size"}：优先使用元数据中记录的摘要
+    (大小一致即信任)，旧版元数据没有记录时才流式计算一次。
+    """
+    size = os.path.getsize(path)
+    entry = stored_files.get(name)
+    if entry and entry.get("sha256") and entry.get("size") == size:
+        return {"sha256": entry["sha256"], "size": size}
+    return {"sha256": file_sha256(path), "size": size}
+
+def crawl_fingerprint(url: str, title: str, targets: list) -> str:
+    """
+    列表页命中条目 (链接 + 标题) 与详情页附件集合 (文件名 + 链接) 的指纹。
+    不含附件内容：同名同链接的附件仍可能被替换，需另行 HEAD 探测。
+    """
+    payload = json.dumps({
+        "url": url,
+        "title": title,
+        "files": sorted([f['name'], f['url']] for f in targets),
+    }, ensure_ascii=False, sort_keys=True)
+    return "sha256:" + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# 只解析新闻列表容器，跳过导航、脚本等无关部分
+NEWS_STRAINER = SoupStrainer('div', class_='col_news_con')
+DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+def list_page_url(page: int) -> str:
+    """第 page 页的列表地址 (站群系统约定: list.htm, list2.htm, list3.htm...)"""
+    if page <= 1:
+        return LIST_URL
+    return re.sub(r'list\.htm$', f'list{page}.htm', LIST_URL)
+
+def parse_news_list(html: str, base_url: str) -> Optional[list]:
+    """解析列表页，返回 [(title, link, date)]；未找到列表容器时返回 None"""
+    soup = BeautifulSoup(html, LIST_PARSER, parse_only=NEWS_STRAINER)
+    container = soup.select_one('div.col_news_con')
+    if not container:
+        return None
+
+    items = []
+    for item in container.select('li.news'):
+        # 提取标题
+        title_span = item.select_one('span.news_title')
+        a_tag = title_span.find('a') if title_span else item.find('a')
+        if not a_tag:
+            continue
+
+        title = a_tag.get('title') or a_tag.get_text(strip=True)
+        link = urljoin(base_url, a_tag.get('href'))
+
+        # 提取发布日期 (span.news_meta)，解析失败时为 None
+        published = None
+        meta = item.select_one('span.news_meta') or item
+        match = DATE_RE.search(meta.get_text(' ', strip=True))
+        if match:
+            try:
+                published = date(*map(int, match.groups()))
+            except ValueError:
+                pass
+        items.append((title, link, published))
+    return items
+
+def find_latest_schedule_notification(cache: Optional[HttpCache] = None,
+                                      session: Optional[requests.Session] = None,
+                                      max_pages: int = LIST_MAX_PAGES,
+                                      cutoff: Optional[date] = None) -> Optional[tuple[str, str]]:
+    """
+    逐页遍历列表页，寻找最新的、符合逻辑的通知。
+    翻满 max_pages 页，或某页最早的通知已早于 cutoff 时停止。
+    """
+    for page in range(1, max_pages + 1):
+        page_url = list_page_url(page)
+        print(f"🔍 访问通知列表: {page_url}")
+        try:
+            items = parse_news_list(fetch_page(page_url, cache, session), page_url)
+        except Exception as e:
+            if page == 1:
+                print(f"❌ 列表获取失败: {e}")
+                return None
+            # 后续页不存在 (已到末页) 或暂时不可用，停止翻页
+            print(f"ℹ️ 第 {page} 页获取失败，停止翻页: {e}")
+            break
+
+        if items is None:
             print("❌ 未找到列表容器，请检查选择器。")
             return None
+        if not items:
+            break
 
-        news_items = container.select('li.news')
-        
-        for item in news_items:
-            # 提取标题
-            title_span = item.select_one('span.news_title')
-            a_tag = title_span.find('a') if title_span else item.find('a')
-            
-            if not a_tag: continue
-            
-            title = a_tag.get('title') or a_tag.get_text(strip=True)
-            link = urljoin(LIST_URL, a_tag.get('href'))
-            
+        for title, link, _ in items:
             # 使用增强的逻辑判断标题
             if is_valid_title(title):
                 print(f"✅ 命中目标: [{title}]")
                 print(f"🔗 链接地址: {link}")
                 return link, title
-            else:
-                # 开启此行可查看被过滤掉的标题（调试用）
-                # print(f"   跳过: {title}")
-                pass
-        
-        print("⚠️ 未在首页找到符合条件的期末考试通知。")
-        return None
-        
-    except Exception as e:
-        print(f"❌ 列表获取失败: {e}")
-        return None
+            # 开启此行可查看被过滤掉的标题（调试用）
+            # print(f"   跳过: {title}")
 
-def process_detail_page(url: str, title: str):
-    """解析详情页并智能下载附件"""
+        # 置顶通知可能较旧，因此按整页最早日期判断是否继续翻页
+        dates = [published for _, _, published in items if published]
+        if cutoff and dates and min(dates) < cutoff:
+            print(f"⏹️ 已翻到 {cutoff.isoformat()} 之前的通知，停止翻页。")
+            break
+
+    print("⚠️ 未在列表页中找到符合条件的期末考试通知。")
+    return None
+
+def process_detail_page(url: str, title: str, cache: Optional[HttpCache] = None,
+                        session: Optional[requests.Session] = None,
+                        metrics: Optional[PipelineMetrics] = None) -> Optional[bool]:
+    """
+    解析详情页并智能下载附件。
+    返回 True 表示数据已更新，False 表示与上次一致，None 表示失败。
+    """
+    metrics = metrics or NULL_METRICS
     print(f"🔍 解析详情页附件...")
     try:
-        resp = requests.get(url, headers=HEADERS, verify=False, timeout=10)
-        resp.encoding = 'utf-8'
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        with metrics.stage("detail_fetch"):
+            soup = BeautifulSoup(fetch_page(url, cache, session), 'html.parser')
         
         all_links = soup.find_all('a')
         
@@ -141,7 +371,7 @@ def process_detail_page(url: str, title: str):
 
         if not candidates:
             print("⚠️ 未发现 Excel 附件。")
-            return
+            return None
 
         # 2. 智能筛选附件
         student_files = [f for f in candidates if is_student_file(f['name'])]
@@ -154,9 +384,24 @@ def process_detail_page(url: str, title: str):
             print("ℹ️ 未检测到明确的'学生版'文件，将下载所有非监考文件。")
             final_targets = [f for f in candidates if not is_teacher_file(f['name'])]
 
+        with metrics.stage("hash_check"):
+            saved_meta = load_source_metadata()
+            fingerprint = crawl_fingerprint(url, title, final_targets)
+            crawl_unchanged = saved_meta.get("crawl_fingerprint") == fingerprint and \
+                all(os.path.exists(os.path.join(SAVE_DIR, f)) for f in saved_meta.get("downloaded_files", []))
+
+        # 抓取状态指纹一致且文件齐全时，仅 HEAD 探测各附件；全部确认未变化才跳过下载与比对
+        workers = max(1, min(DOWNLOAD_WORKERS, len(final_targets)))
+        unchanged = [None] * len(final_targets)
+        if crawl_unchanged and cache:
+            with metrics.stage("download"), ThreadPoolExecutor(max_workers=workers) as pool:
+                unchanged = list(pool.map(lambda f: probe_attachment(f, cache), final_targets))
+            if all(unchanged):
+                print("⚡ 通知、附件列表与附件校验值均未变化，跳过下载 (Crawl state unchanged)。")
+                return False
+            print("🔎 附件列表未变，但部分附件无法确认未变更，继续下载比对。")
+
         import tempfile
-        import shutil
-        import hashlib
 
         # 3. 下载到临时目录
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -164,94 +409,158 @@ def process_detail_page(url: str, title: str):
             downloaded_files = []
             
             count = 0
-            for file_info in final_targets:
-                save_path = os.path.join(temp_dir, file_info['name'])
-                if download_file(file_info['url'], save_path):
-                    count += 1
-                    downloaded_files.append(file_info['name'])
+            # 有界线程池并发获取，结果按 final_targets 原顺序返回
+            deadline = time.monotonic() + DOWNLOAD_TIME_BUDGET
+            with metrics.stage("download"), ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    lambda f, probed: fetch_attachment(f, temp_dir, cache, session, deadline, probed),
+                    final_targets, unchanged))
+
+            with metrics.stage("hash_check"):
+                stored_files = saved_meta.get("files", {})
+                file_digests = {}
+                sources = {}
+                for file_info, result in zip(final_targets, results):
+                    if result:
+                        count += 1
+                        name = file_info['name']
+                        downloaded_files.append(name)
+                        sources[name] = result
+                        if result["sha256"]:
+                            file_digests[name] = {"sha256": result["sha256"], "size": result["size"]}
+                        else:
+                            file_digests[name] = stored_digest(stored_files, name, result["path"])
             
-            if count == 0:
-                print("❌ 没有成功下载任何文件。")
-                return
+                if count == 0:
+                    print("❌ 没有成功下载任何文件。")
+                    return None
 
-            # 4. Idempotency Check (比对 hash)
-            should_update = False
+                # 4. Idempotency Check (比对元数据中记录的 SHA-256，不再重读旧文件)
+                should_update = False
             
-            if not os.path.exists(SAVE_DIR):
-                should_update = True
-                print("✨ 首次运行，准备保存。")
-            else:
-                # 获取现有 Excel 文件
-                existing_files = sorted([f for f in os.listdir(SAVE_DIR) if f.endswith(('.xls', '.xlsx'))])
-                new_files = sorted(downloaded_files)
-                
-                if existing_files != new_files:
+                if not os.path.exists(SAVE_DIR):
                     should_update = True
-                    print("🔄 文件列表变更，准备更新。")
+                    print("✨ 首次运行，准备保存。")
                 else:
-                    # 文件列表相同，比对内容 hash
-                    for fname in new_files:
-                         new_path = os.path.join(temp_dir, fname)
-                         old_path = os.path.join(SAVE_DIR, fname)
-                         
-                         with open(new_path, 'rb') as f1, open(old_path, 'rb') as f2:
-                             if hashlib.md5(f1.read()).hexdigest() != hashlib.md5(f2.read()).hexdigest():
-                                 should_update = True
-                                 print(f"🔄 文件内容变更: {fname}")
-                                 break
+                    # 获取现有 Excel 文件
+                    existing_files = sorted([f for f in os.listdir(SAVE_DIR) if f.endswith(('.xls', '.xlsx'))])
+                    new_files = sorted(downloaded_files)
+                
+                    if existing_files != new_files:
+                        should_update = True
+                        print("🔄 文件列表变更，准备更新。")
+                    else:
+                        # 文件列表相同，比对内容摘要
+                        for fname in new_files:
+                            if sources[fname]["reused"]:
+                                continue
+                            old_digest = stored_digest(stored_files, fname, os.path.join(SAVE_DIR, fname))
+                            if old_digest != file_digests[fname]:
+                                should_update = True
+                                print(f"🔄 文件内容变更: {fname}")
+                                break
             
-            if not should_update:
-                print("⚡ 内容未变更，跳过更新 (Idempotent)。")
-                return
+                if not should_update:
+                    print("⚡ 内容未变更，跳过更新 (Idempotent)。")
+                    if stored_files != file_digests or saved_meta.get("crawl_fingerprint") != fingerprint:
+                        # 补写摘要与抓取指纹 (旧版元数据或附件链接变化)，不改变 updated_at
+                        saved_meta["files"] = file_digests
+                        saved_meta["crawl_fingerprint"] = fingerprint
+                        save_source_metadata(saved_meta)
+                        print("💾 已更新元数据中的摘要与抓取指纹。")
+                    return False
 
-            # 5. 执行更新
-            if not os.path.exists(SAVE_DIR):
-                os.makedirs(SAVE_DIR)
+            with metrics.stage("save"):
+                # 5. 执行更新
+                if not os.path.exists(SAVE_DIR):
+                    os.makedirs(SAVE_DIR)
             
-            # 清理旧 Excel
-            print("🧹 清理旧数据文件...")
-            for f in os.listdir(SAVE_DIR):
-                if f.endswith(('.xls', '.xlsx')):
-                    try:
-                        os.remove(os.path.join(SAVE_DIR, f))
-                    except Exception as e:
-                        print(f"   ❌ 删除失败 {f}: {e}")
-
-            # 移动新文件
-            for fname in downloaded_files:
-                src = os.path.join(temp_dir, fname)
-                dst = os.path.join(SAVE_DIR, fname)
-                shutil.copy2(src, dst)
-                print(f"✅ 保存文件: {fname}")
-
-            # 保存 Metadata
-            import json
-            from datetime import datetime, timezone, timedelta
+                # 清理旧 Excel (复用的未变更文件原地保留)
+                print("🧹 清理旧数据文件...")
+                for f in os.listdir(SAVE_DIR):
+                    if f.endswith(('.xls', '.xlsx')) and not (f in sources and sources[f]["reused"]):
+                        try:
+                            os.remove(os.path.join(SAVE_DIR, f))
+                        except Exception as e:
+                            print(f"   ❌ 删除失败 {f}: {e}")
+
+                # 移动新文件
+                for fname in downloaded_files:
+                    if sources[fname]["reused"]:
+                        print(f"✅ 保留文件: {fname}")
+                        continue
+                    shutil.copy2(sources[fname]["path"], os.path.join(SAVE_DIR, fname))
+                    print(f"✅ 保存文件: {fname}")
+
+                # 保存 Metadata
+                from datetime import datetime, timezone, timedelta
             
-            beijing_tz = timezone(timedelta(hours=8))
-            now_beijing = datetime.now(timezone.utc).astimezone(beijing_tz)
-
-            metadata = {
-                "source_url": url,
-                "source_title": title,
-                "downloaded_files": downloaded_files,
-                "updated_at": now_beijing.isoformat()
-            }
-            meta_path = os.path.join(SAVE_DIR, "source_metadata.json")
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            print(f"💾 元数据已更新: {meta_path}")
+                beijing_tz = timezone(timedelta(hours=8))
+                now_beijing = datetime.now(timezone.utc).astimezone(beijing_tz)
+
+                metadata = {
+                    "source_url": url,
+                    "source_title": title,
+                    "downloaded_files": downloaded_files,
+                    "files": file_digests,
+                    "crawl_fingerprint": fingerprint,
+                    "updated_at": now_beijing.isoformat()
+                }
+                meta_path = save_source_metadata(metadata)
+                print(f"💾 元数据已更新: {meta_path}")
 
         print(f"\n🎉 处理完毕！成功同步 {count} 个文件。")
+        return True
             
     except Exception as e:
         print(f"❌ 详情页解析失败: {e}")
+        return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NJUPT 考试安排自动同步工具")
+    parser.add_argument('--max-pages', type=int, default=LIST_MAX_PAGES,
+                        help=f"最多翻阅的列表页数 (默认 {LIST_MAX_PAGES})")
+    parser.add_argument('--since', type=date.fromisoformat, default=None,
+                        help=f"截止日期 YYYY-MM-DD，翻到更早的通知即停止 (默认 {LIST_CUTOFF_DAYS} 天前)")
+    parser.add_argument('--metrics', default=METRICS_PATH,
+                        help=f"各阶段耗时统计的写入位置 (默认 {os.path.relpath(METRICS_PATH, BASE_DIR)})")
+    parser.add_argument('--no-metrics', action='store_true', help="不记录阶段统计")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="同时用 tracemalloc 记录各阶段的内存分配峰值 (有明显开销)")
+    parser.add_argument('--profile-dir', default=None,
+                        help="对每个阶段运行 cProfile，并将 crawler-<阶段>.prof 写入该目录")
+    args = parser.parse_args()
+    cutoff = args.since or date.today() - timedelta(days=LIST_CUTOFF_DAYS)
+
     print("=== NJUPT 考试安排自动同步工具 ===")
-    result = find_latest_schedule_notification()
+    metrics = PipelineMetrics("crawler", trace_memory=args.trace_memory, profile_dir=args.profile_dir,
+                              enabled=not args.no_metrics)
+    session = create_session()
+    http_cache = HttpCache(HTTP_CACHE_DIR, session)
+    with metrics.stage("list_fetch"):
+        result = find_latest_schedule_notification(http_cache, session, args.max_pages, cutoff)
+    updated = None
     if result:
         url, title = result
-        process_detail_page(url, title)
+        updated = process_detail_page(url, title, http_cache, session, metrics)
     else:
-        print("未进行任何更新。")
\ No newline at end of file
+        print("未进行任何更新。")
+    try:
+        http_cache.save()
+    except OSError as e:
+        print(f"⚠️ HTTP 缓存保存失败: {e}")
+    print(f"📊 网络传输: {http_cache.summary()}")
+    if metrics.enabled:
+        # 套接字收发不计入 /proc/self/io，网络流量以 HTTP 缓存的统计为准
+        metrics.counters["network_bytes_downloaded"] = http_cache.bytes_downloaded
+        metrics.counters["network_bytes_saved"] = http_cache.bytes_saved
+        print("⏱️ 阶段统计:")
+        for line in format_stage_table(metrics.stages):
+            print(f"   {line}")
+        try:
+            metrics.save(args.metrics)
+        except OSError as e:
+            print(f"⚠️ 阶段统计保存失败: {e}")
+    if updated is False:
+        print(f"ℹ️ 数据未变化，退出码 {EXIT_UNCHANGED}。")
+        sys.exit(EXIT_UNCHANGED)
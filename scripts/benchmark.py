@@ -0,0 +1,588 @@
+"""
+Benchmarks for the data pipeline.
+
+Usage:
+    python scripts/benchmark.py validation [--repeat N] [files ...]
+    python scripts/benchmark.py listparse [--repeat N] [--save DIR] [html files ...]
+    python scripts/benchmark.py generate DIR [--rows N] [--rows-per-file N] [--malformed F]
+    python scripts/benchmark.py scale [--scales 10,100,1000] [--output benchmark_results.json]
+    python scripts/benchmark.py startup [--repeat N]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+import analyze_and_update as pipeline
+import exam_conflicts
+
+logger = pipeline.logger
+
+
+def time_best(func: Callable, repeat: int):
+    """Runs func `repeat` times and returns (best_seconds, last_result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def peak_memory(func: Callable) -> int:
+    """Peak traced allocation in bytes during a single call of func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def synthetic_list_page(page: int = 1, items: int = 20, nav_links: int = 400) -> str:
+    """
+    A notice list page shaped like the JWC site: a large navigation menu, inline
+    scripts and a footer around div.col_news_con, with one dated li.news per item.
+    The final exam notice appears on page 2.
+    """
+    nav = ''.join(f'<li class="menu-item i{i}"><a href="/{1000 + i}/list.htm" title="栏目{i}">'
+                  f'<span class="item-name">栏目{i}</span></a></li>' for i in range(nav_links))
+    script = '<script type="text/javascript">' + 'var _x = {};' * 200 + '</script>'
+    news = []
+    for i in range(items):
+        n = (page - 1) * items + i
+        month, day = 12 - n // 28 % 12, 28 - n % 28
+        if page == 2 and i == 5:
+            title = "【教务管理办公室】2025-2026学年第一学期考试安排表"
+        else:
+            title = f"关于做好第{n}项教学工作的通知"
+        news.append(f'<li class="news n{i + 1} clearfix"><span class="news_title">'
+                    f'<a href="/2025/{month:02d}{day:02d}/c1594a{300000 - n}/page.htm" target="_blank" title="{title}">'
+                    f'{title}</a></span><span class="news_meta">2025-{month:02d}-{day:02d}</span></li>')
+    return (f'<!DOCTYPE html><html><head><title>教务通知</title>{script}</head><body>'
+            f'<div class="header"><ul class="menu">{nav}</ul></div>'
+            f'<div class="col_news_con"><div id="wp_news_w6"><ul class="news_list list2">{"".join(news)}</ul></div>'
+            f'<div id="wp_paging_w6"><ul class="wp_paging clearfix"><li class="page_nav">'
+            f'<a class="next" href="/1594/list{page + 1}.htm">下一页</a></li></ul></div></div>'
+            f'<div class="footer"><ul class="menu">{nav}</ul>{script}</div></body></html>')
+
+def full_parse_titles(html: str, base_url: str) -> list:
+    """The original approach: parse the whole page with html.parser, then select the list."""
+    from urllib.parse import urljoin
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    result = []
+    for item in soup.select_one('div.col_news_con').select('li.news'):
+        title_span = item.select_one('span.news_title')
+        a_tag = title_span.find('a') if title_span else item.find('a')
+        if a_tag:
+            result.append((a_tag.get('title') or a_tag.get_text(strip=True), urljoin(base_url, a_tag.get('href'))))
+    return result
+
+def bench_listparse(files: List[str], repeat: int) -> bool:
+    """Compares full-page parsing with the crawler's container-restricted parse_news_list."""
+    import auto_update_exam_data as crawler
+
+    if files:
+        pages = [(os.path.basename(f), open(f, encoding='utf-8').read()) for f in files]
+    else:
+        pages = [(f"synthetic list{p}.htm", synthetic_list_page(p)) for p in (1, 2)]
+
+    ok = True
+    print(f"Restricted parser: {crawler.LIST_PARSER}")
+    print(f"{'Page':<24} {'Size':>8} {'Full':>9} {'Strained':>9} {'Speedup':>8} {'Full peak':>10} {'Strained peak':>14}  Identical")
+    for name, html in pages:
+        url = crawler.LIST_URL
+
+        def strained():
+            return [(title, link) for title, link, _ in crawler.parse_news_list(html, url)]
+
+        full_time, full_items = time_best(lambda: full_parse_titles(html, url), repeat)
+        strained_time, strained_items = time_best(strained, repeat)
+        full_peak = peak_memory(lambda: full_parse_titles(html, url))
+        strained_peak = peak_memory(strained)
+        identical = full_items == strained_items
+        ok = ok and identical
+        print(f"{name[:24]:<24} {len(html) / 1024:>6.0f}KB {full_time * 1000:>7.1f}ms {strained_time * 1000:>7.1f}ms "
+              f"{full_time / strained_time if strained_time else 0:>7.1f}x {full_peak / 2**20:>8.1f}MB "
+              f"{strained_peak / 2**20:>12.1f}MB  {'yes' if identical else 'NO'}")
+    return ok
+
+# --- Synthetic exam sheets ---
+
+# Records in the current data set; the scale suite multiplies this
+BASELINE_ROWS = 9569
+# Header of the current student sheets, as (standard field, Excel column) pairs
+SHEET_COLUMNS = [
+    ('campus', '校区'), ('school', '开课学院'), ('course_code', '课程代码'), ('course_name', '课程名称'),
+    ('class_name', '班级名称'), ('teacher', '任课教师'), ('count', '人数'), ('raw_time', '考试时间'),
+    ('location', '教室名称'), ('student_school', '学生所在学院'), ('grade', '年级'), ('major', '专业名称'),
+    ('notes', '备注'),
+]
+SCHOOLS = ["通信与信息工程学院", "电子与光学工程学院", "计算机学院", "自动化学院", "材料科学与工程学院",
+           "集成电路科学与工程学院", "管理学院", "经济学院", "理学院", "外国语学院", "马克思主义学院",
+           "地理与生物信息学院", "现代邮政学院", "传媒与艺术学院", "社会与人口学院", "波特兰学院"]
+CAMPUSES = [("仙林", 0.9), ("三牌楼", 0.08), ("锁金", 0.02)]
+SLOTS = [("08:00", "09:50"), ("10:25", "12:15"), ("13:30", "15:20"), ("15:55", "17:45"), ("18:30", "20:20")]
+MALFORMED_TIMES = ["待定", "另行通知", "2026年13月40日(08:00-09:50)", "第19周(08:00-09:50)", "2026-01-15"]
+
+
+def synthetic_rows(rows: int, seed: int = 0, malformed: float = 0.01):
+    """
+    Yields sheet rows (tuples in SHEET_COLUMNS order) shaped like the real data:
+    a few hundred courses and ~1k classes, both time formats (Chinese dates for the
+    school-organised sheets, "第N周周D(ISO date)" for the college ones), and a
+    `malformed` fraction of bad rows (unparseable times, blank class names,
+    non-numeric counts, fully empty rows).
+    """
+    rng = random.Random(seed)
+    courses = [(f"{rng.choice('BDGJMRSTX')}{rng.choice('DGJMY')}{1000 + i}{rng.choice(['T0S', 'F4S', 'TXS', 'PIS'])}",
+                f"课程{i:03d}{rng.choice(['', 'A', 'B', '（混合式）'])}") for i in range(520)]
+    classes = [f"{rng.choice('BPQF')}{rng.randint(20, 25):02d}{rng.randint(0, 9999):04d}" for _ in range(1100)]
+    teachers = [f"教师{i:03d}" for i in range(600)]
+    locations = [f"教{rng.randint(1, 4)}－{rng.randint(1, 5)}{rng.randint(1, 30):02d}" for _ in range(160)]
+    majors = [f"专业{i:02d}" for i in range(100)]
+    campus_names, campus_weights = zip(*CAMPUSES)
+    start = date(2026, 1, 5)
+
+    for i in range(rows):
+        if rng.random() < malformed:
+            kind = rng.randrange(4)
+            if kind == 0:
+                yield (None,) * len(SHEET_COLUMNS)
+                continue
+        else:
+            kind = None
+
+        code, course = rng.choice(courses)
+        day = start + timedelta(days=rng.randrange(18))
+        begin, end = rng.choice(SLOTS)
+        if kind == 1:
+            raw_time = rng.choice(MALFORMED_TIMES)
+        elif rng.random() < 0.7:
+            raw_time = f"{day.year}年{day.month:02d}月{day.day:02d}日({begin}-{end})"
+        else:
+            raw_time = f"第{18 + (day - start).days // 7}周周{day.isoweekday()}({day.isoformat()}) {begin}-{end}"
+
+        yield (
+            rng.choices(campus_names, campus_weights)[0],
+            rng.choice(SCHOOLS),
+            code,
+            course,
+            None if kind == 2 else rng.choice(classes),
+            rng.choice(teachers),
+            "若干" if kind == 3 else rng.randint(1, 60),
+            raw_time,
+            rng.choice(locations),
+            rng.choice(SCHOOLS),
+            rng.randint(2020, 2025),
+            rng.choice(majors),
+            "缓考" if rng.random() < 0.002 else None,
+        )
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        '</Relationships>'),
+}
+
+def write_xlsx(path: str, header: List[str], rows) -> None:
+    """
+    Writes a single-sheet workbook with a shared string table, like the exported
+    originals. The SpreadsheetML is emitted directly because openpyxl's writer
+    (without lxml) manages only a few thousand rows per second.
+    """
+    import io
+    import zipfile
+    from xml.sax.saxutils import escape
+
+    letters = [chr(ord('A') + i) for i in range(len(header))]
+    shared: Dict[str, int] = {}
+    total_refs = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        with io.TextIOWrapper(zf.open('xl/worksheets/sheet1.xml', 'w'), encoding='utf-8') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            for r, row in enumerate(_with_header(header, rows), start=1):
+                cells = []
+                for letter, v in zip(letters, row):
+                    if v is None:
+                        continue
+                    if isinstance(v, str):
+                        idx = shared.setdefault(v, len(shared))
+                        total_refs += 1
+                        cells.append(f'<c r="{letter}{r}" t="s"><v>{idx}</v></c>')
+                    else:
+                        cells.append(f'<c r="{letter}{r}"><v>{v}</v></c>')
+                out.write(f'<row r="{r}">{"".join(cells)}</row>')
+            out.write('</sheetData></worksheet>')
+
+        with io.TextIOWrapper(zf.open('xl/sharedStrings.xml', 'w'), encoding='utf-8') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                      f'count="{total_refs}" uniqueCount="{len(shared)}">')
+            for text in shared:
+                out.write(f'<si><t xml:space="preserve">{escape(text)}</t></si>')
+            out.write('</sst>')
+
+        for name, content in XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content)
+
+def _with_header(header: List[str], rows):
+    yield header
+    yield from rows
+
+def write_synthetic_workbooks(out_dir: str, rows: int, rows_per_file: int = 100_000,
+                              seed: int = 0, malformed: float = 0.01) -> List[str]:
+    """Writes `rows` synthetic rows into as many .xlsx files as needed (Excel caps a sheet at 1,048,576 rows)."""
+    os.makedirs(out_dir, exist_ok=True)
+    rows_per_file = min(rows_per_file, 1_048_575)
+    header = [column for _, column in SHEET_COLUMNS]
+    paths = []
+    for part, offset in enumerate(range(0, rows, rows_per_file), start=1):
+        count = min(rows_per_file, rows - offset)
+        path = os.path.join(out_dir, f"synthetic-{part:03d}-学生用表.xlsx")
+        write_xlsx(path, header, synthetic_rows(count, seed=seed + part, malformed=malformed))
+        paths.append(path)
+    return paths
+
+
+# --- Scale suite ---
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _stage_process_single_file(file_path: str) -> Dict:
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    result = pipeline.process_single_file(file_path)
+    seconds = time.perf_counter() - start
+    return {"rows": result['row_count'], "seconds": seconds, "baseline_rss_mb": baseline}
+
+def _stage_parse_time_logic(file_path: str) -> Dict:
+    pd = pipeline.pd
+    raw_times = pd.read_excel(file_path, engine='openpyxl', usecols=['考试时间'])['考试时间']
+    models = [pipeline.ExamRecord.model_construct(raw_time='' if pd.isna(v) else str(v)) for v in raw_times]
+    pipeline.parse_time_string.cache_clear()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    for model in models:
+        model.parse_time_logic()
+    seconds = time.perf_counter() - start
+    return {"rows": len(models), "seconds": seconds, "baseline_rss_mb": baseline,
+            "distinct_times": pipeline.parse_time_string.cache_info().currsize}
+
+def _stage_report(data_dir: str, cache_dir: str) -> Dict:
+    # Analyses come from the parse cache filled by the main() run, so only the report is timed
+    files = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith('.xlsx'))
+    cache = pipeline.ParseCache(cache_dir, pipeline.get_pipeline_version())
+    analyses = [a for a in pipeline.process_files(files, cache=cache) if a]
+    rows = sum(a['row_count'] for a in analyses)
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    pipeline.generate_markdown_report(analyses, rows)
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "baseline_rss_mb": baseline}
+
+def _stage_main(data_dir: str, cache_dir: str) -> Dict:
+    files = [f for f in os.listdir(data_dir) if f.endswith('.xlsx')]
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    pipeline.main(['--data-dir', data_dir, '--no-metrics', '--no-archive'])
+    seconds = time.perf_counter() - start
+    with open(os.path.join(data_dir, 'data_summary.json'), encoding='utf-8') as f:
+        rows = json.load(f)['total_records']
+    return {"rows": rows, "files": len(files), "seconds": seconds, "baseline_rss_mb": baseline}
+
+def _stage_conflicts(data_dir: str) -> Dict:
+    with open(os.path.join(data_dir, 'all_exams.json'), encoding='utf-8') as f:
+        rows = json.load(f)
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    conflicts = exam_conflicts.detect_conflicts(rows)
+    seconds = time.perf_counter() - start
+    return {"rows": len(rows), "seconds": seconds, "baseline_rss_mb": baseline,
+            "class_conflicts": len(conflicts["class_conflicts"]), "room_conflicts": len(conflicts["room_conflicts"])}
+
+def _run_stage(conn, stage: str, args: tuple, cache_dir: str) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    pipeline.configure_paths(pipeline.DATA_DIR, cache_dir=cache_dir)
+    try:
+        result = STAGES[stage](*args)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        conn.send(result)
+    except BaseException as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+
+STAGES = {
+    "process_single_file": _stage_process_single_file,
+    "parse_time_logic": _stage_parse_time_logic,
+    "main": _stage_main,
+    "generate_markdown_report": _stage_report,
+    "detect_conflicts": _stage_conflicts,
+}
+
+def run_stage(stage: str, *args, cache_dir: str) -> Dict:
+    """
+    Runs one stage in a fresh interpreter so its peak RSS is not inflated by earlier
+    stages; memory is reported as the peak and as the growth over the post-import baseline.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_stage, args=(child, stage, args, cache_dir))
+    proc.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": f"worker exited with code {proc.join() or proc.exitcode}"}
+    proc.join()
+    if "seconds" in result:
+        result["rows_per_second"] = round(result["rows"] / result["seconds"]) if result["seconds"] else None
+        result["peak_rss_growth_mb"] = round(result["peak_rss_mb"] - result.pop("baseline_rss_mb"), 1)
+        result["peak_rss_mb"] = round(result["peak_rss_mb"], 1)
+        result["seconds"] = round(result["seconds"], 3)
+    return result
+
+def bench_scale(scales: List[int], rows_per_file: int, output: str, keep: bool) -> bool:
+    """Generates each scale's workbooks, times the pipeline stages and writes the results JSON."""
+    results = {
+        "generated_at": pipeline.get_beijing_time().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "baseline_rows": BASELINE_ROWS,
+        "rows_per_file": rows_per_file,
+        "scales": []
+    }
+    ok = True
+    print(f"{'Scale':>6} {'Stage':<26} {'Rows':>10} {'Seconds':>9} {'Rows/s':>10} {'Peak RSS':>10} {'Growth':>9}")
+    for scale in scales:
+        work_dir = tempfile.mkdtemp(prefix=f"exam-bench-{scale}x-")
+        data_dir = os.path.join(work_dir, 'data')
+        cache_dir = os.path.join(work_dir, 'cache')
+        try:
+            start = time.perf_counter()
+            files = write_synthetic_workbooks(data_dir, BASELINE_ROWS * scale, rows_per_file)
+            entry = {
+                "scale": scale,
+                "rows": BASELINE_ROWS * scale,
+                "files": len(files),
+                "xlsx_bytes": sum(os.path.getsize(f) for f in files),
+                "generate_seconds": round(time.perf_counter() - start, 3),
+                "stages": {}
+            }
+            # main() runs before the report stage so the report can reuse its parse cache
+            for stage, args in (("process_single_file", (files[0],)),
+                                ("parse_time_logic", (files[0],)),
+                                ("main", (data_dir, cache_dir)),
+                                ("generate_markdown_report", (data_dir, cache_dir)),
+                                ("detect_conflicts", (data_dir,))):
+                stage_result = run_stage(stage, *args, cache_dir=cache_dir)
+                entry["stages"][stage] = stage_result
+                if "error" in stage_result:
+                    ok = False
+                    print(f"{scale:>5}x {stage:<26} ERROR {stage_result['error']}")
+                else:
+                    print(f"{scale:>5}x {stage:<26} {stage_result['rows']:>10,} {stage_result['seconds']:>9.2f} "
+                          f"{stage_result['rows_per_second'] or 0:>10,} {stage_result['peak_rss_mb']:>8.0f}MB "
+                          f"{stage_result['peak_rss_growth_mb']:>7.0f}MB")
+            results["scales"].append(entry)
+        finally:
+            if keep:
+                print(f"       kept {work_dir}")
+            else:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        # Written after every scale so a run interrupted at 1000x keeps the smaller results
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {output}")
+    return ok
+
+def bench_validation(files: List[str], repeat: int) -> bool:
+    """Compares per-row ExamRecord validation with the column-wise bulk path on each workbook."""
+    pd = pipeline.pd
+    ok = True
+    print(f"{'File':<40} {'Rows':>7} {'ExamRecord':>12} {'Bulk':>10} {'Speedup':>8}  Identical")
+    for file_path in files:
+        filename = os.path.basename(file_path)
+        df = pd.read_excel(file_path, engine='openpyxl')
+        mapping, _ = pipeline.resolve_column_mapping(list(df.columns))
+
+        def model_path():
+            return [pipeline.validate_row(row, idx, mapping, filename)
+                    for idx, row in enumerate(df.to_dict(orient='records'), start=2)]
+
+        def bulk_path():
+            # Cold cache per run, so the time parsing cost is included
+            pipeline.parse_time_string.cache_clear()
+            return pipeline.validate_frame(df, mapping, filename)
+
+        pipeline.parse_time_string.cache_clear()
+        model_time, model_records = time_best(model_path, repeat)
+        bulk_time, bulk_records = time_best(bulk_path, repeat)
+        identical = model_records == bulk_records
+        ok = ok and identical
+        print(f"{filename[:40]:<40} {len(df):>7,} {model_time * 1000:>10.1f}ms {bulk_time * 1000:>8.1f}ms "
+              f"{model_time / bulk_time if bulk_time else 0:>7.1f}x  {'yes' if identical else 'NO'}")
+    return ok
+
+
+# --- Startup budget ---
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+def measure_import_time() -> Dict:
+    """
+    Runs `python -X importtime -c "import analyze_and_update"` in a fresh interpreter.
+    Returns the module's cumulative import time and which parsing libraries it pulled in.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import analyze_and_update'],
+                          cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True)
+    cumulative_us = {}
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            cumulative_us[name.strip()] = int(cumulative)
+    heavy = sorted(name for name in cumulative_us if name in pipeline.PARSING_LIBRARIES)
+    return {"import_ms": cumulative_us.get('analyze_and_update', 0) / 1000, "heavy_imports": heavy}
+
+def time_cli(args: List[str], repeat: int) -> float:
+    """Best wall time of running analyze_and_update.py with `args` in a fresh interpreter."""
+    script = os.path.join(SCRIPTS_DIR, 'analyze_and_update.py')
+    best, _ = time_best(lambda: subprocess.run([sys.executable, script, *args],
+                                               capture_output=True, check=True), repeat)
+    return best
+
+def bench_startup(repeat: int) -> bool:
+    """
+    Reports the module import time and the CLI startup times of the paths that must
+    not load the parsing libraries (the budgets are enforced in test_startup.py).
+    The no-change run re-processes a copy of public/data after one untimed run has
+    filled the parse cache and written the outputs.
+    """
+    imports = measure_import_time()
+    empty_dir = tempfile.mkdtemp(prefix='exam-startup-')
+    data_dir = tempfile.mkdtemp(prefix='exam-nochange-')
+    try:
+        for path in pipeline.get_xlsx_files():
+            shutil.copy2(path, data_dir)
+        no_change_args = ['--data-dir', data_dir, '--no-metrics', '--no-archive']
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'analyze_and_update.py'), *no_change_args],
+                       capture_output=True, check=True)
+        timings = [
+            ("import analyze_and_update", imports["import_ms"] / 1000),
+            ("--help", time_cli(['--help'], repeat)),
+            ("no workbooks", time_cli(['--data-dir', empty_dir, '--no-metrics', '--no-archive'], repeat)),
+            ("no change", time_cli(no_change_args, repeat)),
+        ]
+    finally:
+        shutil.rmtree(empty_dir, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"{'Path':<28} {'Time':>10}")
+    for name, seconds in timings:
+        print(f"{name:<28} {seconds * 1000:>8.1f}ms")
+    print(f"Module import pulled in: {', '.join(imports['heavy_imports']) or 'no parsing library'}")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the exam data pipeline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_val = sub.add_parser('validation', help="ExamRecord vs. bulk column-wise validation")
+    p_val.add_argument('files', nargs='*', help="Workbooks to use (default: public/data/*.xlsx)")
+    p_val.add_argument('--repeat', type=int, default=3)
+
+    p_list = sub.add_parser('listparse', help="Full-page vs. container-restricted notice list parsing")
+    p_list.add_argument('files', nargs='*', help="Saved list page HTML (default: synthetic pages)")
+    p_list.add_argument('--repeat', type=int, default=5)
+    p_list.add_argument('--save', metavar='DIR', help="Write the synthetic pages to DIR as list.htm, list2.htm")
+
+    p_gen = sub.add_parser('generate', help="Write synthetic exam workbooks")
+    p_gen.add_argument('out_dir')
+    p_gen.add_argument('--rows', type=int, default=BASELINE_ROWS)
+    p_gen.add_argument('--rows-per-file', type=int, default=100_000)
+    p_gen.add_argument('--malformed', type=float, default=0.01, help="Fraction of malformed rows")
+    p_gen.add_argument('--seed', type=int, default=0)
+
+    p_scale = sub.add_parser('scale', help="Time the pipeline stages on synthetic data at multiples of today's size")
+    p_scale.add_argument('--scales', default="10,100,1000",
+                         help="Comma-separated multiples of the current row count (default: 10,100,1000)")
+    p_scale.add_argument('--rows-per-file', type=int, default=100_000)
+    p_scale.add_argument('--output', default="benchmark_results.json")
+    p_scale.add_argument('--keep', action='store_true', help="Keep the generated workbooks and outputs")
+
+    p_startup = sub.add_parser('startup', help="Report the import time and CLI startup times")
+    p_startup.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.command == 'validation':
+        files = args.files or pipeline.get_xlsx_files()
+        if not files:
+            logger.error("No workbooks to benchmark.")
+            return 1
+        return 0 if bench_validation(files, args.repeat) else 1
+    if args.command == 'listparse':
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            for page in (1, 2):
+                with open(os.path.join(args.save, f"list{page if page > 1 else ''}.htm"), 'w', encoding='utf-8') as f:
+                    f.write(synthetic_list_page(page))
+        return 0 if bench_listparse(args.files, args.repeat) else 1
+    if args.command == 'generate':
+        paths = write_synthetic_workbooks(args.out_dir, args.rows, args.rows_per_file, args.seed, args.malformed)
+        for path in paths:
+            print(path)
+        return 0
+    if args.command == 'scale':
+        scales = [int(x) for x in args.scales.split(',') if x.strip()]
+        return 0 if bench_scale(scales, args.rows_per_file, args.output, args.keep) else 1
+    if args.command == 'startup':
+        return 0 if bench_startup(args.repeat) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
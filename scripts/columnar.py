@@ -0,0 +1,153 @@
+"""
+Dictionary-encoded columnar form of all_exams.json.
+
+Every field whose values are all strings (or null) is stored once in a
+per-field dictionary and referenced by integer codes; other fields keep their
+values as plain arrays. Record ids are unique hashes, so they stay a plain
+array too. This module is also the reference implementation of the format:
+
+    {
+        "version": 2,
+        "count": 9569,
+        "fields": ["id", "campus", ...],              # record key order
+        "dicts": {"campus": ["仙林", "三牌楼", null], ...},   # most frequent first
+        "columns": {
+            "campus": [0, 0, 1, ...],                  # codes into dicts[field]
+            "count": [35, 42, ...],                    # raw values
+            "id": ["71ebd251", "71ebd251-1", ...]      # raw values, never dictionary-coded
+        }
+    }
+
+decode_columnar() reproduces the original records exactly, including key
+order, so json.dumps of the decoded list is byte-identical to all_exams.json.
+"""
+import gzip
+import json
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+COLUMNAR_VERSION = 2
+ID_FIELD = 'id'
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def build_dictionary(values: Sequence[Any]) -> Tuple[List[Any], List[int]]:
+    """Returns (dictionary, codes) with the most frequent values getting the smallest codes."""
+    counts = Counter(values)
+    first_seen = {}
+    for v in values:
+        first_seen.setdefault(v, len(first_seen))
+    dictionary = sorted(counts, key=lambda v: (-counts[v], first_seen[v]))
+    lookup = {v: i for i, v in enumerate(dictionary)}
+    return dictionary, [lookup[v] for v in values]
+
+def encode_columnar(rows: List[Dict], fields: Sequence[str]) -> Dict:
+    """Encodes records that all share the key order `fields`."""
+    for row in rows:
+        if list(row) != list(fields):
+            raise ValueError(f"Record keys do not match the field layout: {list(row)}")
+
+    dicts: Dict[str, List[Any]] = {}
+    columns: Dict[str, Any] = {}
+    for field in fields:
+        values = [row[field] for row in rows]
+        if field != ID_FIELD and all(v is None or isinstance(v, str) for v in values):
+            dicts[field], columns[field] = build_dictionary(values)
+        else:
+            columns[field] = values
+
+    return {
+        "version": COLUMNAR_VERSION,
+        "count": len(rows),
+        "fields": list(fields),
+        "dicts": dicts,
+        "columns": columns
+    }
+
+def decode_columnar(doc: Dict) -> List[Dict]:
+    """Rebuilds the original list of records."""
+    if doc.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar version: {doc.get('version')}")
+
+    dicts = doc["dicts"]
+    decoded_columns = []
+    for field in doc["fields"]:
+        column = doc["columns"][field]
+        if field in dicts:
+            dictionary = dicts[field]
+            decoded_columns.append([dictionary[c] for c in column])
+        else:
+            decoded_columns.append(column)
+
+    fields = doc["fields"]
+    return [dict(zip(fields, values)) for values in zip(*decoded_columns)]
+
+def save_columnar(doc: Dict, path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_columnar(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return decode_columnar(json.load(f))
+
+
+# --- Precompressed siblings for static hosting ---
+
+def write_precompressed(path: str) -> Dict[str, int]:
+    """
+    Writes `path`.gz (and `path`.br when the optional brotli package is installed)
+    next to `path`. Output is deterministic (gzip mtime is zeroed), so unchanged
+    inputs produce byte-identical files. Returns {variant: size in bytes}.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {"raw": len(data)}
+
+    variants = [("gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(("br", lambda: brotli.compress(data, quality=11)))
+
+    for ext, compress in variants:
+        compressed = compress()
+        out_path = f"{path}.{ext}"
+        tmp_path = f"{out_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, out_path)
+        sizes[ext] = len(compressed)
+    return sizes
+
+def variant_sizes(path: str) -> Dict[str, int]:
+    """Sizes of `path` and whichever of its .gz/.br siblings exist."""
+    sizes = {}
+    if os.path.exists(path):
+        sizes["raw"] = os.path.getsize(path)
+    for ext in ("gz", "br"):
+        if os.path.exists(f"{path}.{ext}"):
+            sizes[ext] = os.path.getsize(f"{path}.{ext}")
+    return sizes
+
+
+if __name__ == "__main__":
+    # Usage: python scripts/columnar.py <all_exams.columnar.json> [all_exams.json]
+    # Decodes the columnar file; with a second argument, checks it round-trips byte-for-byte.
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/columnar.py <columnar_path> [records_path]")
+        sys.exit(1)
+    records = load_columnar(sys.argv[1])
+    if len(sys.argv) < 3:
+        json.dump(records, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+        sys.exit(0)
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        expected = f.read()
+    identical = json.dumps(records, ensure_ascii=False, separators=(',', ':')) == expected
+    print(f"{len(records)} records, round trip {'identical' if identical else 'DIFFERS'}")
+    sys.exit(0 if identical else 1)
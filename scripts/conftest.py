@@ -0,0 +1,97 @@
+"""Shared pytest fixtures for the script tests."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import pytest
+
+
+class Resource:
+    """A file served by LocalServer; tests mutate it to simulate the JWC site changing."""
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 failures: int = 0, chunk_size: int = 0, chunk_delay: float = 0.0):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.failures = failures          # answer this many GETs with 503 first
+        self.chunk_size = chunk_size      # >0: send the body in chunks of this size...
+        self.chunk_delay = chunk_delay    # ...sleeping this long before each one
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.resources: Dict[str, Resource] = {}
+        self.requests: List[tuple] = []   # (method, path, headers) in arrival order
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+    def count(self, method: str, path: str) -> int:
+        return sum(1 for m, p, _ in self.requests if (m, p) == (method, path))
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        resource = self.server.resources.get(self.path)
+        if resource is None:
+            self.send_error(404)
+            return
+        if send_body and resource.failures > 0:
+            resource.failures -= 1
+            self.send_error(503)
+            return
+        validators = {"ETag": resource.etag, "Last-Modified": resource.last_modified}
+        if (resource.etag and self.headers.get("If-None-Match") == resource.etag) or \
+                (not resource.etag and resource.last_modified and
+                 self.headers.get("If-Modified-Since") == resource.last_modified):
+            self.send_response(304)
+            for name, value in validators.items():
+                if value:
+                    self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(resource.body)))
+        for name, value in validators.items():
+            if value:
+                self.send_header(name, value)
+        self.end_headers()
+        if not send_body:
+            return
+        step = resource.chunk_size or len(resource.body) or 1
+        try:
+            for start in range(0, len(resource.body), step):
+                if resource.chunk_delay:
+                    time.sleep(resource.chunk_delay)
+                self.wfile.write(resource.body[start:start + step])
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture
+def http_server():
+    """A local HTTP server on a free port serving `server.resources`, with ETag/Last-Modified support."""
+    server = LocalServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
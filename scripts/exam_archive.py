@@ -0,0 +1,286 @@
+"""
+Multi-semester exam archive (SQLite).
+
+The crawler replaces public/data with each new notice's workbooks, so the
+published JSON only ever holds the current semester. Every processing run
+also ingests its validated records here, keyed by semester and source notice,
+so earlier semesters stay queryable. Schema:
+
+    notices(id, semester, source_url, source_title, content_digest, record_count, ingested_at)
+        UNIQUE (semester, source_url)
+    exams(notice_id -> notices.id, record_id, <every all_exams.json field except id>)
+        indexed on (class_name, date), (course_code, date), (date), (location, date)
+
+Re-ingesting a notice replaces its records in one transaction; an unchanged
+content digest makes it a no-op. The pipeline's archive is committed to the
+repository, so compact() drops the pages freed by replaced notices.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+SCHEMA_VERSION = 1
+
+# Record layout of all_exams.json; "id" is stored as record_id
+RECORD_FIELDS = [
+    'id', 'campus', 'course_name', 'course_code', 'class_name', 'teacher', 'location', 'raw_time',
+    'count', 'school', 'student_school', 'major', 'grade', 'notes',
+    'start_timestamp', 'end_timestamp', 'duration_minutes', 'date', 'parse_error'
+]
+COLUMNS = ['record_id'] + RECORD_FIELDS[1:]
+# Keys of the records returned by queries
+RESULT_FIELDS = RECORD_FIELDS + ['semester', 'source_url']
+NOTICE_FIELDS = ['semester', 'source_url', 'source_title', 'content_digest', 'record_count', 'ingested_at']
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY,
+    semester TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    source_title TEXT,
+    content_digest TEXT,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    ingested_at TEXT NOT NULL,
+    UNIQUE (semester, source_url)
+);
+CREATE TABLE IF NOT EXISTS exams (
+    notice_id INTEGER NOT NULL REFERENCES notices(id) ON DELETE CASCADE,
+    record_id TEXT NOT NULL,
+    campus TEXT, course_name TEXT, course_code TEXT, class_name TEXT, teacher TEXT,
+    location TEXT, raw_time TEXT, count INTEGER, school TEXT, student_school TEXT,
+    major TEXT, grade TEXT, notes TEXT,
+    start_timestamp TEXT, end_timestamp TEXT, duration_minutes INTEGER,
+    date TEXT, parse_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_exams_class ON exams (class_name, date);
+CREATE INDEX IF NOT EXISTS idx_exams_course ON exams (course_code, date);
+CREATE INDEX IF NOT EXISTS idx_exams_date ON exams (date);
+CREATE INDEX IF NOT EXISTS idx_exams_location ON exams (location, date);
+CREATE INDEX IF NOT EXISTS idx_exams_notice ON exams (notice_id);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+SEMESTER_RE = re.compile(r'(\d{4})\s*-\s*(\d{4})\s*学年\s*第\s*([一二12])\s*学期')
+TERM_NUMBERS = {'一': 1, '二': 2, '1': 1, '2': 2}
+
+
+def semester_from_title(title: Optional[str]) -> Optional[str]:
+    """"2025-2026学年第一学期考试安排表" -> "2025-2026-1"; None if the title names no semester."""
+    match = SEMESTER_RE.search(title or '')
+    if not match:
+        return None
+    start, end, term = match.groups()
+    return f"{start}-{end}-{TERM_NUMBERS[term]}"
+
+def semester_from_dates(dates: Iterable[Optional[str]]) -> Optional[str]:
+    """
+    Infers the semester from exam dates: exams from August to January belong to the
+    first term of the academic year starting that autumn, February to July to the second.
+    """
+    valid = sorted(d for d in dates if d)
+    if not valid:
+        return None
+    median = valid[len(valid) // 2]
+    year, month = int(median[:4]), int(median[5:7])
+    if month >= 8:
+        return f"{year}-{year + 1}-1"
+    if month == 1:
+        return f"{year - 1}-{year}-1"
+    return f"{year - 1}-{year}-2"
+
+
+class ExamArchive:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"Unsupported archive schema version: {version}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ExamArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Ingestion ---
+
+    def ingest(self, rows: Sequence[Dict], semester: str, source_url: str,
+               source_title: Optional[str] = None, content_digest: Optional[str] = None) -> bool:
+        """
+        Stores the records of one notice, replacing whatever was archived for the same
+        (semester, source_url). Returns False without writing when `content_digest`
+        matches the archived one.
+        """
+        existing = self.conn.execute(
+            "SELECT id, content_digest FROM notices WHERE semester = ? AND source_url = ?",
+            (semester, source_url)).fetchone()
+        if existing and content_digest and existing[1] == content_digest:
+            return False
+
+        for row in rows:
+            if list(row) != RECORD_FIELDS:
+                raise ValueError(f"Record keys do not match the archive layout: {list(row)}")
+
+        ingested_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.conn:
+            if existing:
+                notice_id = existing[0]
+                self.conn.execute("DELETE FROM exams WHERE notice_id = ?", (notice_id,))
+                self.conn.execute(
+                    "UPDATE notices SET source_title = ?, content_digest = ?, record_count = ?, ingested_at = ? "
+                    "WHERE id = ?", (source_title, content_digest, len(rows), ingested_at, notice_id))
+            else:
+                notice_id = self.conn.execute(
+                    "INSERT INTO notices (semester, source_url, source_title, content_digest, record_count, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (semester, source_url, source_title, content_digest, len(rows), ingested_at)).lastrowid
+            placeholders = ', '.join('?' * (len(COLUMNS) + 1))
+            self.conn.executemany(
+                f"INSERT INTO exams (notice_id, {', '.join(COLUMNS)}) VALUES ({placeholders})",
+                ((notice_id, *row.values()) for row in rows))
+        return True
+
+    def compact(self) -> None:
+        """Checkpoints the WAL and rewrites the file without free pages."""
+        if self.path != ':memory:':
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+
+    def remove_notice(self, semester: str, source_url: str) -> bool:
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM notices WHERE semester = ? AND source_url = ?",
+                                       (semester, source_url))
+        return cursor.rowcount > 0
+
+    # --- Queries ---
+
+    def semesters(self) -> List[Dict]:
+        """One entry per archived notice, newest semester first."""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(NOTICE_FIELDS)} FROM notices ORDER BY semester DESC, ingested_at DESC")
+        return [dict(zip(NOTICE_FIELDS, row)) for row in rows]
+
+    def find(self, class_name: Optional[str] = None, course_code: Optional[str] = None,
+             location: Optional[str] = None, date: Optional[str] = None,
+             date_from: Optional[str] = None, date_to: Optional[str] = None,
+             semesters: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Records matching every given filter (exact match; dates as "YYYY-MM-DD",
+        date_from/date_to inclusive), ordered by start time. Each record has the
+        all_exams.json layout plus "semester" and "source_url".
+        """
+        clauses, params = [], []
+        for column, value in (('e.class_name', class_name), ('e.course_code', course_code),
+                              ('e.location', location), ('e.date', date)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if date_from is not None:
+            clauses.append("e.date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("e.date <= ?")
+            params.append(date_to)
+        if semesters:
+            clauses.append(f"n.semester IN ({', '.join('?' * len(semesters))})")
+            params.extend(semesters)
+
+        sql = (f"SELECT {', '.join('e.' + c for c in COLUMNS)}, n.semester, n.source_url "
+               f"FROM exams e JOIN notices n ON n.id = e.notice_id")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY e.start_timestamp IS NULL, e.start_timestamp, e.rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(RESULT_FIELDS, row)) for row in self.conn.execute(sql, params)]
+
+    def exams_for_class(self, class_name: str, semesters: Optional[Sequence[str]] = None) -> List[Dict]:
+        """All archived exams of a class, across semesters unless `semesters` narrows them."""
+        return self.find(class_name=class_name, semesters=semesters)
+
+
+def ingest_data_dir(archive: ExamArchive, data_dir: str) -> Optional[str]:
+    """
+    Archives the current all_exams.json of `data_dir`, using source_metadata.json and
+    data_summary.json for the notice and digest. Returns the semester, or None if
+    there is nothing to archive (no records, no source notice or no semester).
+    """
+    try:
+        with open(os.path.join(data_dir, 'all_exams.json'), 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta, summary = {}, {}
+    for name, target in (('source_metadata.json', meta), ('data_summary.json', summary)):
+        try:
+            with open(os.path.join(data_dir, name), 'r', encoding='utf-8') as f:
+                target.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    source_url = meta.get('source_url')
+    if not source_url or not rows:
+        return None
+    title = meta.get('source_title')
+    semester = semester_from_title(title) or semester_from_dates(r.get('date') for r in rows)
+    if not semester:
+        return None
+    archive.ingest(rows, semester, source_url, title, summary.get('content_digest'))
+    return semester
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python scripts/exam_archive.py ARCHIVE ingest DATA_DIR
+    #   python scripts/exam_archive.py ARCHIVE semesters
+    #   python scripts/exam_archive.py ARCHIVE find --class B240402 [--semester 2025-2026-1 ...]
+    parser = argparse.ArgumentParser(description="Query or fill the multi-semester exam archive.")
+    parser.add_argument('archive', help="Path of the SQLite archive")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_ingest = sub.add_parser('ingest', help="Archive the current outputs of a data directory")
+    p_ingest.add_argument('data_dir')
+    sub.add_parser('semesters', help="List archived notices")
+    p_find = sub.add_parser('find', help="Print matching records as JSON")
+    p_find.add_argument('--class', dest='class_name')
+    p_find.add_argument('--course-code')
+    p_find.add_argument('--location')
+    p_find.add_argument('--date')
+    p_find.add_argument('--from', dest='date_from')
+    p_find.add_argument('--to', dest='date_to')
+    p_find.add_argument('--semester', action='append', dest='semesters')
+    p_find.add_argument('--limit', type=int)
+    args = parser.parse_args()
+
+    with ExamArchive(args.archive) as exam_archive:
+        if args.command == 'ingest':
+            semester = ingest_data_dir(exam_archive, args.data_dir)
+            print(f"Archived {semester}" if semester else "Nothing to archive")
+            sys.exit(0 if semester else 1)
+        if args.command == 'semesters':
+            for notice in exam_archive.semesters():
+                print(f"{notice['semester']}  {notice['record_count']:>6,} records  "
+                      f"{notice['source_title'] or notice['source_url']}")
+            sys.exit(0)
+        start = time.perf_counter()
+        records = exam_archive.find(args.class_name, args.course_code, args.location, args.date,
+                                    args.date_from, args.date_to, args.semesters, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        json.dump(records, sys.stdout, ensure_ascii=False, indent=2)
+        print(f"\n{len(records)} records in {elapsed:.1f} ms", file=sys.stderr)
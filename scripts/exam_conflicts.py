@@ -0,0 +1,185 @@
+"""
+Schedule conflict detection over all_exams.json records.
+
+Records are grouped per class_name and per location into interval indexes
+sorted by start time, and a sweep line over each index collects maximal runs
+of overlapping intervals ([start, end), so back-to-back exams do not clash).
+Identical intervals are collapsed into one sitting first, so the cost is
+O(n log n) and the output is linear in the number of records:
+
+    class conflict  a class has overlapping exams of different courses (or of
+                    one course at different times); one course listed over
+                    several rooms, or under two course codes, at the same
+                    time is not a conflict
+    room conflict   a room has overlapping exams that do not share the same
+                    sitting; several courses or classes seated together in one
+                    sitting are not a conflict. Placeholder rooms ("无1", ...)
+                    and records without a parsed time are skipped.
+
+This module is also the reference implementation of conflicts.json:
+
+    {
+        "content_digest": "sha256:...",             # of the all_exams.json checked
+        "class_conflicts": [{
+            "class_name": "B230205", "start_timestamp": ..., "end_timestamp": ...,
+            "exams": [{"course_code", "course_name", "start_timestamp", "end_timestamp",
+                       "locations": [...], "ids": [...]}, ...]
+        }, ...],
+        "room_conflicts": [{
+            "location": "教2－203", "start_timestamp": ..., "end_timestamp": ...,
+            "exams": [{"start_timestamp", "end_timestamp", "course_names": [...],
+                       "class_names": [...], "ids": [...]}, ...]
+        }, ...]
+    }
+"""
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Locations standing for "no room assigned"
+PLACEHOLDER_LOCATION_RE = re.compile(r'^无\d*$')
+
+
+def is_placeholder_location(location: Optional[str]) -> bool:
+    return not location or bool(PLACEHOLDER_LOCATION_RE.match(location))
+
+def overlap_groups(intervals: Sequence[Tuple[datetime, datetime]], min_size: int = 2) -> Iterator[List[int]]:
+    """
+    Sweep line over `intervals` (start, end): yields the indexes of every maximal
+    run of at least `min_size` intervals connected by overlaps, each run in start order.
+    """
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i])
+    group: List[int] = []
+    group_end = None
+    for i in order:
+        start, end = intervals[i]
+        if group and start < group_end:
+            group.append(i)
+            group_end = max(group_end, end)
+            continue
+        if group and len(group) >= min_size:
+            yield group
+        group, group_end = [i], end
+    if group and len(group) >= min_size:
+        yield group
+
+def _course_keys(row: Dict) -> List[Tuple[str, str]]:
+    return [key for key in (('code', row['course_code']), ('name', row['course_name'])) if key[1]]
+
+def split_courses(rows: List[Dict]) -> List[List[Dict]]:
+    """
+    Splits the records of one sitting into exams: records sharing a course code or a
+    course name (one exam listed under two codes, or with two spellings) stay together.
+    """
+    exams: List[List[Dict]] = []
+    exam_of: Dict[Tuple[str, str], int] = {}
+    for row in rows:
+        keys = _course_keys(row)
+        found = sorted({exam_of[k] for k in keys if k in exam_of})
+        if not found:
+            target = len(exams)
+            exams.append([])
+        else:
+            target = found[0]
+            for other in found[1:]:
+                # The row links two exams seen so far: merge them
+                for moved in exams[other]:
+                    for k in _course_keys(moved):
+                        exam_of[k] = target
+                exams[target].extend(exams[other])
+                exams[other] = []
+        exams[target].append(row)
+        for k in keys:
+            exam_of[k] = target
+    return [exam for exam in exams if exam]
+
+def _index(rows: Iterable[Dict], owner_field: str) -> Dict[str, Dict[Tuple[datetime, datetime], List[Dict]]]:
+    """{owner: {(start, end): records}}: the sittings of each class or room."""
+    index: Dict[str, Dict[Tuple[datetime, datetime], List[Dict]]] = {}
+    # A schedule has few distinct sittings: parse each timestamp pair once
+    intervals: Dict[Tuple[str, str], Tuple[datetime, datetime]] = {}
+    for row in rows:
+        owner = row.get(owner_field)
+        if not owner or (owner_field == 'location' and is_placeholder_location(owner)):
+            continue
+        if not row.get('start_timestamp') or not row.get('end_timestamp'):
+            continue
+        raw = (row['start_timestamp'], row['end_timestamp'])
+        interval = intervals.get(raw)
+        if interval is None:
+            interval = intervals[raw] = (datetime.fromisoformat(raw[0]), datetime.fromisoformat(raw[1]))
+        index.setdefault(owner, {}).setdefault(interval, []).append(row)
+    return index
+
+def _conflict(owner_field: str, owner: str, exams: List[List[Dict]], describe) -> Dict:
+    return {
+        owner_field: owner,
+        "start_timestamp": min(rows[0]['start_timestamp'] for rows in exams),
+        "end_timestamp": max(rows[0]['end_timestamp'] for rows in exams),
+        "exams": [describe(rows) for rows in exams],
+    }
+
+def _class_exam(rows: List[Dict]) -> Dict:
+    first = rows[0]
+    return {
+        "course_code": first['course_code'],
+        "course_name": first['course_name'],
+        "start_timestamp": first['start_timestamp'],
+        "end_timestamp": first['end_timestamp'],
+        "locations": sorted({r['location'] for r in rows if r['location']}),
+        "ids": [r['id'] for r in rows],
+    }
+
+def _room_exam(rows: List[Dict]) -> Dict:
+    return {
+        "start_timestamp": rows[0]['start_timestamp'],
+        "end_timestamp": rows[0]['end_timestamp'],
+        "course_names": sorted({r['course_name'] for r in rows if r['course_name']}),
+        "class_names": sorted({r['class_name'] for r in rows if r['class_name']}),
+        "ids": [r['id'] for r in rows],
+    }
+
+def detect_conflicts(rows: Sequence[Dict]) -> Dict[str, List[Dict]]:
+    """Class and room conflicts among `rows`, ordered by class/location, then time."""
+    class_conflicts = []
+    by_class = _index(rows, 'class_name')
+    for class_name in sorted(by_class):
+        sittings = list(by_class[class_name].items())
+        # A single sitting can still hold two different courses
+        for group in overlap_groups([interval for interval, _ in sittings], min_size=1):
+            if len(group) == 1 and len(sittings[group[0]][1]) == 1:
+                continue
+            exams = [exam for i in group for exam in split_courses(sittings[i][1])]
+            if len(exams) > 1:
+                class_conflicts.append(_conflict('class_name', class_name, exams, _class_exam))
+
+    room_conflicts = []
+    by_room = _index(rows, 'location')
+    for location in sorted(by_room):
+        sittings = list(by_room[location].items())
+        for group in overlap_groups([interval for interval, _ in sittings]):
+            room_conflicts.append(_conflict('location', location, [sittings[i][1] for i in group], _room_exam))
+
+    return {"class_conflicts": class_conflicts, "room_conflicts": room_conflicts}
+
+
+if __name__ == "__main__":
+    # Usage: python scripts/exam_conflicts.py [public/data/all_exams.json]
+    records_path = sys.argv[1] if len(sys.argv) > 1 else 'public/data/all_exams.json'
+    with open(records_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    started = time.perf_counter()
+    found = detect_conflicts(records)
+    elapsed = (time.perf_counter() - started) * 1000
+    for conflict in found["class_conflicts"]:
+        courses = " / ".join(f"{e['course_name']} ({', '.join(e['locations'])})" for e in conflict["exams"])
+        print(f"class {conflict['class_name']}  {conflict['start_timestamp']}  {courses}")
+    for conflict in found["room_conflicts"]:
+        sittings = " / ".join(f"{e['start_timestamp'][11:16]}-{e['end_timestamp'][11:16]} {', '.join(e['course_names'])}"
+                              for e in conflict["exams"])
+        print(f"room {conflict['location']}  {conflict['start_timestamp'][:10]}  {sittings}")
+    print(f"{len(found['class_conflicts'])} class conflicts, {len(found['room_conflicts'])} room conflicts "
+          f"in {len(records):,} records ({elapsed:.1f} ms)", file=sys.stderr)
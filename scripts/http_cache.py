@@ -0,0 +1,127 @@
+"""
+爬虫用的本地 HTTP 校验缓存
+
+按 URL 记录 ETag / Last-Modified / Content-Length，后续请求带上
+If-None-Match / If-Modified-Since；服务器返回 304 或 HEAD 探测结果与记录一致时
+即可跳过下载。页面正文也会缓存，以便 304 时直接复用。
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+
+
+class HttpCache:
+    def __init__(self, cache_dir: str, session: Optional[requests.Session] = None):
+        self.cache_dir = cache_dir
+        # 共享 Session 以复用连接；未提供时退回 requests 模块级函数
+        self.http = session or requests
+        self._lock = threading.Lock()
+        self.body_dir = os.path.join(cache_dir, "bodies")
+        self.index_path = os.path.join(cache_dir, "validators.json")
+        self.entries: Dict[str, Dict] = {}
+        # 传输统计 (字节)
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.body_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """根据已记录的校验值生成条件请求头"""
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, response_headers, size: int):
+        """下载成功后记录校验值"""
+        with self._lock:
+            self.entries[url] = {
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "content_length": size,
+            }
+
+    def add_downloaded(self, size: int):
+        with self._lock:
+            self.bytes_downloaded += size
+
+    def add_saved(self, size: int):
+        with self._lock:
+            self.bytes_saved += size
+
+    def get_text(self, url: str, headers: Dict[str, str], encoding: str = 'utf-8', **kwargs) -> str:
+        """条件 GET 页面；304 时返回缓存的正文"""
+        body_path = self._body_path(url)
+        extra = self.conditional_headers(url) if os.path.exists(body_path) else {}
+        resp = self.http.get(url, headers={**headers, **extra}, **kwargs)
+        if resp.status_code == 304:
+            self.add_saved(self.entries.get(url, {}).get("content_length") or 0)
+            with open(body_path, 'rb') as f:
+                return f.read().decode(encoding, errors='replace')
+
+        resp.raise_for_status()
+        content = resp.content
+        self.add_downloaded(len(content))
+        os.makedirs(self.body_dir, exist_ok=True)
+        with open(body_path, 'wb') as f:
+            f.write(content)
+        self.record(url, resp.headers, len(content))
+        return content.decode(encoding, errors='replace')
+
+    def probe(self, url: str, headers: Dict[str, str], **kwargs) -> Optional[bool]:
+        """
+        用 HEAD 探测附件是否变化。
+        返回 True 表示与记录一致 (未变化)，False 表示已变化，None 表示无法判断
+        (无记录、服务器不支持 HEAD 或未提供任何校验值)。
+        """
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        try:
+            resp = self.http.head(url, headers=headers, allow_redirects=True, **kwargs)
+        except requests.RequestException:
+            return None
+        if resp.status_code >= 400:
+            return None
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        length = resp.headers.get("Content-Length")
+        if not etag and not last_modified:
+            return None
+
+        if etag and entry.get("etag") and etag != entry["etag"]:
+            return False
+        if last_modified and entry.get("last_modified") and last_modified != entry["last_modified"]:
+            return False
+        if length and entry.get("content_length") is not None and int(length) != entry["content_length"]:
+            return False
+        if not ((etag and etag == entry.get("etag")) or (last_modified and last_modified == entry.get("last_modified"))):
+            return None
+
+        self.add_saved(entry.get("content_length") or 0)
+        return True
+
+    def summary(self) -> str:
+        return f"下载 {self.bytes_downloaded / 1024:.1f} KB，缓存节省 {self.bytes_saved / 1024:.1f} KB"
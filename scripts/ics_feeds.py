@@ -0,0 +1,128 @@
+"""
+Per-class iCalendar (RFC 5545) feeds.
+
+Server-side counterpart of src/utils/icsGenerator.ts: same event layout,
+escaping, line folding and Asia/Shanghai VTIMEZONE, but with UIDs derived
+from the stable record id instead of the row position, so an event keeps its
+UID across re-imports and corrections of its time or room, and subscribed
+clients update it in place. DTSTAMP is the only time-dependent line; events_digest() excludes it
+so callers can tell whether a class's calendar actually changed.
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List
+
+DOMAIN = 'hicancan.top'
+APP_NAME = 'NJUPT Exam Sync'
+TZID = 'Asia/Shanghai'
+# Same defaults as the web app's reminder settings (minutes before the exam)
+DEFAULT_REMINDERS = (30, 60)
+
+VTIMEZONE = [
+    'BEGIN:VTIMEZONE',
+    f'TZID:{TZID}',
+    f'X-LIC-LOCATION:{TZID}',
+    'BEGIN:STANDARD',
+    'TZOFFSETFROM:+0800',
+    'TZOFFSETTO:+0800',
+    'TZNAME:CST',
+    'DTSTART:19700101T000000',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+]
+
+
+def escape_text(value: str) -> str:
+    """TEXT value escaping (RFC 5545 3.3.11)."""
+    return (value.replace('\\', '\\\\').replace(',', '\\,').replace(';', '\\;')
+            .replace('\r\n', '\\n').replace('\r', '\\n').replace('\n', '\\n'))
+
+def fold_line(line: str, limit: int = 75) -> str:
+    """Folds a content line to at most 75 octets per line without splitting UTF-8 sequences."""
+    if len(line.encode('utf-8')) <= limit:
+        return line
+    parts = []
+    current = ''
+    current_bytes = 0
+    for char in line:
+        char_bytes = len(char.encode('utf-8'))
+        # Continuation lines start with a space, which takes one octet
+        max_bytes = limit if not parts else limit - 1
+        if current_bytes + char_bytes > max_bytes:
+            parts.append(current)
+            current, current_bytes = char, char_bytes
+        else:
+            current += char
+            current_bytes += char_bytes
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+def format_local(iso_string: str) -> str:
+    """"2025-11-18T13:30:00+08:00" -> "20251118T133000" (local time for use with TZID)."""
+    without_tz = re.sub(r'([+-]\d{2}:\d{2}|Z)$', '', iso_string)
+    return without_tz.replace('-', '').replace(':', '').split('.')[0]
+
+def build_events(rows: Iterable[Dict]) -> List[Dict]:
+    """Turns records into event dicts; records without a parsed time are skipped."""
+    events = []
+    for row in rows:
+        if not row.get('start_timestamp') or not row.get('end_timestamp'):
+            continue
+
+        description = '\n'.join(part for part in [
+            f"课程代码: {row.get('course_code') or '-'}",
+            f"教师: {row.get('teacher') or '未知'}",
+            f"班级: {row.get('class_name')}",
+            f"人数: {row.get('count')}",
+            f"备注: {row['notes']}" if row.get('notes') else '',
+            f"Generated by njupt.{DOMAIN}",
+        ] if part)
+        campus = f"[{row['campus']}] " if row.get('campus') else ''
+
+        events.append({
+            "uid": f"exam-{row['id']}@{DOMAIN}",
+            "start": format_local(row['start_timestamp']),
+            "end": format_local(row['end_timestamp']),
+            "summary": f"考试: {row.get('course_name') or ''}",
+            "location": f"{campus}{row.get('location') or ''}",
+            "description": description,
+        })
+    return events
+
+def events_digest(class_name: str, events: List[Dict]) -> str:
+    """Digest of everything in the calendar except DTSTAMP."""
+    payload = json.dumps([class_name, DEFAULT_REMINDERS, events], ensure_ascii=False, sort_keys=True)
+    return "sha256:" + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_calendar(class_name: str, events: List[Dict], dtstamp: str) -> str:
+    """Renders a VCALENDAR; `dtstamp` is a UTC "YYYYMMDDTHHMMSSZ" value."""
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{DOMAIN}//{APP_NAME}//CN',
+        f'X-WR-CALNAME:{escape_text("南邮考试-" + class_name)}',
+        f'X-WR-TIMEZONE:{TZID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        *VTIMEZONE,
+    ]
+    for event in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{event["uid"]}',
+            f'DTSTAMP:{dtstamp}',
+            f'DTSTART;TZID={TZID}:{event["start"]}',
+            f'DTEND;TZID={TZID}:{event["end"]}',
+            f'SUMMARY:{escape_text(event["summary"])}',
+            f'LOCATION:{escape_text(event["location"])}',
+            f'DESCRIPTION:{escape_text(event["description"])}',
+            'STATUS:CONFIRMED',
+        ]
+        for minutes in DEFAULT_REMINDERS:
+            lines += ['BEGIN:VALARM', 'ACTION:DISPLAY', 'DESCRIPTION:Exam Reminder',
+                      f'TRIGGER:-PT{minutes}M', 'END:VALARM']
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    # Every content line, including the last, ends with CRLF
+    return ''.join(fold_line(line) + '\r\n' for line in lines)
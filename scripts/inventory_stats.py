@@ -0,0 +1,115 @@
+"""
+Mergeable statistics behind DATA_INVENTORY.md.
+
+InventoryStats collects every Part B metric of a sheet (parse success/failure,
+warnings, campus distribution, date range, distinct classes and courses,
+exam durations) in a single pass over its serialized records. Instances merge
+in O(distinct values), so the report's executive summary is a merge of the
+per-file results instead of a second aggregation over all records, and the
+distinct class/course counts across files are exact unions rather than sums.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+class InventoryStats:
+    def __init__(self):
+        self.records = 0
+        self.parse_success = 0
+        self.parse_fail = 0
+        self.errors: List[str] = []
+        self.campus: Counter = Counter()
+        self.min_date: Optional[str] = None
+        self.max_date: Optional[str] = None
+        self.classes = set()
+        self.courses = set()
+        self.duration_total = 0
+        self.duration_count = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], first_row: int = 2) -> "InventoryStats":
+        stats = cls()
+        stats.observe(records, first_row)
+        return stats
+
+    def observe(self, records: Iterable[Dict], first_row: int = 2) -> None:
+        """Adds records (serialized ExamRecords); `first_row` is the Excel row of the first one."""
+        campus = self.campus
+        classes = self.classes
+        courses = self.courses
+        dates = set()
+        for idx, record in enumerate(records, start=first_row):
+            self.records += 1
+            if record['parse_error']:
+                self.errors.append(f"Row {idx}: {record['parse_error']} (Raw: '{record['raw_time']}')")
+                self.parse_fail += 1
+            else:
+                self.parse_success += 1
+
+            if record['campus']:
+                campus[record['campus']] += 1
+            if record['date']:
+                dates.add(record['date'])
+            if record['class_name']:
+                classes.add(record['class_name'])
+            if record['course_name']:
+                courses.add(record['course_name'])
+            if record['duration_minutes'] > 0:
+                self.duration_total += record['duration_minutes']
+                self.duration_count += 1
+        if dates:
+            self._extend_dates(min(dates), max(dates))
+
+    def _extend_dates(self, low: Optional[str], high: Optional[str]) -> None:
+        if low is not None and (self.min_date is None or low < self.min_date):
+            self.min_date = low
+        if high is not None and (self.max_date is None or high > self.max_date):
+            self.max_date = high
+
+    def merge(self, other: "InventoryStats") -> "InventoryStats":
+        """Folds `other` into this instance and returns it."""
+        self.records += other.records
+        self.parse_success += other.parse_success
+        self.parse_fail += other.parse_fail
+        self.errors.extend(other.errors)
+        self.campus.update(other.campus)
+        self._extend_dates(other.min_date, other.max_date)
+        self.classes |= other.classes
+        self.courses |= other.courses
+        self.duration_total += other.duration_total
+        self.duration_count += other.duration_count
+        return self
+
+    @classmethod
+    def merged(cls, parts: Iterable["InventoryStats"]) -> "InventoryStats":
+        total = cls()
+        for part in parts:
+            total.merge(part)
+        return total
+
+    @property
+    def date_range(self) -> str:
+        return f"{self.min_date} ~ {self.max_date}" if self.min_date else "N/A"
+
+    @property
+    def avg_duration(self) -> float:
+        return round(self.duration_total / self.duration_count, 1) if self.duration_count else 0
+
+    @property
+    def success_rate(self) -> float:
+        attempted = self.parse_success + self.parse_fail
+        return round(self.parse_success / attempted * 100, 1) if attempted else 0
+
+    def summary(self) -> Dict:
+        """JSON-serializable view, used by `--stats-only`."""
+        return {
+            "records": self.records,
+            "parse_success": self.parse_success,
+            "parse_fail": self.parse_fail,
+            "parse_success_rate": self.success_rate,
+            "date_range": self.date_range,
+            "unique_classes": len(self.classes),
+            "unique_courses": len(self.courses),
+            "avg_duration_minutes": self.avg_duration,
+            "campus_distribution": dict(self.campus.most_common()),
+        }
@@ -0,0 +1,104 @@
+"""
+Content-addressed cache for per-workbook parse results.
+
+Entries are keyed by the workbook's file name and SHA-256 of its content, and
+namespaced by a pipeline version string. Any change to the parsing code,
+FIELD_MAPPING or the parsing libraries yields a new version, so entries from
+older versions are never read and get evicted on the next run.
+"""
+import hashlib
+import os
+import pickle
+import time
+from typing import Any, List, Optional
+
+CACHE_FORMAT = 1
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hashes a file in chunks without reading it fully into memory."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def compute_version(*parts: Any) -> str:
+    """Builds a short version id from anything the cached results depend on."""
+    h = hashlib.sha256(f"format={CACHE_FORMAT}".encode('utf-8'))
+    for part in parts:
+        h.update(b'\0')
+        h.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+class ParseCache:
+    """
+    Pickle-backed cache in `cache_dir`. File names are "<version>-<key>.pkl", so
+    stale versions can be evicted without opening them. Hits refresh the entry's
+    mtime, which drives the LRU/age based eviction.
+    """
+
+    def __init__(self, cache_dir: str, version: str, max_entries: int = 64, max_age_days: float = 180):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, path: str, variant: str = "") -> str:
+        # The file name is part of the key because the cached analysis records it
+        # (report and manifest entries); `variant` separates results of differently
+        # configured parses of one file
+        name = os.path.basename(path)
+        key = f"{name}\0{file_sha256(path)}" + (f"\0{variant}" if variant else "")
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.version}-{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or incompatible entry: drop it and treat as a miss
+            os.remove(path)
+            return None
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> List[str]:
+        """
+        Removes entries of other pipeline versions, entries unused for longer than
+        max_age_days, and the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        removed = []
+        current = []
+        for fname in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, fname)
+            if not fname.endswith('.pkl'):
+                continue
+            mtime = os.path.getmtime(path)
+            if not fname.startswith(f"{self.version}-") or now - mtime > self.max_age_seconds:
+                os.remove(path)
+                removed.append(fname)
+            else:
+                current.append((mtime, path, fname))
+
+        current.sort(reverse=True)
+        for _, path, fname in current[self.max_entries:]:
+            os.remove(path)
+            removed.append(fname)
+        return removed
@@ -0,0 +1,257 @@
+"""
+Per-stage instrumentation shared by the crawler and the Excel pipeline.
+
+Each named stage records, summed over every time it is entered:
+
+    calls                   how often the stage ran
+    wall_seconds            elapsed time (perf_counter)
+    cpu_seconds             process CPU time, all threads (process_time)
+    bytes_read/written      bytes through read()/write() syscalls (rchar/wchar
+                            of /proc/self/io, null elsewhere); socket
+                            recv()/send() traffic is not included, so callers
+                            record network volume in `counters`
+    tracemalloc_peak_bytes  largest traced allocation above the level at
+                            stage entry (max over calls; null unless
+                            trace_memory is on, since tracing every
+                            allocation slows the pipeline down ~4x)
+
+Results are kept per script in one JSON document, so the crawler and
+analyze_and_update.py can share pipeline_metrics.json without overwriting
+each other:
+
+    {
+        "crawler": {"started_at": ..., "total": {...}, "counters": {...},
+                    "stages": {"list_fetch": {...}, ...}},
+        "analyze": {...}
+    }
+
+With a profile directory, each stage also runs under its own cProfile
+profiler and is dumped to "<script>-<stage>.prof" (pstats format).
+
+Stages are entered from one thread at a time; they may nest, in which case
+the outer stage's figures include the inner one. Worker processes collect
+into their own instance and ship export() back to be absorb()ed.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+METRICS_VERSION = 1
+
+
+def read_io_counters() -> Optional[Tuple[int, int]]:
+    """(rchar, wchar) of this process, or None where /proc/self/io is unavailable."""
+    try:
+        with open('/proc/self/io', 'rb') as f:
+            fields = dict(line.split(b':', 1) for line in f.read().splitlines() if b':' in line)
+        return int(fields[b'rchar']), int(fields[b'wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _empty_stage() -> Dict:
+    return {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+            "bytes_read": None, "bytes_written": None, "tracemalloc_peak_bytes": None}
+
+def _add_optional(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return b if a is None else a if b is None else a + b
+
+def _max_optional(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return b if a is None else a if b is None else max(a, b)
+
+
+class _RawStats:
+    """Lets pstats.Stats load a stats dict shipped back from a worker process."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class PipelineMetrics:
+    def __init__(self, script: str, trace_memory: bool = False, profile_dir: Optional[str] = None,
+                 enabled: bool = True):
+        self.script = script
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.profile_dir = profile_dir if enabled else None
+        self.stages: Dict[str, Dict] = {}
+        # Run-level totals reported by the caller (records, network bytes, ...)
+        self.counters: Dict[str, int] = {}
+        # cProfile/pstats are imported only when profiling (they slow down CLI startup)
+        self._profiles: Dict = {}
+        self._absorbed_profiles: Dict[str, List[Dict]] = {}
+        # Frames of the stages currently entered: [peak floor, profiler, traced size at entry]
+        self._active: List[list] = []
+        self.started_at = datetime.now(timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def _measure(self, name: str) -> Iterator[None]:
+        parent = self._active[-1] if self._active else None
+        if parent and parent[1]:
+            parent[1].disable()
+        frame = [0, None]
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent:
+                # The inner stage resets the peak; keep the outer stage's so far
+                parent[0] = max(parent[0], peak - parent[2])
+            tracemalloc.reset_peak()
+            frame.append(current)
+        if self.profile_dir:
+            import cProfile
+            frame[1] = self._profiles.setdefault(name, cProfile.Profile())
+        self._active.append(frame)
+
+        io_start = read_io_counters()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        if frame[1]:
+            frame[1].enable()
+        try:
+            yield
+        finally:
+            if frame[1]:
+                frame[1].disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            io_end = read_io_counters()
+            self._active.pop()
+
+            stage = self.stages.setdefault(name, _empty_stage())
+            stage["calls"] += 1
+            stage["wall_seconds"] += wall
+            stage["cpu_seconds"] += cpu
+            if io_start and io_end:
+                stage["bytes_read"] = _add_optional(stage["bytes_read"], io_end[0] - io_start[0])
+                stage["bytes_written"] = _add_optional(stage["bytes_written"], io_end[1] - io_start[1])
+            if self.trace_memory:
+                peak = max(frame[0], tracemalloc.get_traced_memory()[1] - frame[2])
+                stage["tracemalloc_peak_bytes"] = _max_optional(stage["tracemalloc_peak_bytes"], peak)
+                if parent:
+                    parent[0] = max(parent[0], peak + frame[2] - parent[2])
+            if parent and parent[1]:
+                parent[1].enable()
+
+    def stage(self, name: str):
+        """Context manager measuring one run of the stage `name`."""
+        return self._measure(name) if self.enabled else nullcontext()
+
+    # --- Worker processes ---
+
+    def export(self) -> Dict:
+        """Picklable snapshot of the collected stages (and profiles) for absorb()."""
+        import pstats
+        profiles = {name: pstats.Stats(profile).stats for name, profile in self._profiles.items()}
+        return {"stages": self.stages, "profiles": profiles}
+
+    def absorb(self, exported: Optional[Dict]) -> None:
+        """Adds stages measured elsewhere, e.g. in a worker process."""
+        if not self.enabled or not exported:
+            return
+        for name, other in exported["stages"].items():
+            stage = self.stages.setdefault(name, _empty_stage())
+            stage["calls"] += other["calls"]
+            stage["wall_seconds"] += other["wall_seconds"]
+            stage["cpu_seconds"] += other["cpu_seconds"]
+            stage["bytes_read"] = _add_optional(stage["bytes_read"], other["bytes_read"])
+            stage["bytes_written"] = _add_optional(stage["bytes_written"], other["bytes_written"])
+            stage["tracemalloc_peak_bytes"] = _max_optional(stage["tracemalloc_peak_bytes"],
+                                                            other["tracemalloc_peak_bytes"])
+        for name, stats in exported.get("profiles", {}).items():
+            self._absorbed_profiles.setdefault(name, []).append(stats)
+
+    # --- Output ---
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": METRICS_VERSION,
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "pid": os.getpid(),
+            "tracemalloc": self.trace_memory,
+            "total": {
+                "wall_seconds": round(time.perf_counter() - self._wall_start, 6),
+                "cpu_seconds": round(time.process_time() - self._cpu_start, 6),
+            },
+            "counters": self.counters,
+            "stages": {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in stage.items()}
+                       for name, stage in self.stages.items()},
+        }
+
+    def dump_profiles(self) -> List[str]:
+        """Writes one .prof file per profiled stage into profile_dir; returns their paths."""
+        if not self.profile_dir:
+            return []
+        import pstats
+        os.makedirs(self.profile_dir, exist_ok=True)
+        paths = []
+        for name in sorted(set(self._profiles) | set(self._absorbed_profiles)):
+            sources = [self._profiles[name]] if name in self._profiles else []
+            sources += [_RawStats(stats) for stats in self._absorbed_profiles.get(name, [])]
+            merged = pstats.Stats(sources[0])
+            if len(sources) > 1:
+                merged.add(*sources[1:])
+            path = os.path.join(self.profile_dir, f"{self.script}-{name}.prof")
+            merged.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def save(self, path: str) -> None:
+        """Replaces this script's entry in the metrics file at `path` (atomically)."""
+        if not self.enabled:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                doc = json.load(f)
+            if not isinstance(doc, dict):
+                doc = {}
+        except (OSError, ValueError):
+            doc = {}
+        doc[self.script] = self.to_dict()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        self.dump_profiles()
+
+
+NULL_METRICS = PipelineMetrics("null", enabled=False)
+
+
+def format_stage_table(stages: Dict[str, Dict]) -> List[str]:
+    """One human-readable line per stage, for log output."""
+    lines = []
+    for name, s in stages.items():
+        parts = [f"{name:<14} x{s['calls']:<4} wall {s['wall_seconds']:8.3f}s  cpu {s['cpu_seconds']:8.3f}s"]
+        if s.get("bytes_read") is not None:
+            parts.append(f"read {s['bytes_read'] / 1024:,.0f} KB  written {s['bytes_written'] / 1024:,.0f} KB")
+        if s.get("tracemalloc_peak_bytes") is not None:
+            parts.append(f"peak {s['tracemalloc_peak_bytes'] / 1024 / 1024:,.1f} MB")
+        lines.append("  ".join(parts))
+    return lines
+
+
+if __name__ == "__main__":
+    # Usage: python scripts/pipeline_metrics.py [pipeline_metrics.json]
+    metrics_path = sys.argv[1] if len(sys.argv) > 1 else 'pipeline_metrics.json'
+    with open(metrics_path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    for script_name, entry in document.items():
+        total = entry.get("total", {})
+        print(f"{script_name}: {entry.get('started_at')}  wall {total.get('wall_seconds', 0):.3f}s  "
+              f"cpu {total.get('cpu_seconds', 0):.3f}s")
+        for counter, value in entry.get("counters", {}).items():
+            print(f"  {counter}: {value:,}")
+        for line in format_stage_table(entry.get("stages", {})):
+            print(f"  {line}")
@@ -0,0 +1,299 @@
+"""
+Read-only HTTP query server over the pipeline output (stdlib asyncio only).
+
+Loads all_exams.json once, indexes it in memory by class, course code, date
+and room, and answers filtered queries without re-reading the file:
+
+    GET /exams?class=B240402                      -> JSON list (all_exams.json layout)
+    GET /exams?course_code=X&date=2026-01-12
+    GET /exams?location=教2－305&from=2026-01-10&to=2026-01-20
+    GET /exams?class=B240402&format=ics           -> text/calendar (same layout as calendars/*.ics)
+    GET /classes                                  -> sorted class names
+    GET /meta                                     -> digest, generation time, record count
+
+Repeated parameters of the same filter are OR-ed, different filters AND-ed.
+Every response carries an ETag derived from the content digest recorded in
+data_summary.json and the normalized query, so clients revalidate with
+If-None-Match and get a bodiless 304 until the data changes. The server polls
+data_summary.json (the last file the pipeline writes) and, when it changes,
+loads the new output in a worker thread and swaps the dataset in one
+assignment; requests in flight finish on the snapshot they started with.
+"""
+import argparse
+import asyncio
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from ics_feeds import build_events, render_calendar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'data')
+# Query parameter -> record field
+FILTERS = {"class": "class_name", "course_code": "course_code", "date": "date", "location": "location"}
+MAX_HEADER_BYTES = 16 * 1024
+IDLE_TIMEOUT = 15
+RESPONSE_CACHE_SIZE = 256
+# Bodies smaller than this are not worth gzipping
+GZIP_MIN_BYTES = 1024
+
+
+class Dataset:
+    """An immutable snapshot of the output with hash indexes over the filter fields."""
+
+    def __init__(self, records: List[Dict], summary: Dict):
+        self.records = records
+        self.digest = summary.get('content_digest') or self._digest_records(records)
+        self.generated_at = summary.get('generated_at')
+        self.indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTERS.values()}
+        for position, record in enumerate(records):
+            for field, index in self.indexes.items():
+                value = record.get(field)
+                if value:
+                    index.setdefault(value, []).append(position)
+        self.sorted_dates = sorted(self.indexes['date'])
+        self.class_names = sorted(self.indexes['class_name'])
+
+    @staticmethod
+    def _digest_records(records: List[Dict]) -> str:
+        payload = json.dumps(records, ensure_ascii=False, separators=(',', ':'))
+        return "sha256:" + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def load(cls, data_dir: str) -> "Dataset":
+        summary = {}
+        try:
+            with open(os.path.join(data_dir, 'data_summary.json'), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            pass
+        with open(os.path.join(data_dir, 'all_exams.json'), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        return cls(records, summary)
+
+    def query(self, filters: Dict[str, List[str]], date_from: Optional[str] = None,
+              date_to: Optional[str] = None) -> List[Dict]:
+        """Records matching all filters ({field: accepted values}) in file order."""
+        candidates: List[set] = []
+        for field, values in filters.items():
+            index = self.indexes[field]
+            candidates.append({p for value in values for p in index.get(value, ())})
+        if date_from or date_to:
+            low = bisect.bisect_left(self.sorted_dates, date_from) if date_from else 0
+            high = bisect.bisect_right(self.sorted_dates, date_to) if date_to else len(self.sorted_dates)
+            candidates.append({p for d in self.sorted_dates[low:high] for p in self.indexes['date'][d]})
+        if not candidates:
+            return self.records
+        candidates.sort(key=len)
+        positions = candidates[0].intersection(*candidates[1:])
+        return [self.records[p] for p in sorted(positions)]
+
+
+def render_ics(label: str, records: List[Dict]) -> str:
+    """One calendar for the matched records, with their events grouped by class."""
+    by_class: Dict[str, List[Dict]] = {}
+    for record in records:
+        by_class.setdefault(record.get('class_name') or '', []).append(record)
+    events = []
+    for class_name in sorted(by_class):
+        events.extend(build_events(by_class[class_name]))
+    dtstamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return render_calendar(label, events, dtstamp)
+
+
+class QueryServer:
+    def __init__(self, data_dir: str, reload_interval: float = 2.0):
+        self.data_dir = data_dir
+        self.summary_path = os.path.join(data_dir, 'data_summary.json')
+        self.reload_interval = reload_interval
+        self.dataset = Dataset.load(data_dir)
+        self._summary_stat = self._stat_summary()
+        self._responses: "OrderedDict[Tuple, Tuple[int, str, bytes, Optional[bytes]]]" = OrderedDict()
+
+    def _stat_summary(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.summary_path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    async def watch_summary(self) -> None:
+        """Reloads the dataset whenever data_summary.json changes."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            current = self._stat_summary()
+            if current == self._summary_stat:
+                continue
+            try:
+                dataset = await asyncio.to_thread(Dataset.load, self.data_dir)
+            except (OSError, ValueError) as e:
+                # Mid-write or broken output: keep serving the old snapshot, retry next poll
+                logger.warning(f"Reload failed, keeping the current data: {e}")
+                continue
+            self._summary_stat = current
+            if dataset.digest != self.dataset.digest:
+                self.dataset = dataset
+                self._responses.clear()
+                logger.info(f"Reloaded {len(dataset.records)} records ({dataset.digest[:19]}).")
+
+    # --- Routing ---
+
+    def respond(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, str, bytes]:
+        """Returns (status, content type, body) for a GET request."""
+        dataset = self.dataset
+        if path == '/meta':
+            return 200, 'application/json', self._json({
+                "content_digest": dataset.digest,
+                "generated_at": dataset.generated_at,
+                "records": len(dataset.records),
+                "classes": len(dataset.class_names),
+                "filters": sorted(FILTERS) + ["from", "to", "format"],
+            })
+        if path == '/classes':
+            return 200, 'application/json', self._json(dataset.class_names)
+        if path != '/exams':
+            return 404, 'application/json', self._json({"error": f"Unknown path: {path}"})
+
+        unknown = set(params) - set(FILTERS) - {'from', 'to', 'format'}
+        if unknown:
+            return 400, 'application/json', self._json({"error": f"Unknown parameters: {sorted(unknown)}"})
+        fmt = params.get('format', ['json'])[-1]
+        if fmt not in ('json', 'ics'):
+            return 400, 'application/json', self._json({"error": "format must be json or ics"})
+
+        filters = {FILTERS[name]: values for name, values in params.items() if name in FILTERS}
+        records = dataset.query(filters, params.get('from', [None])[-1], params.get('to', [None])[-1])
+        if fmt == 'ics':
+            label = ','.join(params.get('class', [])) or 'query'
+            return 200, 'text/calendar', render_ics(label, records).encode('utf-8')
+        return 200, 'application/json', json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def _json(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def cached_response(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, str, bytes, Optional[bytes], str]:
+        """respond() memoized per (digest, normalized query); also returns the gzip body and ETag."""
+        dataset = self.dataset
+        key = (dataset.digest, path, tuple(sorted((k, tuple(sorted(v))) for k, v in params.items())))
+        # Weak: the gzip and identity bodies of a response share it
+        etag = 'W/"' + hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32] + '"'
+        cached = self._responses.get(key)
+        if cached is None:
+            status, content_type, body = self.respond(path, params)
+            compressed = gzip.compress(body, 6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+            cached = (status, content_type, body, compressed)
+            if status == 200:
+                self._responses[key] = cached
+                if len(self._responses) > RESPONSE_CACHE_SIZE:
+                    self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+        return (*cached, etag)
+
+    # --- HTTP ---
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, 'text/plain', b'Request header too large', keep_alive=False)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self._send(writer, 400, 'text/plain', b'Bad request line', keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1') or headers.get('connection', '').lower() == 'keep-alive'
+
+                if method not in ('GET', 'HEAD'):
+                    await self._send(writer, 405, 'text/plain', b'Method not allowed', keep_alive,
+                                     extra={'Allow': 'GET, HEAD'})
+                    continue
+                url = urlsplit(target)
+                params = parse_qs(url.query, keep_blank_values=False)
+                status, content_type, body, compressed, etag = self.cached_response(unquote(url.path), params)
+
+                extra = {'Vary': 'Accept-Encoding'}
+                if status == 200:
+                    extra['ETag'] = etag
+                    extra['Cache-Control'] = 'no-cache'
+                    # Weak comparison (RFC 9110 13.1.2)
+                    tags = {t.strip().removeprefix('W/') for t in headers.get('if-none-match', '').split(',')}
+                    if etag.removeprefix('W/') in tags or '*' in tags:
+                        await self._send(writer, 304, None, b'', keep_alive, extra, head_only=True)
+                        continue
+                if compressed is not None and 'gzip' in headers.get('accept-encoding', ''):
+                    body = compressed
+                    extra['Content-Encoding'] = 'gzip'
+                await self._send(writer, status, content_type, body, keep_alive, extra, head_only=method == 'HEAD')
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, content_type: Optional[str], body: bytes,
+                    keep_alive: bool, extra: Optional[Dict[str, str]] = None, head_only: bool = False) -> None:
+        reasons = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 431: 'Request Header Fields Too Large'}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, '')}"]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}; charset=utf-8")
+        if status != 304:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(data_dir: str, host: str, port: int, reload_interval: float) -> None:
+    app = QueryServer(data_dir, reload_interval)
+    server = await asyncio.start_server(app.handle, host, port, limit=MAX_HEADER_BYTES)
+    logger.info(f"Serving {len(app.dataset.records)} records on http://{host}:{port} "
+                f"({app.dataset.digest[:19]}), watching {app.summary_path}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), app.watch_summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve filtered exam queries from the pipeline output.")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="Directory holding all_exams.json and data_summary.json (default: public/data)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--reload-interval', type=float, default=2.0,
+                        help="Seconds between checks of data_summary.json for new data (default: 2)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+    try:
+        asyncio.run(serve(args.data_dir, args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        sys.exit(0)
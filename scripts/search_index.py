@@ -0,0 +1,104 @@
+"""
+Class-name search index.
+
+Builds a compact n-gram lookup table over the deduplicated class names so
+clients can resolve "class name contains <term>" queries without scanning
+the full record set. This module is also the reference implementation of
+the index format:
+
+    {
+        "version": 1,
+        "ngram": 2,
+        "classes": ["B200102", "B200112", ...],      # sorted, deduplicated
+        "grams": {"B2": [0, 1, ...], "20": [...]}    # upper-cased n-gram -> sorted class positions
+    }
+"""
+import json
+import os
+import sys
+from typing import Dict, Iterable, List
+
+INDEX_VERSION = 1
+NGRAM_SIZE = 2
+
+
+def normalize(text: str) -> str:
+    """Queries are case-insensitive, matching the frontend's toUpperCase() search."""
+    return text.strip().upper()
+
+def iter_ngrams(text: str, n: int = NGRAM_SIZE) -> Iterable[str]:
+    for i in range(len(text) - n + 1):
+        yield text[i:i + n]
+
+def build_search_index(class_names: Iterable[str], n: int = NGRAM_SIZE) -> Dict:
+    """Builds the index from any iterable of class names (duplicates and blanks are dropped)."""
+    classes = sorted({name for name in class_names if name})
+    grams: Dict[str, List[int]] = {}
+    for pos, name in enumerate(classes):
+        for gram in set(iter_ngrams(normalize(name), n)):
+            grams.setdefault(gram, []).append(pos)
+
+    return {
+        "version": INDEX_VERSION,
+        "ngram": n,
+        "classes": classes,
+        # Sorted keys keep the serialized file byte-stable between runs
+        "grams": {gram: grams[gram] for gram in sorted(grams)}
+    }
+
+def query_search_index(index: Dict, term: str) -> List[str]:
+    """
+    Returns the sorted class names containing `term` (case-insensitive).
+    Terms shorter than the n-gram size fall back to a scan over the class names.
+    """
+    term = normalize(term)
+    classes = index["classes"]
+    if not term:
+        return []
+
+    n = index.get("ngram", NGRAM_SIZE)
+    if len(term) < n:
+        return [name for name in classes if term in normalize(name)]
+
+    # Intersect postings starting from the rarest gram
+    postings = []
+    for gram in set(iter_ngrams(term, n)):
+        posting = index["grams"].get(gram)
+        if not posting:
+            return []
+        postings.append(posting)
+    postings.sort(key=len)
+
+    candidates = set(postings[0])
+    for posting in postings[1:]:
+        candidates.intersection_update(posting)
+        if not candidates:
+            return []
+
+    # N-grams only prove co-occurrence, not adjacency; verify the substring
+    return [classes[pos] for pos in sorted(candidates) if term in normalize(classes[pos])]
+
+def save_search_index(index: Dict, path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_search_index(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported search index version: {index.get('version')}")
+    return index
+
+
+if __name__ == "__main__":
+    # Usage: python scripts/search_index.py <term> [index_path]
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/search_index.py <term> [index_path]")
+        sys.exit(1)
+    default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'public', 'data', 'class_search_index.json')
+    path = sys.argv[2] if len(sys.argv) > 2 else default_path
+    for name in query_search_index(load_search_index(path), sys.argv[1]):
+        print(name)
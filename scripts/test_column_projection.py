@@ -0,0 +1,168 @@
+"""
+Column projection (sniff_layout / iter_projected_cells / read_projected_frame)
+must read exactly what pandas.read_excel(header=..., usecols=...) reads, and the
+fallback taken when the openpyxl/pandas internals are unavailable must give the
+same result. Run with: python -m pytest scripts
+"""
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+import analyze_and_update as pipeline
+from benchmark import write_xlsx
+
+pipeline.load_dependencies()
+
+# Private names the projection imports (openpyxl's own reader keeps its references)
+OPENPYXL_PARSER = "openpyxl.worksheet._reader.WorkSheetParser"
+PANDAS_TEXT_PARSER = "pandas.io.parsers.TextParser"
+
+HEADER = ["校区", "课程名称", "班级名称", "考试时间", "人数", "年级", "备注"]
+UNMAPPED = ["序号", "学分", "考核方式"]
+
+def exam_rows(n=12):
+    rows = []
+    for i in range(n):
+        rows.append(["仙林" if i % 3 else "三牌楼", f"课程{i}", f"B2404{i % 4:02d}",
+                     f"2026年01月{5 + i % 3:02d}日 08:00-09:40", 30 + i if i != 5 else None,
+                     None if i % 5 == 2 else 2024, "缓考" if i == 7 else None])
+    return rows
+
+def interleave(header, rows):
+    """Puts an unmapped column before, between and after the mapped ones (non-contiguous usecols)."""
+    def spread(values, extra):
+        return [extra[0], *values[:3], extra[1], *values[3:], extra[2]]
+    return spread(header, UNMAPPED), [spread(row, [i + 1, 2.5 if i % 2 else None, "闭卷"])
+                                      for i, row in enumerate(rows)]
+
+def write_workbook(path, header, rows, banner_rows=()):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for banner in banner_rows:
+        ws.append(banner)
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+def sheet_cases():
+    header, rows = interleave(HEADER, exam_rows())
+    gaps = exam_rows()
+    gaps[4] = [None] * len(HEADER)                  # empty row inside the data
+    gaps.append([None] * len(HEADER))               # trailing empty rows are dropped
+    only_unmapped = list(rows)
+    only_unmapped[3] = [17, None, None, None, None, None, None, None, None, "开卷"]
+    return {
+        "plain": dict(header=HEADER, rows=exam_rows()),
+        "banner": dict(header=HEADER, rows=exam_rows(),
+                       banner_rows=[["2025-2026学年第一学期考试安排表"], [None, "学生用表", None, "更新于 2026-01-01"]]),
+        "non_contiguous": dict(header=header, rows=rows),
+        "banner_non_contiguous": dict(header=header, rows=rows, banner_rows=[["考试安排"]]),
+        "empty_rows": dict(header=HEADER, rows=gaps),
+        # A row holding data only in unmapped columns is a row for pandas, not a gap
+        "data_only_in_unmapped": dict(header=header, rows=only_unmapped),
+        "mixed_types": dict(header=HEADER, rows=[r[:4] + [datetime(2026, 1, 5) if i == 1 else r[4], r[5], True]
+                                                 for i, r in enumerate(exam_rows(6))]),
+    }
+
+CASES = sheet_cases()
+
+
+@pytest.fixture(params=CASES)
+def sheet(request, tmp_path):
+    return write_workbook(tmp_path / f"{request.param}.xlsx", **CASES[request.param])
+
+def projection(path):
+    wb, ws = pipeline.open_first_sheet(path)
+    layout = pipeline.sniff_layout(ws)
+    mapping, _ = pipeline.resolve_column_mapping(layout.columns)
+    return wb, ws, layout, pipeline.mapped_columns(layout, mapping)
+
+def read_projected(path):
+    wb, ws, layout, usecols = projection(path)
+    try:
+        return pipeline.read_projected_frame(ws, layout, usecols)
+    finally:
+        wb.close()
+
+def read_with_pandas(path):
+    _, _, layout, usecols = projection(path)
+    return pd.read_excel(path, engine='openpyxl', header=layout.header_row, usecols=usecols)
+
+def streamed(path, projected=True):
+    wb, ws, layout, usecols = projection(path)
+    try:
+        columns, rows = pipeline.iter_xlsx_rows(ws, layout, usecols if projected else None)
+        keep = [layout.columns[i] for i in usecols]
+        return [{col: row[col] for col in keep} for row in rows]
+    finally:
+        wb.close()
+
+@pytest.fixture
+def without_internals(monkeypatch):
+    """Removes the private openpyxl parser and pandas TextParser the projection relies on."""
+    monkeypatch.delattr(OPENPYXL_PARSER)
+    monkeypatch.delattr(PANDAS_TEXT_PARSER)
+
+
+def test_header_is_sniffed_below_banners(tmp_path):
+    path = write_workbook(tmp_path / "banner.xlsx", **CASES["banner_non_contiguous"])
+    wb, ws, layout, usecols = projection(path)
+    wb.close()
+    assert layout.header_row == 1
+    assert layout.columns == CASES["banner_non_contiguous"]["header"]
+    assert [layout.columns[i] for i in usecols] == HEADER
+    assert usecols == [1, 2, 3, 5, 6, 7, 8]
+
+def test_projected_frame_matches_read_excel(sheet):
+    assert_frame_equal(read_projected(sheet), read_with_pandas(sheet))
+
+def test_projected_stream_matches_full_stream(sheet):
+    assert streamed(sheet) == streamed(sheet, projected=False)
+
+def test_mapped_only_records_match_full_read(sheet):
+    for mode in ({}, {"bulk": True}, {"streaming": True}):
+        full = pipeline.process_single_file(sheet, profile_unmapped=True, **mode)
+        mapped = pipeline.process_single_file(sheet, profile_unmapped=False, **mode)
+        assert mapped["raw_data"] == full["raw_data"]
+        assert mapped["row_count"] == full["row_count"]
+
+def test_projection_reports_missing_internals_before_reading(sheet, without_internals):
+    wb, ws, layout, usecols = projection(sheet)
+    try:
+        with pytest.raises(pipeline.PROJECTION_ERRORS):
+            pipeline.iter_projected_cells(ws, usecols, layout.header_row + 2)
+        with pytest.raises(pipeline.PROJECTION_ERRORS):
+            pipeline.read_projected_frame(ws, layout, usecols)
+    finally:
+        wb.close()
+
+@pytest.mark.parametrize("missing", [
+    [OPENPYXL_PARSER], [PANDAS_TEXT_PARSER], [OPENPYXL_PARSER, PANDAS_TEXT_PARSER],
+], ids=lambda names: "+".join(name.rsplit(".", 1)[1] for name in names))
+def test_fallback_matches_projection(sheet, monkeypatch, missing):
+    expected_stream = streamed(sheet)
+    expected_frame = read_projected(sheet)
+    expected = {mode: pipeline.process_single_file(sheet, profile_unmapped=False, **kwargs)
+                for mode, kwargs in (("default", {}), ("bulk", {"bulk": True}), ("streaming", {"streaming": True}))}
+
+    for name in missing:
+        monkeypatch.delattr(name)
+    assert streamed(sheet) == expected_stream
+    assert_frame_equal(read_with_pandas(sheet), expected_frame)
+    for mode, kwargs in (("default", {}), ("bulk", {"bulk": True}), ("streaming", {"streaming": True})):
+        result = pipeline.process_single_file(sheet, profile_unmapped=False, **kwargs)
+        assert result["raw_data"] == expected[mode]["raw_data"]
+        assert result["raw_columns_info"] == expected[mode]["raw_columns_info"]
+
+def test_shared_string_workbook(tmp_path):
+    # The exported originals store text in a shared string table
+    header, rows = interleave(HEADER, exam_rows(50))
+    path = str(tmp_path / "shared.xlsx")
+    write_xlsx(path, header, rows)
+    assert_frame_equal(read_projected(path), read_with_pandas(path))
+    assert streamed(path) == streamed(path, projected=False)
@@ -0,0 +1,98 @@
+"""
+Attachment downloads against a local HTTP server: retries with exponential
+backoff, the overall time budget, and the SHA-256 computed while streaming.
+Run with: python -m pytest scripts
+"""
+import hashlib
+import os
+import time
+
+import pytest
+import requests
+
+import auto_update_exam_data as crawler
+from conftest import Resource
+from http_cache import HttpCache
+
+BODY = os.urandom(300 * 1024 + 17)   # several CHUNK_SIZE chunks plus a partial one
+
+
+@pytest.fixture
+def session():
+    with crawler.create_session() as session:
+        yield session
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the backoff delays and shortens them so the tests stay fast."""
+    delays = []
+    real_sleep = time.sleep
+
+    def sleep(seconds):
+        delays.append(seconds)
+        real_sleep(min(seconds, 0.01))
+
+    monkeypatch.setattr(crawler.time, "sleep", sleep)
+    return delays
+
+
+def test_streamed_sha256_matches_file_on_disk(http_server, session, tmp_path):
+    http_server.resources["/a.xlsx"] = Resource(BODY, etag='"v1"')
+    cache = HttpCache(str(tmp_path / "http"), session)
+    save_path = tmp_path / "a.xlsx"
+    result = crawler.download_file(http_server.url("/a.xlsx"), str(save_path), cache, session=session)
+
+    assert result == {"path": str(save_path), "sha256": hashlib.sha256(BODY).hexdigest(),
+                      "size": len(BODY), "reused": False}
+    assert save_path.read_bytes() == BODY
+    assert crawler.file_sha256(str(save_path)) == result["sha256"]
+    assert not os.path.exists(str(save_path) + ".part")
+    assert cache.entries[http_server.url("/a.xlsx")] == {"etag": '"v1"', "last_modified": None,
+                                                          "content_length": len(BODY)}
+    assert cache.bytes_downloaded == len(BODY)
+
+def test_retries_after_503_with_backoff(http_server, session, tmp_path, sleeps):
+    http_server.resources["/a.xlsx"] = Resource(BODY, failures=2)
+    result = crawler.download_file(http_server.url("/a.xlsx"), str(tmp_path / "a.xlsx"), session=session)
+
+    assert result["sha256"] == hashlib.sha256(BODY).hexdigest()
+    assert http_server.count("GET", "/a.xlsx") == 3
+    assert sleeps == [crawler.DOWNLOAD_BACKOFF, crawler.DOWNLOAD_BACKOFF * 2]
+
+def test_gives_up_after_the_last_attempt(http_server, session, tmp_path, sleeps):
+    http_server.resources["/a.xlsx"] = Resource(BODY, failures=crawler.DOWNLOAD_RETRIES)
+    assert crawler.download_file(http_server.url("/a.xlsx"), str(tmp_path / "a.xlsx"), session=session) is None
+    assert http_server.count("GET", "/a.xlsx") == crawler.DOWNLOAD_RETRIES
+    assert len(sleeps) == crawler.DOWNLOAD_RETRIES - 1
+    assert os.listdir(tmp_path) == []
+
+def test_client_errors_are_not_retried(http_server, session, tmp_path, sleeps):
+    assert crawler.download_file(http_server.url("/missing.xlsx"), str(tmp_path / "a.xlsx"), session=session) is None
+    assert http_server.count("GET", "/missing.xlsx") == 1
+    assert sleeps == []
+
+def test_deadline_ends_a_slow_download(http_server, session, tmp_path):
+    http_server.resources["/slow.xlsx"] = Resource(BODY, chunk_size=crawler.CHUNK_SIZE, chunk_delay=0.3)
+    started = time.monotonic()
+    result = crawler.download_file(http_server.url("/slow.xlsx"), str(tmp_path / "slow.xlsx"),
+                                   session=session, deadline=started + 0.5)
+
+    assert result is None
+    assert time.monotonic() - started < 1.5    # the full body would take ~1.5 s
+    assert http_server.count("GET", "/slow.xlsx") == 1
+    assert os.listdir(tmp_path) == []
+
+def test_no_retry_past_the_deadline(http_server, session, tmp_path, sleeps):
+    http_server.resources["/a.xlsx"] = Resource(BODY, failures=2)
+    result = crawler.download_file(http_server.url("/a.xlsx"), str(tmp_path / "a.xlsx"), session=session,
+                                   deadline=time.monotonic() + crawler.DOWNLOAD_BACKOFF / 2)
+    assert result is None
+    assert http_server.count("GET", "/a.xlsx") == 1
+    assert sleeps == []
+
+def test_expired_deadline_makes_no_request(http_server, session, tmp_path):
+    http_server.resources["/a.xlsx"] = Resource(BODY)
+    result = crawler.download_file(http_server.url("/a.xlsx"), str(tmp_path / "a.xlsx"), session=session,
+                                   deadline=time.monotonic() - 1)
+    assert result is None
+    assert http_server.requests == []
@@ -0,0 +1,127 @@
+"""
+HttpCache against a local HTTP server: conditional GETs reuse the cached body on
+304, validators persist across runs, and HEAD probes tell changed attachments
+from unchanged ones. Run with: python -m pytest scripts
+"""
+import os
+
+import pytest
+import requests
+
+import auto_update_exam_data as crawler
+from conftest import Resource
+from http_cache import HttpCache
+
+PAGE = "<html><body>考试安排 ✅</body></html>".encode("utf-8")
+LAST_MODIFIED = "Mon, 05 Jan 2026 08:00:00 GMT"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / "http"), requests.Session())
+
+
+def test_304_reuses_cached_body(http_server, cache):
+    http_server.resources["/list.htm"] = Resource(PAGE, etag='"v1"')
+    url = http_server.url("/list.htm")
+    assert cache.get_text(url, headers={}) == PAGE.decode("utf-8")
+    assert cache.bytes_downloaded == len(PAGE)
+
+    assert cache.get_text(url, headers={}) == PAGE.decode("utf-8")
+    method, _, headers = http_server.requests[-1]
+    assert (method, headers.get("If-None-Match")) == ("GET", '"v1"')
+    assert cache.bytes_downloaded == len(PAGE)
+    assert cache.bytes_saved == len(PAGE)
+
+def test_changed_page_is_downloaded_again(http_server, cache):
+    resource = http_server.resources["/list.htm"] = Resource(PAGE, etag='"v1"')
+    url = http_server.url("/list.htm")
+    cache.get_text(url, headers={})
+    resource.body, resource.etag = b"<html>new</html>", '"v2"'
+    assert cache.get_text(url, headers={}) == "<html>new</html>"
+    assert cache.entries[url]["etag"] == '"v2"'
+    assert cache.get_text(url, headers={}) == "<html>new</html>"
+    assert cache.bytes_saved == len(b"<html>new</html>")
+
+def test_validators_persist_across_runs(http_server, cache, tmp_path):
+    http_server.resources["/list.htm"] = Resource(PAGE, last_modified=LAST_MODIFIED)
+    url = http_server.url("/list.htm")
+    cache.get_text(url, headers={})
+    cache.save()
+
+    reloaded = HttpCache(str(tmp_path / "http"), requests.Session())
+    assert reloaded.entries[url] == {"etag": None, "last_modified": LAST_MODIFIED, "content_length": len(PAGE)}
+    assert reloaded.conditional_headers(url) == {"If-Modified-Since": LAST_MODIFIED}
+    assert reloaded.get_text(url, headers={}) == PAGE.decode("utf-8")
+    assert http_server.requests[-1][2].get("If-Modified-Since") == LAST_MODIFIED
+    assert reloaded.bytes_downloaded == 0
+
+def test_missing_body_sends_no_validators(http_server, cache, tmp_path):
+    http_server.resources["/list.htm"] = Resource(PAGE, etag='"v1"')
+    url = http_server.url("/list.htm")
+    cache.get_text(url, headers={})
+    for name in os.listdir(cache.body_dir):
+        os.remove(os.path.join(cache.body_dir, name))
+    assert cache.get_text(url, headers={}) == PAGE.decode("utf-8")
+    assert "If-None-Match" not in http_server.requests[-1][2]
+
+def test_download_304_reuses_existing_file(http_server, cache, tmp_path):
+    http_server.resources["/a.xlsx"] = Resource(b"x" * 1000, etag='"v1"')
+    url = http_server.url("/a.xlsx")
+    existing = tmp_path / "a.xlsx"
+    first = crawler.download_file(url, str(existing), cache)
+    assert first["reused"] is False and existing.read_bytes() == b"x" * 1000
+
+    again = crawler.download_file(url, str(tmp_path / "new.xlsx"), cache, existing_path=str(existing))
+    assert again == {"path": str(existing), "sha256": None, "size": 1000, "reused": True}
+    assert http_server.requests[-1][2].get("If-None-Match") == '"v1"'
+    assert not (tmp_path / "new.xlsx").exists()
+    assert cache.bytes_saved == 1000
+
+
+@pytest.mark.parametrize("etag, last_modified, expected", [
+    ('"v1"', LAST_MODIFIED, True),
+    ('"v2"', LAST_MODIFIED, False),
+    ('"v1"', "Tue, 06 Jan 2026 08:00:00 GMT", False),
+    (None, None, None),
+])
+def test_head_probe(http_server, cache, etag, last_modified, expected):
+    resource = http_server.resources["/a.xlsx"] = Resource(b"x" * 100, etag='"v1"', last_modified=LAST_MODIFIED)
+    url = http_server.url("/a.xlsx")
+    assert cache.probe(url, headers={}) is None    # nothing recorded yet
+    cache.record(url, {"ETag": resource.etag, "Last-Modified": resource.last_modified}, 100)
+
+    resource.etag, resource.last_modified = etag, last_modified
+    assert cache.probe(url, headers={}) is expected
+    assert http_server.count("HEAD", "/a.xlsx") == 1
+    assert http_server.count("GET", "/a.xlsx") == 0
+
+def test_head_probe_detects_size_change(http_server, cache):
+    resource = http_server.resources["/a.xlsx"] = Resource(b"x" * 100, etag='"v1"')
+    url = http_server.url("/a.xlsx")
+    cache.record(url, {"ETag": '"v1"'}, 100)
+    resource.body = b"x" * 101
+    assert cache.probe(url, headers={}) is False
+
+def test_head_probe_of_missing_url(http_server, cache):
+    url = http_server.url("/gone.xlsx")
+    cache.record(url, {"ETag": '"v1"'}, 100)
+    assert cache.probe(url, headers={}) is None
+
+def test_probe_attachment_needs_the_saved_file(http_server, cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, "SAVE_DIR", str(tmp_path))
+    http_server.resources["/a.xlsx"] = Resource(b"x" * 100, etag='"v1"')
+    file_info = {"name": "a.xlsx", "url": http_server.url("/a.xlsx")}
+    cache.record(file_info["url"], {"ETag": '"v1"'}, 100)
+
+    assert crawler.probe_attachment(file_info, cache) is False
+    (tmp_path / "a.xlsx").write_bytes(b"x" * 100)
+    assert crawler.probe_attachment(file_info, cache) is True
+    assert crawler.probe_attachment(file_info, None) is False
+
+    http_server.resources["/a.xlsx"].etag = '"v2"'
+    assert crawler.probe_attachment(file_info, cache) is False
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    result = crawler.fetch_attachment(file_info, str(temp_dir), cache)
+    assert result["reused"] is False and result["path"] == str(temp_dir / "a.xlsx")
@@ -0,0 +1,175 @@
+"""
+Stable record ids (assign_record_ids / write_record_ids) and the delta computed
+from the stored id layouts. Each "run" below assigns ids against the layout the
+previous run stored, as merge_rows() and publish_outputs() do.
+Run with: python -m pytest scripts
+"""
+import json
+
+import pytest
+
+import analyze_and_update as pipeline
+
+
+def exam(class_name, course_code="B0401", course_name="高等数学", start="2026-01-05T08:00:00+08:00",
+         location="教1-101", **fields):
+    row = dict.fromkeys(pipeline.OUTPUT_FIELDS, "")
+    row.update(id="pending", class_name=class_name, course_code=course_code, course_name=course_name,
+               start_timestamp=start, location=location, count=30, duration_minutes=100, parse_error=None)
+    row.update(fields)
+    return row
+
+def copies(rows):
+    return [dict(row, id="pending") for row in rows]
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """run(rows) assigns ids against the last stored layout, stores the new one, returns (ids, previous, current)."""
+    monkeypatch.setattr(pipeline, "RECORD_IDS_PATH", str(tmp_path / "record_ids.json"))
+
+    def run(rows):
+        previous = pipeline.load_record_ids().get('keys') or {}
+        layouts = pipeline.assign_record_ids(rows, previous)
+        current = pipeline.write_record_ids(layouts, content_digest=f"sha256:{len(rows)}")
+        return [row['id'] for row in rows], pipeline.layout_digests(previous), pipeline.layout_digests(current)
+
+    return run
+
+@pytest.fixture
+def stored(tmp_path):
+    def stored():
+        with open(tmp_path / "record_ids.json", encoding='utf-8') as f:
+            return json.load(f)["keys"]
+    return stored
+
+# Three sittings of one class's exam in different rooms: one key, three siblings
+SIBLINGS = [exam("B240401", location=f"教1-10{n}", start=f"2026-01-0{5 + n}T08:00:00+08:00") for n in range(3)]
+OTHERS = [exam("B240402"), exam("B240403", course_code="B0402", course_name="线性代数")]
+
+
+def test_ids_are_short_key_hashes_with_sibling_slots(run):
+    ids, _, _ = run(copies(SIBLINGS + OTHERS))
+    base = pipeline.id_key_hash(SIBLINGS[0])[:pipeline.ID_LENGTH]
+    assert ids[:3] == [base, f"{base}-1", f"{base}-2"]
+    assert len(set(ids)) == len(ids)
+    assert all(len(i) == pipeline.ID_LENGTH for i in ids[3:])
+
+def test_positional_ids_do_not_matter(run):
+    first, _, _ = run(copies(SIBLINGS + OTHERS))
+    renamed = [dict(row, id=f"other.xlsx-{n}") for n, row in enumerate(reversed(SIBLINGS + OTHERS))]
+    again, _, _ = run(renamed)
+    assert again == list(reversed(first))
+
+def test_inserted_row_keeps_every_other_id(run):
+    rows = copies(SIBLINGS + OTHERS)
+    ids, _, _ = run(rows)
+    before = dict(zip(map(id, rows), ids))
+
+    new_class = exam("B240404")
+    new_sitting = exam("B240401", location="教2-201", start="2026-01-04T08:00:00+08:00")  # sorts first
+    rows = [new_class] + rows[:2] + [new_sitting] + rows[2:]
+    for row in rows:
+        row['id'] = "pending"
+    ids, _, _ = run(rows)
+    after = dict(zip(map(id, rows), ids))
+    assert {key: after[key] for key in before} == before
+    assert after[id(new_sitting)].endswith("-3")
+    assert len(set(ids)) == len(ids)
+
+def test_corrected_sibling_keeps_its_slot(run):
+    first, _, _ = run(copies(SIBLINGS))
+    # Move the middle sitting to another room and ahead of the others
+    corrected = copies(SIBLINGS)
+    corrected[1].update(location="教3-301", start_timestamp="2026-01-01T08:00:00+08:00")
+    again, previous, current = run(corrected)
+    assert again == first
+    assert [i for i in current if current[i] != previous[i]] == [first[1]]
+
+def test_corrected_and_removed_siblings(run, stored):
+    first, _, _ = run(copies(SIBLINGS))
+    # The last sitting is cancelled and the first moved: the first keeps its id
+    corrected = copies(SIBLINGS[:2])
+    corrected[0]['location'] = "教3-301"
+    again, _, _ = run(corrected)
+    assert again == first[:2]
+    assert len(stored()[pipeline.id_key_hash(SIBLINGS[0])]) == 3    # id + two slots
+
+def test_trailing_unused_slots_are_dropped(run, stored):
+    key = pipeline.id_key_hash(SIBLINGS[0])
+    first, _, _ = run(copies(SIBLINGS))
+    assert len(stored()[key]) == 4
+
+    # Without the middle sitting, its slot stays so the last keeps "-2"
+    ids, _, _ = run(copies([SIBLINGS[0], SIBLINGS[2]]))
+    assert ids == [first[0], first[2]]
+    assert stored()[key][2] is None and len(stored()[key]) == 4
+
+    # Without the last one too, both unused slots are trailing and dropped
+    ids, _, _ = run(copies(SIBLINGS[:1]))
+    assert ids == first[:1]
+    assert len(stored()[key]) == 2
+
+    # Repeated corrections do not grow the layout
+    for n in range(5):
+        run(copies([dict(SIBLINGS[0], location=f"教4-40{n}")]))
+    assert len(stored()[key]) == 2
+
+def test_short_id_collision_falls_back_to_full_hash(run, monkeypatch):
+    hashes = {"B240401": "abcdef0011111111", "B240402": "abcdef0022222222", "B240403": "0123456789abcdef"}
+    monkeypatch.setattr(pipeline, "id_key_hash", lambda row: hashes[row['class_name']])
+    rows = [exam("B240402"), exam("B240401"), exam("B240403")]
+    ids, _, _ = run(rows)
+    # New keys are numbered in hash order: the first takes the short id
+    assert ids == ["abcdef0022222222", "abcdef00", "01234567"]
+
+    # Both keep their ids later, even after the short id's holder is gone
+    ids, _, _ = run([exam("B240402"), exam("B240403")])
+    assert ids == ["abcdef0022222222", "01234567"]
+    ids, _, _ = run([exam("B240402"), exam("B240401")])
+    assert ids == ["abcdef0022222222", "abcdef00"]
+
+def test_short_id_held_by_a_previous_key(run, monkeypatch):
+    hashes = {"B240401": "abcdef0011111111", "B240402": "abcdef0022222222"}
+    monkeypatch.setattr(pipeline, "id_key_hash", lambda row: hashes[row['class_name']])
+    assert run([exam("B240402")])[0] == ["abcdef00"]
+    assert run([exam("B240402"), exam("B240401")])[0] == ["abcdef00", "abcdef0011111111"]
+
+
+def test_delta_counts(run):
+    rows = copies(SIBLINGS + OTHERS)
+    first, _, _ = run(rows)
+
+    rows = copies(SIBLINGS + OTHERS)
+    rows[1]['location'] = "教3-301"         # changed
+    rows[3]['teacher'] = "张老师"           # changed
+    del rows[4]                             # removed
+    rows.append(exam("B240405"))           # added
+    ids, previous, current = run(rows)
+    delta = pipeline.compute_delta(previous, current, rows)
+
+    assert [row['id'] for row in delta['added']] == [ids[-1]]
+    assert delta['removed'] == [first[4]]
+    assert [row['id'] for row in delta['changed']] == [first[1], first[3]]
+    assert delta['changed'][0]['location'] == "教3-301"
+
+def test_delta_of_identical_runs_is_empty(run):
+    run(copies(SIBLINGS + OTHERS))
+    rows = copies(SIBLINGS + OTHERS)
+    _, previous, current = run(rows)
+    assert pipeline.compute_delta(previous, current, rows) == {"added": [], "removed": [], "changed": []}
+
+def test_delta_applies_to_the_previous_output(run):
+    old_rows = copies(SIBLINGS + OTHERS)
+    run(old_rows)
+    new_rows = copies(SIBLINGS[1:] + OTHERS) + [exam("B240405")]
+    new_rows[0]['count'] = 45
+    _, previous, current = run(new_rows)
+    delta = pipeline.compute_delta(previous, current, new_rows)
+
+    patched = {row['id']: row for row in old_rows}
+    for record_id in delta['removed']:
+        del patched[record_id]
+    for row in delta['added'] + delta['changed']:
+        patched[row['id']] = row
+    assert patched == {row['id']: row for row in new_rows}
@@ -0,0 +1,67 @@
+"""
+query_search_index() must return exactly what a plain substring scan over the
+class names returns. Run with: python -m pytest scripts
+"""
+import pytest
+
+from search_index import build_search_index, load_search_index, normalize, query_search_index, save_search_index
+
+CLASS_NAMES = [
+    "B230205", "B230206", "B240402", "B240402", "b240411", "Q2401", "F240101",
+    "通信工程2401", "通信工程(卓越)2402", "计算机2301", "AAAA", "ABXBC", "AB12CD",
+    "  ", "", "X", "1",
+]
+NO_MATCH_TERMS = ["ZZ", "Z", "不存在", "ABC", "B2404020", "工程通信", "AAAAA"]
+
+
+def brute_force(classes, term):
+    term = normalize(term)
+    if not term:
+        return []
+    return sorted(name for name in classes if term in normalize(name))
+
+def all_substrings(names, max_len=4):
+    terms = set()
+    for name in names:
+        for i in range(len(name)):
+            for j in range(i + 1, min(len(name), i + max_len) + 1):
+                terms.add(name[i:j])
+    return sorted(terms)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_search_index(CLASS_NAMES)
+
+
+def test_classes_are_sorted_and_deduplicated(index):
+    assert index["classes"] == sorted({name for name in CLASS_NAMES if name})
+
+@pytest.mark.parametrize("term", all_substrings([name.strip() for name in CLASS_NAMES]))
+def test_matches_brute_force_on_every_substring(index, term):
+    assert query_search_index(index, term) == brute_force(index["classes"], term)
+
+@pytest.mark.parametrize("term", ["b2404", "B2404", " b2404 ", "aa", "a", "Abxbc", "通信"])
+def test_is_case_insensitive_and_trims(index, term):
+    assert query_search_index(index, term) == brute_force(index["classes"], term)
+
+@pytest.mark.parametrize("term", NO_MATCH_TERMS)
+def test_no_match(index, term):
+    assert query_search_index(index, term) == []
+    assert brute_force(index["classes"], term) == []
+
+def test_grams_present_but_not_adjacent(index):
+    # "AB" and "BC" both occur in "ABXBC", but "ABC" does not
+    assert set(normalize("ABC")[i:i + 2] for i in range(2)) <= set(index["grams"])
+    assert query_search_index(index, "ABC") == []
+
+@pytest.mark.parametrize("term", ["", "   "])
+def test_blank_query(index, term):
+    assert query_search_index(index, term) == []
+
+def test_round_trip(tmp_path, index):
+    path = tmp_path / "class_search_index.json"
+    save_search_index(index, str(path))
+    loaded = load_search_index(str(path))
+    for term in ["B24", "2", "工程", "ZZ"]:
+        assert query_search_index(loaded, term) == query_search_index(index, term)
@@ -0,0 +1,58 @@
+"""
+Startup budget: importing analyze_and_update, --help, a run without workbooks and
+a run whose workbooks are all in the parse cache must not load the parsing
+libraries, and must stay within the budgets below. Each check runs in a fresh
+interpreter. Run with: python -m pytest scripts
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import analyze_and_update as pipeline
+from benchmark import SCRIPTS_DIR, measure_import_time, time_cli
+
+# Budgets for the paths that must not load the parsing libraries
+IMPORT_BUDGET_MS = 150
+STARTUP_BUDGET_S = 0.5
+NO_CHANGE_BUDGET_S = 1.0
+
+SCRIPT = os.path.join(SCRIPTS_DIR, 'analyze_and_update.py')
+
+
+def loaded_parsing_libraries(code: str) -> list:
+    """Runs `code` in a fresh interpreter and returns the parsing libraries it left in sys.modules."""
+    probe = f"{code}\nimport sys\nprint('\\nloaded:', *(m for m in {pipeline.PARSING_LIBRARIES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, '-c', probe], cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True)
+    return proc.stdout.splitlines()[-1].split()[1:]
+
+
+def test_import_loads_no_parsing_library():
+    assert loaded_parsing_libraries("import analyze_and_update") == []
+    assert measure_import_time()["heavy_imports"] == []
+
+def test_import_time_within_budget():
+    best_ms = min(measure_import_time()["import_ms"] for _ in range(3))
+    assert best_ms <= IMPORT_BUDGET_MS
+
+def test_help_within_budget():
+    assert loaded_parsing_libraries("import analyze_and_update as p\ntry:\n    p.parse_args(['--help'])\n"
+                                    "except SystemExit:\n    pass") == []
+    assert time_cli(['--help'], repeat=3) <= STARTUP_BUDGET_S
+
+def test_no_workbooks_within_budget(tmp_path):
+    assert time_cli(['--data-dir', str(tmp_path), '--no-metrics', '--no-archive'], repeat=3) <= STARTUP_BUDGET_S
+
+def test_no_change_within_budget(tmp_path):
+    workbooks = pipeline.get_xlsx_files()
+    if not workbooks:
+        pytest.skip("no workbooks in public/data")
+    for path in workbooks:
+        shutil.copy2(path, tmp_path)
+    args = ['--data-dir', str(tmp_path), '--no-metrics', '--no-archive']
+    # The first run fills the parse cache and writes the outputs; the timed runs find nothing to do
+    subprocess.run([sys.executable, SCRIPT, *args], capture_output=True, check=True)
+    assert loaded_parsing_libraries(f"import analyze_and_update as p\np.main({args!r})") == []
+    assert time_cli(args, repeat=3) <= NO_CHANGE_BUDGET_S
@@ -0,0 +1,76 @@
+"""
+The streaming reader (process_single_file(streaming=True)) must produce the same
+records, column profile and samples as the DataFrame paths, including columns
+pandas casts as a whole. Run with: python -m pytest scripts
+"""
+import json
+
+import openpyxl
+import pytest
+
+import analyze_and_update as pipeline
+
+HEADER = ["校区", "课程名称", "班级名称", "考试时间", "人数", "年级", "专业名称", "备注", "学院"]
+
+def exam_row(i, grade, major="通信工程", notes=None, school="通信学院"):
+    return ["仙林", f"课程{i}", f"B2404{i % 3:02d}", f"2026年01月{5 + i % 3:02d}日 08:00-09:40",
+            30 + i, grade, major, notes, school]
+
+# Each sheet stresses one way pandas types a column as a whole
+SHEETS = {
+    # Whole-number years with blank cells become float64: "2024.0"
+    "blank_int": [exam_row(i, None if i % 4 == 1 else 2024 + i % 2) for i in range(12)],
+    "no_blanks": [exam_row(i, 2024 + i % 2) for i in range(6)],
+    # Year typed as text, with and without blanks
+    "numeric_text": [exam_row(i, None if i == 3 else str(2024 + i % 2), major="007" if i % 2 else "8")
+                     for i in range(6)],
+    "mixed_fraction": [exam_row(i, 2024.5 if i == 2 else 2024, notes=None if i == 4 else i) for i in range(6)],
+    "bool_with_blank": [exam_row(i, 2024, notes=None if i == 1 else bool(i % 2)) for i in range(6)],
+    "mixed_types": [exam_row(i, 2024 if i % 2 else "二四级", school=None if i == 2 else 3) for i in range(6)],
+    # Trailing blank cells of the last rows are dropped by pandas, not typed
+    "trailing_blanks": [exam_row(i, 2024) for i in range(5)] + [exam_row(5, None)],
+}
+
+
+def write_sheet(path, rows, banner=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if banner:
+        ws.append([banner])
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+def run(path, **kwargs):
+    result = pipeline.process_single_file(path, **kwargs)
+    assert result is not None
+    return (result["raw_data"], result["raw_columns_info"],
+            json.loads(json.dumps(result["raw_samples"], default=str)))
+
+
+@pytest.mark.parametrize("profile_unmapped", [True, False], ids=["all_columns", "mapped_only"])
+@pytest.mark.parametrize("name", SHEETS)
+def test_streaming_matches_dataframe_paths(tmp_path, name, profile_unmapped):
+    path = write_sheet(tmp_path / f"{name}.xlsx", SHEETS[name])
+    expected = run(path, profile_unmapped=profile_unmapped)
+    assert run(path, bulk=True, profile_unmapped=profile_unmapped) == expected
+    assert run(path, streaming=True, profile_unmapped=profile_unmapped) == expected
+
+def test_blank_year_cells_turn_the_column_into_floats(tmp_path):
+    path = write_sheet(tmp_path / "blank_int.xlsx", SHEETS["blank_int"], banner="2025-2026学年第一学期考试安排")
+    records, columns_info, _ = run(path, streaming=True)
+    assert {r["grade"] for r in records} == {"2024.0", "2025.0", ""}
+    assert next(c for c in columns_info if c["column_name"] == "年级")["dtype"] == "float64"
+    assert run(path, bulk=True)[0] == records
+
+@pytest.mark.parametrize("values, dtype", [
+    ([1, 2], "int64"), ([1, None, 2], "float64"), ([1, 2.5], "float64"),
+    ([True, False], "bool"), ([True, None, False], "float64"), ([True, 3], "int64"),
+    (["3", "4"], "int64"), (["3", None, "4"], "float64"), ([3, "x"], "object"), ([True, "x"], "object"),
+])
+def test_profiler_dtype_matches_pandas(values, dtype):
+    profiler = pipeline.ColumnProfiler(["c"])
+    list(profiler.observe({"c": v} for v in values))
+    assert profiler.dtypes() == {"c": dtype}
@@ -0,0 +1,157 @@
+"""
+The memoized time parser (parse_time_string / parse_time_batch) and the
+ExamRecord validator built on it must give exactly what the original per-row
+pydantic validator gave. Run with: python -m pytest scripts
+"""
+import glob
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import pandas as pd
+import pytest
+from pydantic import BaseModel, field_validator, model_validator
+
+import analyze_and_update as pipeline
+
+pipeline.load_dependencies()
+
+
+class LegacyTimeRecord(BaseModel):
+    """The raw_time handling of ExamRecord before the time parsing engine (comments dropped)."""
+    raw_time: str = ""
+    start_timestamp: Optional[str] = None
+    end_timestamp: Optional[str] = None
+    duration_minutes: int = 0
+    date: Optional[str] = None
+    parse_error: Optional[str] = None
+
+    @field_validator('raw_time', mode='before')
+    @classmethod
+    def clean_text_fields(cls, v: Any) -> str:
+        if pd.isna(v) or v == "" or v is None:
+            return ""
+        return str(v).replace('\xa0', ' ').strip()
+
+    @model_validator(mode='after')
+    def parse_time_logic(self):
+        time_str = self.raw_time
+        if not time_str:
+            self.parse_error = "Missing time data"
+            return self
+
+        if isinstance(time_str, (datetime, pd.Timestamp)):
+            time_str = str(time_str)
+
+        start_dt = None
+        end_dt = None
+        date_str = ""
+
+        try:
+            match_cn = pipeline.REGEX_CHINESE.search(time_str)
+            match_iso = pipeline.REGEX_ISO.search(time_str)
+
+            if match_cn:
+                year, month, day, start_hm, end_hm = match_cn.groups()
+                date_str = f"{year}-{int(month):02d}-{int(day):02d}"
+            elif match_iso:
+                d_str, start_hm, end_hm = match_iso.groups()
+                try:
+                    date_str = datetime.strptime(d_str, "%Y-%m-%d").strftime("%Y-%m-%d")
+                except ValueError:
+                    date_str = d_str
+            else:
+                self.parse_error = "Unrecognized date format"
+                return self
+
+            start_str = f"{date_str} {start_hm}:00"
+            end_str = f"{date_str} {end_hm}:00"
+
+            beijing_tz = timezone(timedelta(hours=8))
+            start_dt = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=beijing_tz)
+            end_dt = datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=beijing_tz)
+
+            self.duration_minutes = int((end_dt - start_dt).total_seconds() / 60)
+            self.start_timestamp = start_dt.isoformat()
+            self.end_timestamp = end_dt.isoformat()
+            self.date = date_str
+            self.parse_error = None
+
+        except Exception as e:
+            self.parse_error = f"Parsing exception: {str(e)}"
+
+        return self
+
+
+def real_raw_times():
+    """Distinct values of the time column in the workbooks shipped in public/data."""
+    values = set()
+    for path in glob.glob(os.path.join(pipeline.PUBLIC_DIR, 'data', '*.xlsx')):
+        wb, ws = pipeline.open_first_sheet(path)
+        try:
+            layout = pipeline.sniff_layout(ws)
+            mapping, _ = pipeline.resolve_column_mapping(layout.columns)
+            if not mapping.get('raw_time'):
+                continue
+            column = layout.columns.index(mapping['raw_time'])
+            for row in ws.iter_rows(min_row=layout.header_row + 2, values_only=True):
+                if column < len(row) and row[column] is not None:
+                    values.add(row[column])
+        finally:
+            wb.close()
+    return sorted(values, key=str)
+
+REAL_RAW_TIMES = real_raw_times()
+
+EDGE_RAW_TIMES = [
+    "", "   ", "\xa0", None, float('nan'),
+    "2026年01月05日(星期一) 08:00-09:40", "2026年1月5日 8:00-9:40", "2026年1月5日 08:00至10:00",
+    "2026年01月05日 08:00~10:00", "2026年01月05日 08:00 - 10:00",
+    "第10周周1(2025-11-10) 13:30-15:20", "(2025-11-10) 13:30-15:20", "2025-1-5 8:00-9:40",
+    "\xa02026-01-05 08:00-09:40\xa0", "2026-01-05 10:00-08:00", "2026-01-05 23:00-23:59",
+    # Malformed: impossible dates and times, missing parts, free text
+    "2025年13月40日 08:00-10:00", "2025-02-30 08:00-10:00", "2026-01-05 25:00-26:00",
+    "2026-01-05 08:60-09:00", "2026年01月05日", "2026-01-05", "08:00-10:00",
+    "待定", "另行通知", "2026/01/05 08:00-10:00", "2026.01.05 08:00-10:00",
+    # Non-string cells as they come out of a sheet
+    45000, 45000.5, 0, datetime(2026, 1, 5, 8, 0), pd.Timestamp("2026-01-05 08:00"),
+]
+
+PARSED_FIELDS = ('start_timestamp', 'end_timestamp', 'duration_minutes', 'date', 'parse_error')
+
+
+def legacy(value):
+    record = LegacyTimeRecord(raw_time=value)
+    return record.raw_time, tuple(getattr(record, f) for f in PARSED_FIELDS)
+
+def current(value):
+    record = pipeline.ExamRecord(id="x", _source_file="f.xlsx", _row_index=0, raw_time=value)
+    return record.raw_time, tuple(getattr(record, f) for f in PARSED_FIELDS)
+
+
+def test_real_data_is_available():
+    if not REAL_RAW_TIMES:
+        pytest.skip("no workbooks in public/data")
+    assert len(REAL_RAW_TIMES) > 10
+
+@pytest.mark.parametrize("value", REAL_RAW_TIMES + EDGE_RAW_TIMES, ids=repr)
+def test_validator_matches_legacy(value):
+    assert current(value) == legacy(value)
+
+@pytest.mark.parametrize("value", REAL_RAW_TIMES + EDGE_RAW_TIMES, ids=repr)
+def test_parse_time_string_matches_legacy(value):
+    raw_time, expected = legacy(value)
+    assert tuple(pipeline.parse_time_string(raw_time)) == expected
+
+def test_parse_time_batch_matches_legacy():
+    raw_times = [legacy(value)[0] for value in REAL_RAW_TIMES + EDGE_RAW_TIMES]
+    batch = pipeline.parse_time_batch(raw_times * 2)
+    assert set(batch) == set(raw_times)
+    for value in REAL_RAW_TIMES + EDGE_RAW_TIMES:
+        raw_time, expected = legacy(value)
+        assert tuple(batch[raw_time]) == expected
+
+def test_memoized_results_are_stable():
+    for value in REAL_RAW_TIMES[:20] + ["2025-02-30 08:00-10:00", ""]:
+        raw_time = legacy(value)[0]
+        assert pipeline.parse_time_string(raw_time) is pipeline.parse_time_string(raw_time)
@@ -4,12 +4,12 @@ import { ThemeToggle } from './components/ThemeToggle';
 import { SearchInput } from './components/SearchInput';
 import { ExamList } from './components/ExamList';
 import { ExamDetail } from './components/ExamDetail';
-import { SearchResult } from '@/types';
+import { Exam, SearchResult } from '@/types';
 import { APP_CONFIG } from '@/constants';
 import { useExamData } from '@/hooks/useExamData';
 
 function App() {
-    const { exams: allExams, loading, error, sourceUrl, sourceTitle } = useExamData();
+    const { classNames, loadClassExams, loading, error, sourceUrl, sourceTitle } = useExamData();
 
     // UI State
     const [inputValue, setInputValue] = useState<string>(() => {
@@ -22,32 +22,51 @@ function App() {
     });
     const [reminders, setReminders] = useState<number[]>([30, 60]);
     const [selectedIds, setSelectedIds] = useState<Set<string>>(new Set());
+    // 当前详情班级的考试数据 (按需加载的分片)
+    const [classExams, setClassExams] = useState<{ className: string; exams: Exam[] } | null>(null);
 
     // 追踪已同步选中状态的班级，避免重复设置
     const prevSyncedClassRef = useRef<string | null>(null);
 
+    // classNames 已去重并排序，无需再扫描全部考试记录
+    const matchedClasses = useMemo<string[]>(() => {
+        if (!inputValue || inputValue.length < 2) return [];
+        const term = inputValue.trim().toUpperCase();
+        return classNames.filter(c => c.toUpperCase().includes(term));
+    }, [classNames, inputValue]);
+
+    const detailClass = useMemo<string | null>(() => {
+        if (!inputValue || inputValue.length < 2) return null;
+        if (manualSelection) return manualSelection;
+        return matchedClasses.length === 1 ? (matchedClasses[0] ?? null) : null;
+    }, [inputValue, manualSelection, matchedClasses]);
+
+    useEffect(() => {
+        if (!detailClass) return;
+        let cancelled = false;
+        loadClassExams(detailClass)
+            .then(exams => {
+                if (!cancelled) setClassExams({ className: detailClass, exams });
+            })
+            // 加载失败已由 useExamData 写入 error 状态并显示
+            .catch(() => undefined);
+        return () => { cancelled = true; };
+    }, [detailClass, loadClassExams]);
+
     const searchResult = useMemo<SearchResult>(() => {
         if (!inputValue || inputValue.length < 2) {
             return { mode: 'EMPTY', classes: [], exams: [] };
         }
-        const term = inputValue.trim().toUpperCase();
-        if (manualSelection) {
+        if (detailClass) {
             return {
                 mode: 'DETAIL',
-                classes: [manualSelection],
-                exams: allExams.filter(e => e.class_name === manualSelection)
+                classes: [detailClass],
+                exams: classExams && classExams.className === detailClass ? classExams.exams : []
             };
         }
-        const matchedExams = allExams.filter(e =>
-            e.class_name && e.class_name.toUpperCase().includes(term)
-        );
-        const uniqueClasses = Array.from(new Set(matchedExams.map(e => e.class_name))).sort();
-        if (uniqueClasses.length === 0) return { mode: 'NOT_FOUND', classes: [], exams: [] };
-        if (uniqueClasses.length === 1) {
-            return { mode: 'DETAIL', classes: uniqueClasses, exams: matchedExams };
-        }
-        return { mode: 'LIST', classes: uniqueClasses, exams: [] };
-    }, [allExams, inputValue, manualSelection]);
+        if (matchedClasses.length === 0) return { mode: 'NOT_FOUND', classes: [], exams: [] };
+        return { mode: 'LIST', classes: matchedClasses, exams: [] };
+    }, [inputValue, detailClass, classExams, matchedClasses]);
 
     /**
      * 处理选中状态同步和 URL 同步
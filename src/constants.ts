@@ -8,6 +8,7 @@ export const APP_CONFIG = {
     VISITOR_BADGE_URL: 'https://visitor-badge.laobi.icu/badge?page_id=njupt.hicancan.top&left_text=%20%E8%AE%BF%E9%97%AE%E9%87%8F%20&right_color=%234F46E5',
     DATA_URLS: {
         EXAMS: 'data/all_exams.json',
+        CLASS_INDEX: 'data/class_index.json',
         SUMMARY: 'data/data_summary.json'
     },
     START_TIME_DEFAULT: '2025-12-15T00:00:00',
@@ -1,38 +1,78 @@
-import { useState, useEffect } from 'react';
-import { Exam, Manifest } from '@/types';
+import { useState, useEffect, useCallback, useRef } from 'react';
+import { Exam, Manifest, ClassIndex } from '@/types';
 import { APP_CONFIG } from '@/constants';
 
 interface UseExamDataResult {
-    exams: Exam[];
+    classNames: string[];
+    loadClassExams: (className: string) => Promise<Exam[]>;
     loading: boolean;
     error: string | null;
     sourceUrl: string | null;
     sourceTitle: string | null;
 }
 
+const sortExams = (exams: Exam[]): Exam[] => {
+    return [...exams].sort((a, b) => {
+        if (a.start_timestamp && b.start_timestamp) {
+            return a.start_timestamp.localeCompare(b.start_timestamp);
+        }
+        return a.start_timestamp ? -1 : 1;
+    });
+};
+
+/**
+ * 优先加载轻量的班级目录 (class_index.json)，查看某个班级时再按需获取该班级的分片；
+ * 若目录不可用，则回退到完整的 all_exams.json。
+ */
 export function useExamData(): UseExamDataResult {
-    const [exams, setExams] = useState<Exam[]>([]);
+    const [classNames, setClassNames] = useState<string[]>([]);
     const [loading, setLoading] = useState<boolean>(true);
     const [error, setError] = useState<string | null>(null);
     const [sourceUrl, setSourceUrl] = useState<string | null>(null);
     const [sourceTitle, setSourceTitle] = useState<string | null>(null);
 
+    const classIndexRef = useRef<ClassIndex | null>(null);
+    // class_name -> 已加载的考试列表 (分片缓存 / 回退模式下的全量分组)
+    const examCacheRef = useRef<Map<string, Exam[]>>(new Map());
+
     useEffect(() => {
         const fetchOptions: RequestInit = { cache: 'no-cache' };
 
-        Promise.all([
-            fetch(APP_CONFIG.DATA_URLS.EXAMS, fetchOptions).then(r => r.json() as Promise<Exam[]>),
-            fetch(APP_CONFIG.DATA_URLS.SUMMARY, fetchOptions).then(r => r.json() as Promise<Manifest>).catch(() => null)
-        ])
-            .then(([examsData, manifestData]) => {
-                const sortedExams = [...examsData].sort((a, b) => {
-                    if (a.start_timestamp && b.start_timestamp) {
-                        return a.start_timestamp.localeCompare(b.start_timestamp);
+        const loadFullData = () =>
+            fetch(APP_CONFIG.DATA_URLS.EXAMS, fetchOptions)
+                .then(r => r.json() as Promise<Exam[]>)
+                .then(examsData => {
+                    const grouped = new Map<string, Exam[]>();
+                    for (const exam of sortExams(examsData)) {
+                        if (!exam.class_name) continue;
+                        const list = grouped.get(exam.class_name);
+                        if (list) list.push(exam);
+                        else grouped.set(exam.class_name, [exam]);
                     }
-                    return a.start_timestamp ? -1 : 1;
+                    examCacheRef.current = grouped;
+                    return Array.from(grouped.keys()).sort();
                 });
 
-                setExams(sortedExams);
+        const loadClassNames = fetch(APP_CONFIG.DATA_URLS.CLASS_INDEX, fetchOptions)
+            .then(r => {
+                if (!r.ok) throw new Error(`HTTP ${r.status}`);
+                return r.json() as Promise<ClassIndex>;
+            })
+            .then(index => {
+                classIndexRef.current = index;
+                return Object.keys(index.classes).sort();
+            })
+            .catch(err => {
+                console.warn('Class index unavailable, falling back to full data:', err);
+                return loadFullData();
+            });
+
+        Promise.all([
+            loadClassNames,
+            fetch(APP_CONFIG.DATA_URLS.SUMMARY, fetchOptions).then(r => r.json() as Promise<Manifest>).catch(() => null)
+        ])
+            .then(([names, manifestData]) => {
+                setClassNames(names);
 
                 if (manifestData && manifestData.generated_at) {
                     setSourceUrl(manifestData.source_url || null);
@@ -48,5 +88,30 @@ export function useExamData(): UseExamDataResult {
             });
     }, []);
 
-    return { exams, loading, error, sourceUrl, sourceTitle };
+    const loadClassExams = useCallback((className: string): Promise<Exam[]> => {
+        const cached = examCacheRef.current.get(className);
+        if (cached) return Promise.resolve(cached);
+
+        const entry = classIndexRef.current?.classes[className];
+        if (!classIndexRef.current || !entry) return Promise.resolve([]);
+
+        const shardUrl = `data/${classIndexRef.current.shard_dir}/${entry.file}`;
+        return fetch(shardUrl, { cache: 'no-cache' })
+            .then(r => {
+                if (!r.ok) throw new Error(`HTTP ${r.status} (${shardUrl})`);
+                return r.json() as Promise<Exam[]>;
+            })
+            .then(exams => {
+                // 分片在生成时已按开始时间排序；只缓存成功的结果，失败后可重新请求
+                examCacheRef.current.set(className, exams);
+                return exams;
+            })
+            .catch(err => {
+                console.error(err);
+                setError(`无法加载班级 ${className} 的考试数据，请刷新页面重试 (${shardUrl})`);
+                throw err;
+            });
+    }, []);
+
+    return { classNames, loadClassExams, loading, error, sourceUrl, sourceTitle };
 }
@@ -1,5 +1,5 @@
 export interface Exam {
-    id: string; // Generated unique id (filename-row)
+    id: string; // Stable id derived from class, course code and course name ("<hash>" or "<hash>-<n>")
     class_name: string; // e.g., "B240402"
     course_name: string; // e.g., "大学物理"
     location: string; // e.g., "教2-201"
@@ -31,10 +31,25 @@ export interface Manifest {
     generated_at: string; // ISO string
     files_processed: string[]; // List of processed Excel files
     total_records: number; // From Python script
+    content_digest?: string; // "sha256:..." of all_exams.json
+    file_digests?: Record<string, string>; // Excel filename -> "sha256:..." of its records
+    output_sizes?: Record<string, Record<string, number>>; // Output filename -> { raw, gz?, br? } bytes
+    conflicts?: { class: number; room: number }; // Overlapping exams per class / double-booked rooms (see conflicts.json)
+    delta?: { file: string; from_digest: string | null; added: number; removed: number; changed: number }; // Changes since the previous output
     source_url?: string; // Original URL of the exam schedule
     source_title?: string; // Title of the news article
 }
 
+export interface ClassIndexEntry {
+    file: string; // Shard filename inside ClassIndex.shard_dir
+    count: number; // Number of exams in the shard
+}
+
+export interface ClassIndex {
+    shard_dir: string; // Directory (relative to data/) holding per-class shards
+    classes: Record<string, ClassIndexEntry>; // class_name -> shard info
+}
+
 export type SearchMode = 'EMPTY' | 'NOT_FOUND' | 'LIST' | 'DETAIL';
 
 export interface SearchResult {